@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+#
+# Optional numba acceleration.
+#
+# jit() compiles a kernel with numba.njit when numba is installed, caching
+# the machine code on disk (next to the module, in __pycache__, or under
+# NUMBA_CACHE_DIR) so later processes load it instead of recompiling.
+# Without numba, or with FINANCE_DISABLE_JIT=1, it returns the function
+# unchanged. Kernels are plain loops over numpy arrays and scalars using
+# only + - * / and comparisons, so the compiled and uncompiled versions
+# produce bit-identical results and the uncompiled one is the reference.
+#
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+JIT_ENABLED = numba is not None and os.environ.get("FINANCE_DISABLE_JIT", "") in ("", "0")
+
+def jit(fn):
+    """fn compiled with numba (cached on disk) when JIT_ENABLED, else fn itself."""
+    if not JIT_ENABLED:
+        return fn
+    return numba.njit(cache=True)(fn)
+
+def python_function(kernel):
+    """The uncompiled function behind a jit() kernel."""
+    return getattr(kernel, "py_func", kernel)
+
+def max_difference(expected, actual):
+    """
+    Largest absolute difference between two results: arrays, scalars or
+    (nested) tuples/lists/dicts of them. NaNs in the same place count as
+    equal; a NaN on one side only, or mismatched shapes, is inf.
+    """
+    if isinstance(expected, dict):
+        if expected.keys() != actual.keys():
+            return np.inf
+        return max((max_difference(expected[k], actual[k]) for k in expected), default=0.0)
+    if isinstance(expected, (tuple, list)) and not np.isscalar(expected[0] if expected else 0):
+        if len(expected) != len(actual):
+            return np.inf
+        return max((max_difference(e, a) for e, a in zip(expected, actual)), default=0.0)
+    expected, actual = np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)
+    if expected.shape != actual.shape:
+        return np.inf
+    both_nan = np.isnan(expected) & np.isnan(actual)
+    if (np.isnan(expected) ^ np.isnan(actual)).any():
+        return np.inf
+    return float(np.max(np.where(both_nan, 0.0, np.abs(expected - actual)), initial=0.0))
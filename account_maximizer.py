@@ -46,7 +46,7 @@ def calculate_401k_contributions(
         "employer_net_percent": employer_percent,
     }
 
-if __name__ == "__main__":
+def main():
     year = 2025
     result = calculate_401k_contributions(
         annual_salary=225_000,
@@ -59,3 +59,6 @@ if __name__ == "__main__":
     )
     for k, v in result.items():
         print(f"{k}: {v:_}")
+
+if __name__ == "__main__":
+    main()
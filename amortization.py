@@ -0,0 +1,80 @@
+import numpy as np
+
+#
+# Closed-form level-payment amortization at a constant annual rate.
+# All functions accept scalars or numpy arrays (broadcast together).
+#
+
+def _growth_and_annuity(monthly_rate, months):
+    """
+    (1+r)^k and the future value of k unit payments, ((1+r)^k - 1) / r,
+    with the r == 0 limit (k) handled.
+    """
+    monthly_rate = np.asarray(monthly_rate, dtype=float)
+    months = np.asarray(months, dtype=float)
+    growth = (1 + monthly_rate)**months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(monthly_rate == 0, months, (growth - 1)/monthly_rate)
+    return growth, annuity
+
+def level_payment(balance, annual_rate, months):
+    """
+    Monthly payment that fully amortizes balance over months at annual_rate.
+    """
+    r = np.asarray(annual_rate, dtype=float)/12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = np.where(r <= 0, np.divide(balance, months), (balance*r)/(1 - (1 + r)**(-np.asarray(months, dtype=float))))
+    return payment[()]
+
+def remaining_balance(balance, annual_rate, payment, months):
+    """
+    Balance left after paying `payment` for `months` months (may go negative
+    past the payoff month).
+    """
+    growth, annuity = _growth_and_annuity(np.asarray(annual_rate, dtype=float)/12, months)
+    return (balance*growth - payment*annuity)[()]
+
+def cumulative_interest(balance, annual_rate, payment, months):
+    """
+    Total interest paid over the first `months` payments.
+    """
+    return (np.multiply(payment, months) - (balance - remaining_balance(balance, annual_rate, payment, months)))[()]
+
+def payoff_month(balance, annual_rate, payment):
+    """
+    Month in which the balance reaches zero (the last, possibly partial,
+    payment). inf if the payment never covers the interest.
+    """
+    r = np.asarray(annual_rate, dtype=float)/12
+    balance = np.asarray(balance, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covered = 1 - r*balance/payment
+        n = np.where(r == 0, balance/payment, -np.log(covered)/np.log1p(r))
+        n = np.where((payment <= 0) | (covered <= 0), np.inf, n)
+    # guard against n landing a hair above an integer
+    n = np.ceil(np.round(n, 9))
+    return np.where(balance <= 0, 0, n)[()]
+
+def amortization_schedule(balance, annual_rate, payment, months):
+    """
+    Month-by-month schedule for a constant rate and payment, computed in
+    closed form rather than by stepping. Returns (interest, principal,
+    remaining_balance) arrays, cut short at the payoff month, where the last
+    payment shrinks to the remaining balance plus interest.
+    """
+    r = annual_rate/12
+    k = np.arange(months + 1)
+    if r == 0:
+        balances = balance - payment*k
+    else:
+        growth = (1 + r)**k
+        balances = balance*growth - payment*(growth - 1)/r
+
+    paid_off = np.flatnonzero(balances[1:] <= 0)
+    if paid_off.size:
+        balances = balances[:paid_off[0] + 2]
+        balances[-1] = 0.0
+    interest = balances[:-1]*r
+    principal = balances[:-1] - balances[1:]
+    return interest, principal, balances[1:]
@@ -0,0 +1,152 @@
+import argparse
+import time
+
+from fed_rate_paths import RandomWalkModel, generate_paths
+from mortgage_simulator import Mortgage, arm_rate_schedule
+
+#
+# REFERENCE
+#
+# How Mortgage produced ARM rates before arm_rate_schedule precomputed them,
+# kept verbatim as the baseline the schedule is checked and timed against.
+#
+
+class ReferenceArmRates:
+    """
+    Rates of one Mortgage's ARM product, one month at a time: the base rate
+    looked up through a dict of locked chunk rates, then capped against the
+    rate of the month before.
+    """
+    def __init__(self, mortgage):
+        self.fed_rates = mortgage.fed_rates
+        self.margin = mortgage.margin
+        self.arm_fixed_years = mortgage.arm_fixed_years
+        self.arm_adjust_period_years = mortgage.arm_adjust_period_years
+        self.arm_initial_cap = mortgage.arm_initial_cap
+        self.arm_periodic_cap = mortgage.arm_periodic_cap
+        self.arm_lifetime_cap = mortgage.arm_lifetime_cap
+        self.locked_fed_rate = None
+        self.initial_arm_rate = None
+        self._locked_chunk_rates = {}
+        self.rates = []
+
+    def rate(self, month_idx):
+        if self.arm_fixed_years>0 and self.arm_adjust_period_years>0:
+            new_rate = self._get_custom_arm_rate(month_idx)
+        else:
+            new_rate = (self.fed_rates[month_idx] + self.margin
+                        if month_idx < len(self.fed_rates)
+                        else self.fed_rates[-1] + self.margin)
+        rate = self._apply_arm_caps(month_idx, new_rate)
+        self.rates.append(rate)
+        return rate
+
+    def _get_custom_arm_rate(self, month_idx):
+        if month_idx < 0:
+            month_idx = 0
+        total_fed_len = len(self.fed_rates)
+
+        # initial fixed
+        fixed_months = self.arm_fixed_years*12
+        adjust_months = self.arm_adjust_period_years*12
+
+        if month_idx < fixed_months:
+            # in initial fixed
+            if self.locked_fed_rate is None:
+                self.locked_fed_rate = self.fed_rates[0] if total_fed_len>0 else 0.0
+            return self.locked_fed_rate + self.margin
+
+        # beyond initial fixed
+        months_into_adjust = month_idx - fixed_months
+        chunk_idx = months_into_adjust // adjust_months
+        chunk_key = f"chunk_{chunk_idx}"
+        if chunk_key not in self._locked_chunk_rates:
+            start_m = fixed_months + chunk_idx*adjust_months
+            if start_m >= total_fed_len:
+                rate_to_lock = self.fed_rates[-1] if total_fed_len>0 else 0.0
+            else:
+                rate_to_lock = self.fed_rates[start_m]
+            self._locked_chunk_rates[chunk_key] = rate_to_lock
+        locked_chunk_rate = self._locked_chunk_rates[chunk_key]
+        return locked_chunk_rate + self.margin
+
+    def _apply_arm_caps(self, month_idx, new_rate):
+        # if no caps, return
+        if not all([self.arm_initial_cap, self.arm_periodic_cap, self.arm_lifetime_cap]):
+            return new_rate
+
+        if not self.rates:
+            # first month => set initial_arm_rate
+            self.initial_arm_rate = new_rate
+            return new_rate
+
+        old_rate = self.rates[-1]
+        if self.initial_arm_rate is None:
+            self.initial_arm_rate = old_rate
+
+        max_lifetime = self.initial_arm_rate + self.arm_lifetime_cap
+
+        # track if we've done first adjustment
+        if not hasattr(self, '_did_first_arm_adjust'):
+            self._did_first_arm_adjust = False
+
+        # did rate actually change
+        changed = abs(new_rate - old_rate)>1e-9
+        if changed and not self._did_first_arm_adjust:
+            self._did_first_arm_adjust = True
+            # clamp by initial cap
+            capped = min(new_rate, old_rate + self.arm_initial_cap)
+        elif changed:
+            # subsequent adjustments
+            capped = min(new_rate, old_rate + self.arm_periodic_cap)
+        else:
+            capped = new_rate
+
+        # apply lifetime
+        capped = min(capped, max_lifetime)
+        return capped
+
+def reference_arm_rates(fed_rates, num_months, margin, arm_schedule=None, arm_caps=None):
+    """The first num_months rates of an ARM product, asked for one month at a time."""
+    reference = ReferenceArmRates(Mortgage(0.0, fed_rates, margin, mortgage_type='arm', arm_schedule=arm_schedule, arm_caps=arm_caps))
+    return [reference.rate(month_idx) for month_idx in range(num_months)]
+
+#
+# BENCHMARK
+#
+
+def benchmark(repeats=200, num_months=360, seed=42, **product):
+    """
+    (per-month seconds, schedule seconds, identical) for one ARM product on a
+    random-walk Fed rate path, each time averaged over repeats runs.
+    """
+    product = dict(dict(margin=0.015, arm_schedule="5/1", arm_caps="2/2/5"), **product)
+    fed_rates = list(generate_paths(RandomWalkModel(), 1, num_months, seed=seed, max_workers=1)[0])
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        per_month = reference_arm_rates(fed_rates, num_months, **product)
+    per_month_seconds = (time.perf_counter() - start)/repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        schedule = arm_rate_schedule(fed_rates, num_months=num_months, **product)
+    schedule_seconds = (time.perf_counter() - start)/repeats
+    return per_month_seconds, schedule_seconds, per_month == schedule.tolist()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time arm_rate_schedule against the per-month ARM rate path it replaced.")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--months", type=int, default=360)
+    parser.add_argument("--schedule", default="5/1", help="hybrid ARM schedule, e.g. 7/2")
+    parser.add_argument("--caps", default="2/2/5", help="initial/periodic/lifetime caps")
+    args = parser.parse_args(argv)
+
+    per_month_seconds, schedule_seconds, identical = benchmark(args.repeats, args.months, arm_schedule=args.schedule, arm_caps=args.caps)
+    print(f"Per-month rates (old path): {per_month_seconds*1e3:.3f} ms")
+    print(f"Precomputed schedule: {schedule_seconds*1e3:.3f} ms")
+    print(f"Speedup: {per_month_seconds/schedule_seconds:.1f}x")
+    print(f"Identical: {identical}")
+
+if __name__ == "__main__":
+    main()
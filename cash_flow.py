@@ -0,0 +1,381 @@
+import numpy as np
+
+import accelerate
+
+#
+# Month-by-month cash-flow ledgers evaluated for many scenarios at once.
+#
+# A Ledger declares the accounts (assets, loans, one investment account,
+# cash) and the recurring flows (incomes, expenses, charges on assets) of a
+# household. Every numeric parameter may be a scalar or an array; arrays are
+# broadcast together into a scenario shape and Ledger.simulate() steps all
+# scenarios through the months in one pass.
+#
+# Each month, in order:
+#   1. at months 13, 25, ... flows step up by their annual growth and assets
+#      by their annual appreciation
+#   2. available = cash + incomes - expenses - charges on assets
+#   3. each loan, in declaration order, takes its payment out of available
+#   4. what is left (possibly negative) goes into the investment account, or
+#      stays in cash if the ledger has none
+#   5. net worth = assets - loans + cash + investment
+#
+# Flows and assets do not depend on what happens to the money, so their
+# yearly levels are computed up front with cumprod; only loans and the
+# investment account are stepped month by month.
+#
+
+class Flow:
+    """
+    A recurring monthly amount that steps up once a year.
+      - amount: monthly amount in the first year
+      - annual_growth: step applied at months 13, 25, ... (raises, rent increases)
+      - name (for results and logging)
+    """
+    def __init__(self, amount, annual_growth=0.0, name=None):
+        self.amount = amount
+        self.annual_growth = annual_growth
+        self.name = name or "flow"
+
+class Asset:
+    """
+    Something owned whose value counts toward net worth, e.g. a home.
+      - value: starting value
+      - annual_appreciation: step applied at months 13, 25, ...
+      - by_year: annual_appreciation's last axis is a path of yearly rates
+        (the rate for the first step first), whose last value carries on
+        past its end
+      - name
+    """
+    def __init__(self, value, annual_appreciation=0.0, by_year=False, name=None):
+        self.value = value
+        self.annual_appreciation = annual_appreciation
+        self.by_year = by_year
+        self.name = name or "asset"
+
+class AssetCharge:
+    """
+    A monthly expense proportional to an asset's current value, e.g.
+    property tax: annual_rate * value / 12.
+    """
+    def __init__(self, asset, annual_rate, name=None):
+        self.asset = asset
+        self.annual_rate = annual_rate
+        self.name = name or f"{asset.name} charge"
+
+class Loan:
+    """
+    A debt paid out of the monthly budget.
+      - balance, annual_rate (interest accrues at annual_rate / 12)
+      - payment: monthly payment; None => level payment over term_months
+      - term_months: payments are made in months 1..term_months
+      - pay_all: pay everything available each month until the balance is
+        gone instead of a fixed payment (payment and term_months are ignored)
+      - clamp: shrink the last payment so the balance stops at zero; without
+        it the last payment is made in full and the balance may go negative
+      - name
+    """
+    def __init__(self, balance, annual_rate, payment=None, term_months=None, pay_all=False, clamp=True, name=None):
+        if payment is None and term_months is None and not pay_all:
+            raise ValueError("A loan needs a payment, a term or pay_all")
+        self.balance = balance
+        self.annual_rate = annual_rate
+        self.payment = payment
+        self.term_months = term_months
+        self.pay_all = pay_all
+        self.clamp = clamp
+        self.name = name or "loan"
+
+    def scheduled_payment(self):
+        if self.payment is not None:
+            return self.payment
+        r = np.asarray(self.annual_rate, dtype=float)/12
+        n = np.asarray(self.term_months, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(r == 0, np.divide(self.balance, n), self.balance*r/(1 - (1 + r)**-n))
+
+class Investment:
+    """
+    The account every month's leftover budget is swept into (withdrawn from
+    when the budget is short).
+      - balance: starting balance
+      - monthly_return; with by_month=True its last axis is a path of
+        monthly returns, one per simulated month
+      - deposit: 'start' => (balance + deposit) * (1 + r),
+                 'end'   => balance * (1 + r) + deposit
+    """
+    def __init__(self, balance=0.0, monthly_return=0.0, by_month=False, deposit='start'):
+        if deposit not in ('start', 'end'):
+            raise ValueError(f"deposit must be 'start' or 'end', got {deposit!r}")
+        self.balance = balance
+        self.monthly_return = monthly_return
+        self.by_month = by_month
+        self.deposit = deposit
+
+class LedgerResults:
+    """
+    Month-by-month results of Ledger.simulate(). Every series is an array of
+    shape scenario_shape + (months,), month 1 first:
+      - net_worth, investment, cash
+      - assets[name]
+      - loan_balance[name], loan_interest[name], loan_payment[name]
+    """
+    def __init__(self, shape, months, net_worth, investment, cash, assets, loan_balance, loan_interest, loan_payment):
+        self.shape = shape
+        self.months = months
+        self.net_worth = net_worth
+        self.investment = investment
+        self.cash = cash
+        self.assets = assets
+        self.loan_balance = loan_balance
+        self.loan_interest = loan_interest
+        self.loan_payment = loan_payment
+
+    def payoff_month(self, name):
+        """First month (1-based) the loan's balance is at or below zero, 0 if it never is."""
+        paid = self.loan_balance[name] <= 0
+        return np.where(paid.any(axis=-1), paid.argmax(axis=-1) + 1, 0)[()]
+
+#
+# KERNELS
+#
+# Both step loans and the investment account through the months, reading the
+# packed ledger and filling loan_balance/loan_interest/loan_payment
+# (loans, months, S) and invested_path/cash_path (months, S) in place.
+# _step_ledger_numpy vectorizes over scenarios; _step_ledger loops over them
+# one at a time with scalar arithmetic for numba to compile. They perform the
+# same operations in the same order, so their results are identical.
+#
+
+BACKENDS = ('numpy', 'jit', 'python')
+DEFAULT_BACKEND = 'jit' if accelerate.JIT_ENABLED else 'numpy'
+
+def _step_ledger_numpy(budget, cash, invested, balances, loan_rates, payments, terms, pay_all, clamp, growth,
+                       has_investment, deposit_start, loan_balance, loan_interest, loan_payment, invested_path, cash_path):
+    num_loans, months, size = loan_balance.shape
+    for m in range(months):
+        available = budget[m//12] + cash
+        for j in range(num_loans):
+            balance, rate = balances[j], loan_rates[j]
+            if pay_all[j]:
+                owing = balance > 0
+                interest = np.where(owing, balance*rate, 0.0)
+                pay = np.where(owing, np.maximum(available, 0.0), 0.0)
+                if clamp[j]:
+                    pay = np.minimum(pay, np.maximum(balance + interest, 0.0))
+                # interest the payment does not cover is not capitalized
+                balance -= np.maximum(pay - interest, 0.0)
+            else:
+                due = m < terms[j]
+                if clamp[j]:
+                    due &= balance > 0
+                interest = np.where(due, balance*rate, 0.0)
+                pay = np.where(due, payments[j], 0.0)
+                if clamp[j]:
+                    pay = np.minimum(pay, np.maximum(balance + interest, 0.0))
+                balance -= pay - interest
+            available = available - pay
+            loan_balance[j, m] = balance
+            loan_interest[j, m] = interest
+            loan_payment[j, m] = pay
+        if not has_investment:
+            cash = available
+        else:
+            if deposit_start:
+                invested = (invested + available)*growth[m]
+            else:
+                invested = invested*growth[m] + available
+            cash = np.zeros(size)
+        invested_path[m] = invested
+        cash_path[m] = cash
+
+@accelerate.jit
+def _step_ledger(budget, cash, invested, balances, loan_rates, payments, terms, pay_all, clamp, growth,
+                 has_investment, deposit_start, loan_balance, loan_interest, loan_payment, invested_path, cash_path):
+    num_loans, months, size = loan_balance.shape
+    for s in range(size):
+        available_cash = cash[s]
+        invested_now = invested[s]
+        for m in range(months):
+            available = budget[m//12, s] + available_cash
+            for j in range(num_loans):
+                balance = balances[j, s]
+                interest = 0.0
+                pay = 0.0
+                if pay_all[j]:
+                    if balance > 0:
+                        interest = balance*loan_rates[j, s]
+                        pay = max(available, 0.0)
+                        if clamp[j]:
+                            pay = min(pay, max(balance + interest, 0.0))
+                    balance -= max(pay - interest, 0.0)
+                else:
+                    if m < terms[j, s] and (balance > 0 or not clamp[j]):
+                        interest = balance*loan_rates[j, s]
+                        pay = payments[j, s]
+                        if clamp[j]:
+                            pay = min(pay, max(balance + interest, 0.0))
+                    balance -= pay - interest
+                balances[j, s] = balance
+                available = available - pay
+                loan_balance[j, m, s] = balance
+                loan_interest[j, m, s] = interest
+                loan_payment[j, m, s] = pay
+            if not has_investment:
+                available_cash = available
+            else:
+                if deposit_start:
+                    invested_now = (invested_now + available)*growth[m, s]
+                else:
+                    invested_now = invested_now*growth[m, s] + available
+                available_cash = 0.0
+            invested_path[m, s] = invested_now
+            cash_path[m, s] = available_cash
+
+#
+# LEDGER
+#
+
+def _yearly_levels(start, annual_rate, by_year, years, shape):
+    """
+    (years, S) levels of an amount that steps by annual_rate at the start of
+    each year after the first, flattened over the scenario shape.
+    """
+    rate = np.asarray(annual_rate, dtype=float)
+    if by_year:
+        # year y uses the path's rate y-1, the last one carrying on
+        steps = rate[..., np.minimum(np.arange(years - 1), rate.shape[-1] - 1)]
+        steps = np.moveaxis(np.broadcast_to(steps, shape + (years - 1,)).reshape(-1, years - 1), -1, 0)
+    else:
+        steps = np.broadcast_to(rate, shape).reshape(1, -1).repeat(years - 1, axis=0)
+    growth = np.cumprod(np.concatenate([np.ones((1, steps.shape[1])), 1 + steps]), axis=0)
+    return np.broadcast_to(np.asarray(start, dtype=float), shape).reshape(1, -1)*growth
+
+def _flat(value, shape):
+    return np.broadcast_to(np.asarray(value, dtype=float), shape).reshape(-1).copy()
+
+def _series(values, shape, months):
+    """(months, S) as scenario_shape + (months,) with month last."""
+    return np.moveaxis(values, 0, -1).reshape(shape + (months,))
+
+class Ledger:
+    """
+    Accounts and flows of one household, for every scenario in the broadcast
+    shape of the parameters.
+      - months: number of months to simulate
+      - incomes, expenses: Flows; expenses may also be AssetCharges
+      - assets: Assets counted toward net worth
+      - loans: Loans, paid in this order
+      - investment: the Investment account leftovers go to (None => they
+        accumulate as cash)
+      - cash: starting cash, available in month 1; negative cash is a
+        shortfall the first month's budget has to cover
+    """
+    def __init__(self, months, incomes=(), expenses=(), assets=(), loans=(), investment=None, cash=0.0):
+        self.months = months
+        self.incomes = list(incomes)
+        self.expenses = list(expenses)
+        self.assets = list(assets)
+        self.loans = list(loans)
+        self.investment = investment
+        self.cash = cash
+        for expense in self.expenses:
+            if isinstance(expense, AssetCharge) and expense.asset not in self.assets:
+                raise ValueError(f"{expense.name} is charged on an asset the ledger does not hold")
+
+    def scenario_shape(self):
+        """Broadcast shape of every parameter, without path axes."""
+        shapes = [np.shape(self.cash)]
+        for flow in self.incomes + self.expenses:
+            shapes.append(np.shape(flow.annual_rate) if isinstance(flow, AssetCharge) else np.broadcast_shapes(np.shape(flow.amount), np.shape(flow.annual_growth)))
+        for asset in self.assets:
+            rate_shape = np.shape(asset.annual_appreciation)
+            shapes += [np.shape(asset.value), rate_shape[:-1] if asset.by_year else rate_shape]
+        for loan in self.loans:
+            shapes += [np.shape(loan.balance), np.shape(loan.annual_rate)]
+            if not loan.pay_all:
+                shapes += [np.shape(loan.payment), np.shape(loan.term_months)]
+        if self.investment is not None:
+            return_shape = np.shape(self.investment.monthly_return)
+            shapes += [np.shape(self.investment.balance), return_shape[:-1] if self.investment.by_month else return_shape]
+        return np.broadcast_shapes(*shapes)
+
+    def simulate(self, backend=None):
+        """
+        Steps every scenario through the months and returns LedgerResults.
+        backend picks the month loop (see BACKENDS), DEFAULT_BACKEND if None:
+        the numba kernel when accelerate.JIT_ENABLED, else the numpy one.
+        'python' runs the numba kernel uncompiled (slow, for parity checks).
+        """
+        months = self.months
+        years = (months + 11)//12
+        shape = self.scenario_shape()
+        size = int(np.prod(shape))
+
+        asset_levels = {id(asset): _yearly_levels(asset.value, asset.annual_appreciation, asset.by_year, years, shape) for asset in self.assets}
+        budget = np.zeros((years, size))
+        for flow in self.incomes:
+            budget += _yearly_levels(flow.amount, flow.annual_growth, False, years, shape)
+        for flow in self.expenses:
+            if isinstance(flow, AssetCharge):
+                budget -= asset_levels[id(flow.asset)]*(np.broadcast_to(np.asarray(flow.annual_rate, dtype=float), shape).reshape(-1)/12)
+            else:
+                budget -= _yearly_levels(flow.amount, flow.annual_growth, False, years, shape)
+
+        num_loans = len(self.loans)
+        balances = np.array([_flat(loan.balance, shape) for loan in self.loans]).reshape(num_loans, size)
+        loan_rates = np.array([_flat(loan.annual_rate, shape)/12 for loan in self.loans]).reshape(num_loans, size)
+        payments = np.array([_flat(0.0 if loan.pay_all else loan.scheduled_payment(), shape) for loan in self.loans]).reshape(num_loans, size)
+        terms = np.array([_flat(np.inf if loan.pay_all or loan.term_months is None else loan.term_months, shape) for loan in self.loans]).reshape(num_loans, size)
+        pay_all = np.array([loan.pay_all for loan in self.loans], dtype=bool)
+        clamp = np.array([loan.clamp for loan in self.loans], dtype=bool)
+        loan_balance = np.empty((num_loans, months, size))
+        loan_interest = np.empty_like(loan_balance)
+        loan_payment = np.empty_like(loan_balance)
+
+        investment = self.investment
+        if investment is not None:
+            invested = _flat(investment.balance, shape)
+            returns = np.asarray(investment.monthly_return, dtype=float)
+            if investment.by_month:
+                returns = np.moveaxis(np.broadcast_to(returns[..., :months], shape + (months,)).reshape(size, months), -1, 0)
+            else:
+                returns = np.broadcast_to(np.broadcast_to(returns, shape).reshape(-1), (months, size))
+            growth = np.ascontiguousarray(1 + returns)
+        else:
+            invested = np.zeros(size)
+            growth = np.ones((months, size))
+        cash = _flat(self.cash, shape)
+        invested_path = np.empty((months, size))
+        cash_path = np.empty((months, size))
+
+        backend = backend or DEFAULT_BACKEND
+        if backend == 'numpy':
+            kernel = _step_ledger_numpy
+        elif backend == 'jit':
+            if not accelerate.JIT_ENABLED:
+                raise ValueError("The jit backend needs numba (and FINANCE_DISABLE_JIT unset)")
+            kernel = _step_ledger
+        elif backend == 'python':
+            kernel = accelerate.python_function(_step_ledger)
+        else:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        kernel(budget, cash, invested, balances, loan_rates, payments, terms, pay_all, clamp, growth,
+               investment is not None, investment is not None and investment.deposit == 'start',
+               loan_balance, loan_interest, loan_payment, invested_path, cash_path)
+
+        month_year = np.arange(months)//12
+        assets = {asset.name: _series(asset_levels[id(asset)][month_year], shape, months) for asset in self.assets}
+        net_worth = invested_path + cash_path - loan_balance.sum(axis=0)
+        for levels in asset_levels.values():
+            net_worth += levels[month_year]
+        return LedgerResults(
+            shape, months,
+            net_worth=_series(net_worth, shape, months),
+            investment=_series(invested_path, shape, months),
+            cash=_series(cash_path, shape, months),
+            assets=assets,
+            loan_balance={loan.name: _series(loan_balance[j], shape, months) for j, loan in enumerate(self.loans)},
+            loan_interest={loan.name: _series(loan_interest[j], shape, months) for j, loan in enumerate(self.loans)},
+            loan_payment={loan.name: _series(loan_payment[j], shape, months) for j, loan in enumerate(self.loans)},
+        )
@@ -0,0 +1,284 @@
+import argparse
+import time
+
+import numpy as np
+
+import accelerate
+import cash_flow
+from fixed_rate_comparison import MortgageOption, invested_net_worth
+from loan_and_investment_simulation import LoanScenario, RentalScenario, rate_for_year
+from mortgage_15_vs_30 import simulate_stock_market
+from payoff_loan_vs_investing import LoanInvestmentSimulator, calc_minimum_payment
+from simple_interest_plotter import calculate_monthly_payment, repayment_ledger
+
+#
+# REFERENCE LOOPS
+#
+# The per-scenario monthly loops the scripts ran before they were ported to
+# cash_flow ledgers, kept verbatim (minus printing) as the baseline the
+# kernel is checked and timed against.
+#
+
+def reference_loan_scenario(s, principal, yearly_income, years):
+    monthly_income = yearly_income / 12
+    home_value = principal
+    loan_amount = principal * (1 - s.downpayment_percentage)
+    monthly_return_rate = (1 + s.invest_return_rate) ** (1/12) - 1
+    monthly_payment_amount = s.monthly_payment(principal)
+    net_worth_over_time = []
+    cash = s.starting_cash - s.downpayment_percentage * principal
+    investment_worth = 0
+    for month in range(1, years * 12 + 1):
+        if month % 12 == 1 and month > 1:
+            monthly_income *= (1 + s.salary_appreciation_rate)
+            home_value *= (1 + rate_for_year(s.home_appreciation_rate, month // 12))
+        if month <= s.term:
+            interest_payment = loan_amount * (s.rate / 12)
+            principal_payment = monthly_payment_amount - interest_payment
+            loan_amount -= principal_payment
+            surplus = monthly_income - monthly_payment_amount
+        else:
+            surplus = monthly_income
+        property_tax = home_value * (s.property_tax_rate / 12)
+        surplus -= property_tax
+        surplus -= s.monthly_maintenance_fees
+        if cash < 0:
+            cash += surplus
+        if cash >= 0:
+            surplus += cash
+            cash = 0
+        investment_worth = (investment_worth + surplus) * (1 + monthly_return_rate)
+        net_worth_over_time.append(home_value - loan_amount + cash + investment_worth)
+    return net_worth_over_time
+
+def reference_rental_scenario(s, yearly_income, years):
+    monthly_income = yearly_income / 12
+    monthly_rent = s.monthly_rent
+    monthly_return_rate = (1 + s.invest_return_rate) ** (1/12) - 1
+    net_worth_over_time = []
+    cash = s.starting_cash
+    investment_worth = 0
+    for month in range(1, years * 12 + 1):
+        if month % 12 == 1 and month > 1:
+            monthly_income *= (1 + s.salary_appreciation_rate)
+            monthly_rent *= (1 + s.rent_appreciation_rate)
+        surplus = monthly_income - monthly_rent
+        if cash < 0:
+            cash += surplus
+        if cash >= 0:
+            surplus += cash
+            cash = 0
+        investment_worth = (investment_worth + surplus) * (1 + monthly_return_rate)
+        net_worth_over_time.append(cash + investment_worth)
+    return net_worth_over_time
+
+def reference_invest(sim):
+    loan_balance = sim.loan_amount
+    investment_value = sim.starting_cash
+    net_worth = []
+    for month in range(sim.loan_term_months):
+        interest_payment = loan_balance * sim.monthly_loan_rate
+        principal_payment = min(sim.minimum_payment, sim.monthly_income) - interest_payment
+        loan_balance -= principal_payment
+        remaining_cash = sim.monthly_income - sim.minimum_payment
+        if remaining_cash > 0:
+            investment_value += investment_value * sim.monthly_investment_rate + remaining_cash
+        net_worth.append(investment_value - loan_balance)
+    return net_worth
+
+def reference_payoff(sim):
+    loan_balance = sim.loan_amount
+    investment_value = 0
+    net_worth = []
+    for month in range(sim.loan_term_months):
+        if loan_balance > 0:
+            payment = sim.monthly_income + (sim.starting_cash if month == 0 else 0)
+            interest_payment = loan_balance * sim.monthly_loan_rate
+            loan_balance -= max(0, payment - interest_payment)
+        else:
+            investment_value += investment_value * sim.monthly_investment_rate + sim.monthly_income
+        net_worth.append(investment_value - loan_balance)
+    return net_worth
+
+def reference_loan_repayment(principal, annual_interest_rate, loan_term_years):
+    monthly_payment = calculate_monthly_payment(principal, annual_interest_rate, loan_term_years)
+    monthly_interest_rate = annual_interest_rate / 12
+    current_principal = principal
+    current_total_interest_paid = 0
+    current_total_amount_paid = 0
+    for month in range(1, loan_term_years * 12 + 1):
+        interest_payment = current_principal * monthly_interest_rate
+        principal_payment = monthly_payment - interest_payment
+        if current_principal - principal_payment < 0:
+            principal_payment = current_principal
+            monthly_payment = principal_payment + interest_payment
+        current_principal -= principal_payment
+        current_total_interest_paid += interest_payment
+        current_total_amount_paid += monthly_payment
+        if current_principal <= 0:
+            break
+    return current_total_interest_paid, current_total_amount_paid
+
+def reference_stock_market(investment, years, monthly_return):
+    balance = 0
+    balances = []
+    for _ in range(years * 12):
+        balance = (balance + investment) * (1 + monthly_return)
+        balances.append(balance)
+    return balances
+
+def reference_fixed_rate(option, monthly_income, starting_cash, investment_return_rate, months):
+    invested_balance = starting_cash - option.upfront_costs
+    net_worth = []
+    for month in range(1, months + 1):
+        excess_income = monthly_income - (option.monthly_payment if month <= option.loan_term_months else 0)
+        invested_balance += excess_income
+        invested_balance *= (1 + investment_return_rate / 12)
+        net_worth.append(invested_balance)
+    return net_worth
+
+#
+# BENCHMARKS
+#
+# Each case draws n random scenarios around the script's example inputs and
+# returns (old loop over every scenario, one kernel call) as two callables
+# producing comparable arrays.
+#
+
+def _loan_case(rng, n):
+    years, principal, income = 30, 450_000, rng.uniform(60_000, 150_000, n)
+    dp = rng.uniform(0.1, 0.3, n)
+    s = LoanScenario(term=rng.choice([180, 360], n), rate=rng.uniform(0.03, 0.08, n), invest_return_rate=rng.uniform(0.04, 0.1, n),
+                     downpayment_percentage=dp, home_appreciation_rate=0.03, starting_cash=principal*dp,
+                     salary_appreciation_rate=rng.uniform(0, 0.04, n), property_tax_rate=0.0135, monthly_maintenance_fees=200)
+    scalar = lambda i: LoanScenario(int(s.term[i]), s.rate[i], s.invest_return_rate[i], dp[i], 0.03, principal*dp[i], s.salary_appreciation_rate[i], 0.0135, 200)
+    old = lambda: np.array([reference_loan_scenario(scalar(i), principal, income[i], years) for i in range(n)])
+    new = lambda: s.ledger(principal, income, years).simulate().net_worth
+    return old, new
+
+def _rental_case(rng, n):
+    years, income = 30, rng.uniform(60_000, 150_000, n)
+    s = RentalScenario(monthly_rent=rng.uniform(1500, 3500, n), invest_return_rate=rng.uniform(0.04, 0.1, n), rent_appreciation_rate=rng.uniform(0, 0.05, n),
+                       starting_cash=90_000, salary_appreciation_rate=rng.uniform(0, 0.04, n))
+    scalar = lambda i: RentalScenario(s.monthly_rent[i], s.invest_return_rate[i], s.rent_appreciation_rate[i], 90_000, s.salary_appreciation_rate[i])
+    old = lambda: np.array([reference_rental_scenario(scalar(i), income[i], years) for i in range(n)])
+    new = lambda: s.ledger(income, years).simulate().net_worth
+    return old, new
+
+def _payoff_case(rng, n, strategy):
+    amount, rate, cash = rng.uniform(10_000, 30_000, n), rng.uniform(0.03, 0.1, n), rng.uniform(0, 10_000, n)
+    # the old invest loop stopped compounding when income fell short of the minimum payment
+    income = calc_minimum_payment(amount, rate / 12, 22 * 12) + rng.uniform(0, 200, n)
+    sim = LoanInvestmentSimulator(amount, rate, 22, income, cash, 0.10)
+    reference = reference_invest if strategy == "invest" else reference_payoff
+    old = lambda: np.array([reference(LoanInvestmentSimulator(amount[i], rate[i], 22, income[i], cash[i], 0.10)) for i in range(n)])
+    new = lambda: (sim.simulate_scenario_invest() if strategy == "invest" else sim.simulate_scenario_payoff())[2]
+    return old, new
+
+def _repayment_case(rng, n):
+    principal, rate, years = rng.uniform(10_000, 50_000, n), rng.uniform(0.02, 0.08, n), rng.integers(2, 8, n)
+    old = lambda: np.array([reference_loan_repayment(principal[i], rate[i], int(years[i])) for i in range(n)])
+    def new():
+        results = repayment_ledger(principal, rate, years).simulate()
+        return np.stack([results.loan_interest["loan"].sum(axis=-1), results.loan_payment["loan"].sum(axis=-1)], axis=-1)
+    return old, new
+
+def _stock_market_case(rng, n):
+    investment, monthly_return = rng.uniform(100, 3000, n), (1 + rng.uniform(0.03, 0.1, n))**(1/12) - 1
+    old = lambda: np.array([reference_stock_market(investment[i], 30, monthly_return[i]) for i in range(n)])
+    new = lambda: simulate_stock_market(investment, 30, monthly_return)
+    return old, new
+
+def _fixed_rate_case(rng, n):
+    options = [MortgageOption(281_250, r, p, c, 30, f"option {i}") for i, (r, p, c) in
+               enumerate(zip(rng.uniform(0.06, 0.07, n), rng.uniform(0, 0.015, n), rng.uniform(1500, 3500, n)))]
+    starting_cash = max(o.upfront_costs for o in options)
+    monthly_income = max(o.monthly_payment for o in options)
+    old = lambda: np.array([reference_fixed_rate(o, monthly_income, starting_cash, 0.07, 360) for o in options])
+    new = lambda: invested_net_worth(options, monthly_income, starting_cash, 0.07, 360)
+    return old, new
+
+CASES = {
+    "LoanScenario": _loan_case,
+    "RentalScenario": _rental_case,
+    "payoff invest": lambda rng, n: _payoff_case(rng, n, "invest"),
+    "payoff payoff": lambda rng, n: _payoff_case(rng, n, "payoff"),
+    "loan repayment": _repayment_case,
+    "stock market": _stock_market_case,
+    "fixed rate": _fixed_rate_case,
+}
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+def _with_backend(backend, fn):
+    previous, cash_flow.DEFAULT_BACKEND = cash_flow.DEFAULT_BACKEND, backend
+    try:
+        return fn()
+    finally:
+        cash_flow.DEFAULT_BACKEND = previous
+
+def available_backends():
+    return [backend for backend in ('numpy', 'jit') if backend != 'jit' or accelerate.JIT_ENABLED]
+
+def benchmark(num_scenarios=2000, seed=0):
+    """
+    (case, old loop seconds, {backend: kernel seconds}, max relative
+    difference of the default backend) for num_scenarios random scenarios of
+    every script. Kernels are warmed up first, so jit times exclude loading
+    or compiling the kernel.
+    """
+    rows = []
+    for name, case in CASES.items():
+        old, new = case(np.random.default_rng(seed), num_scenarios)
+        expected, old_seconds = _timed(old)
+        seconds = {}
+        for backend in available_backends():
+            _with_backend(backend, case(np.random.default_rng(seed), 1)[1])
+            out, seconds[backend] = _timed(lambda: _with_backend(backend, new))
+            if backend == cash_flow.DEFAULT_BACKEND:
+                actual = out
+        difference = np.max(np.abs(actual - expected)/np.maximum(np.abs(expected), 1.0))
+        rows.append((name, old_seconds, seconds, float(difference)))
+    return rows
+
+def check_parity(num_scenarios=20, seed=0, backends=None):
+    """
+    {case: {backend: max absolute difference from the uncompiled kernel}}
+    over num_scenarios random scenarios of every script, for backends
+    (None => available_backends()); all zeros when the backends agree bit
+    for bit. tests/test_backend_parity.py asserts that.
+    """
+    backends = available_backends() if backends is None else backends
+    parity = {}
+    for name, case in CASES.items():
+        new = case(np.random.default_rng(seed), num_scenarios)[1]
+        reference = _with_backend('python', new)
+        parity[name] = {backend: accelerate.max_difference(reference, _with_backend(backend, new)) for backend in backends}
+    return parity
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the cash_flow kernel backends against the scripts' old monthly loops.")
+    parser.add_argument("--scenarios", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parity", action="store_true", help="check every backend against the uncompiled kernel instead of timing")
+    args = parser.parse_args(argv)
+
+    backends = available_backends()
+    if args.parity:
+        print(f"{'case':<16}" + "".join(f"{backend:>12}" for backend in backends))
+        for name, differences in check_parity(min(args.scenarios, 50), args.seed).items():
+            print(f"{name:<16}" + "".join(f"{differences[backend]:>12.2e}" for backend in backends))
+        return
+
+    print(f"numba {'enabled' if accelerate.JIT_ENABLED else 'not available'}, default backend {cash_flow.DEFAULT_BACKEND}")
+    print(f"{'case':<16}{'loop':>10}" + "".join(f"{backend:>10}" for backend in backends) + f"{'speedup':>9}{'max rel diff':>14}")
+    for name, old_seconds, seconds, difference in benchmark(args.scenarios, args.seed):
+        best = min(seconds.values())
+        print(f"{name:<16}{old_seconds:>9.3f}s" + "".join(f"{seconds[backend]:>9.3f}s" for backend in backends)
+              + f"{old_seconds/best:>8.1f}x{difference:>14.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -105,7 +105,7 @@ def print_tabular(dict_list: list[dict[str, object]]):
         print(row_line)
 
 
-if __name__ == "__main__":
+def main():
     positions = [
         OptionPosition("TQQQ", "2024-06-21", 5150.68, 74.90, 1.00, 25.00, 5990.00, 83.14), # 2025-01-19
         OptionPosition("TQQQ", "2024-07-29", 4300.68, 66.27, 1.00, 25.00, 5990.00, 83.14), # 2025-01-19
@@ -122,4 +122,8 @@ if __name__ == "__main__":
     
     comparison = compare_options(positions)
     
-    print_tabular(comparison)
\ No newline at end of file
+    print_tabular(comparison)
+
+
+if __name__ == "__main__":
+    main()
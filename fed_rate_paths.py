@@ -0,0 +1,194 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#
+# RATE MODELS
+#
+# Each model fills a (paths x months) array of monthly Fed rates (decimals)
+# from a numpy Generator. Models are plain picklable objects so they can be
+# shipped to worker processes.
+#
+
+class RandomWalkModel:
+    """
+    Uniform monthly steps floored at a minimum rate, i.e. the walk used by
+    mortgage_simulator.example_usage:
+      rate[m] = max(floor, rate[m-1] + uniform(low, high))
+    """
+    def __init__(self, initial_rate=0.0433, low=-0.001, high=0.0013, floor=0.0):
+        self.initial_rate = initial_rate
+        self.low = low
+        self.high = high
+        self.floor = floor
+
+    def generate(self, rng, num_paths, num_months):
+        deltas = rng.uniform(self.low, self.high, size=(num_paths, num_months))
+        # closed form of the floored walk: the unfloored walk minus its deepest dip below the floor
+        walk = (self.initial_rate - self.floor) + np.cumsum(deltas, axis=1)
+        deepest = np.minimum(np.minimum.accumulate(walk, axis=1), 0.0)
+        return walk - deepest + self.floor
+
+class VasicekModel:
+    """
+    Mean-reverting Ornstein-Uhlenbeck short rate, sampled exactly each month:
+      dr = speed * (mean_rate - r) dt + volatility dW
+    Rates can go negative unless floor is set.
+    """
+    def __init__(self, initial_rate=0.0433, mean_rate=0.03, speed=0.15, volatility=0.01, floor=None):
+        self.initial_rate = initial_rate
+        self.mean_rate = mean_rate
+        self.speed = speed
+        self.volatility = volatility
+        self.floor = floor
+
+    def generate(self, rng, num_paths, num_months):
+        dt = 1/12
+        decay = np.exp(-self.speed*dt)
+        if self.speed > 0:
+            step_std = self.volatility*np.sqrt((1 - decay**2)/(2*self.speed))
+        else:
+            step_std = self.volatility*np.sqrt(dt)
+        shocks = rng.standard_normal(size=(num_paths, num_months))*step_std
+
+        rates = np.empty((num_paths, num_months))
+        r = np.full(num_paths, float(self.initial_rate))
+        for m in range(num_months):
+            r = self.mean_rate + (r - self.mean_rate)*decay + shocks[:, m]
+            rates[:, m] = r
+        if self.floor is not None:
+            np.maximum(rates, self.floor, out=rates)
+        return rates
+
+class CIRModel:
+    """
+    Cox-Ingersoll-Ross short rate, sampled exactly each month from the
+    noncentral chi-square transition, so rates never go negative:
+      dr = speed * (mean_rate - r) dt + volatility * sqrt(r) dW
+    """
+    def __init__(self, initial_rate=0.0433, mean_rate=0.03, speed=0.15, volatility=0.05):
+        if speed <= 0 or volatility <= 0:
+            raise ValueError("CIR speed and volatility must be positive")
+        self.initial_rate = initial_rate
+        self.mean_rate = mean_rate
+        self.speed = speed
+        self.volatility = volatility
+
+    def generate(self, rng, num_paths, num_months):
+        dt = 1/12
+        decay = np.exp(-self.speed*dt)
+        scale = self.volatility**2*(1 - decay)/(4*self.speed)
+        dof = 4*self.speed*self.mean_rate/self.volatility**2
+
+        rates = np.empty((num_paths, num_months))
+        r = np.full(num_paths, float(self.initial_rate))
+        for m in range(num_months):
+            r = scale*rng.noncentral_chisquare(dof, r*decay/scale)
+            rates[:, m] = r
+        return rates
+
+class HistoricalBootstrapModel:
+    """
+    Block bootstrap of historical monthly rate changes.
+      - history: sequence of monthly Fed rates (decimals), oldest first
+      - block_months: length of each resampled block of consecutive changes,
+        which keeps short-range autocorrelation of the history
+      - initial_rate: starting level (defaults to the last historical rate)
+    """
+    def __init__(self, history, block_months=12, initial_rate=None, floor=0.0):
+        history = np.asarray(history, dtype=float)
+        if history.ndim != 1 or len(history) < 2:
+            raise ValueError("history must be a 1-D sequence of at least two rates")
+        self.changes = np.diff(history)
+        self.block_months = max(1, min(int(block_months), len(self.changes)))
+        self.initial_rate = float(history[-1]) if initial_rate is None else initial_rate
+        self.floor = floor
+
+    def generate(self, rng, num_paths, num_months):
+        num_blocks = -(-num_months // self.block_months)
+        starts = rng.integers(0, len(self.changes) - self.block_months + 1, size=(num_paths, num_blocks))
+        idx = (starts[:, :, None] + np.arange(self.block_months)).reshape(num_paths, -1)[:, :num_months]
+        walk = self.initial_rate + np.cumsum(self.changes[idx], axis=1)
+        if self.floor is None:
+            return walk
+        deepest = np.minimum(np.minimum.accumulate(walk - self.floor, axis=1), 0.0)
+        return walk - deepest
+
+#
+# GENERATION
+#
+
+def _generate_chunk(model, seed_seq, num_paths, num_months):
+    return model.generate(np.random.default_rng(seed_seq), num_paths, num_months)
+
+def _chunk_jobs(num_paths, seed, chunk_size):
+    chunk_sizes = [min(chunk_size, num_paths - start) for start in range(0, num_paths, chunk_size)]
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    return list(zip(seed_seqs, chunk_sizes))
+
+def iter_path_chunks(model, num_paths, num_months, seed=None, chunk_size=10_000):
+    """
+    Yields successive (chunk_size x num_months) blocks of paths in the calling
+    process. The blocks are identical to the ones generate_paths() stitches
+    together for the same seed and chunk_size.
+    """
+    for seed_seq, n in _chunk_jobs(num_paths, seed, chunk_size):
+        yield _generate_chunk(model, seed_seq, n, num_months)
+
+def generate_paths(model, num_paths, num_months, seed=None, chunk_size=10_000, max_workers=None):
+    """
+    Returns a (num_paths x num_months) array of Fed rate paths.
+
+    Paths are split into fixed chunks of chunk_size, and each chunk draws from
+    its own stream spawned from SeedSequence(seed). The output depends only on
+    (model, seed, chunk_size), not on max_workers, so a run spread over a
+    process pool reproduces a serial run bit for bit.
+    max_workers : None => one worker per CPU, 1 => run in this process
+    """
+    jobs = _chunk_jobs(num_paths, seed, chunk_size)
+    if not jobs:
+        return np.empty((0, num_months))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+
+    if max_workers <= 1:
+        chunks = [_generate_chunk(model, seed_seq, n, num_months) for seed_seq, n in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            chunks = list(pool.map(
+                _generate_chunk,
+                [model]*len(jobs),
+                [seed_seq for seed_seq, _ in jobs],
+                [n for _, n in jobs],
+                [num_months]*len(jobs),
+            ))
+    return np.concatenate(chunks, axis=0)
+
+
+#
+# EXAMPLE USAGE
+#
+
+def example_usage():
+    num_paths = 100_000
+    num_months = 360
+
+    models = {
+        "Random walk": RandomWalkModel(),
+        "Vasicek": VasicekModel(),
+        "CIR": CIRModel(),
+    }
+    models["Bootstrap"] = HistoricalBootstrapModel(
+        generate_paths(models["Vasicek"], 1, 240, seed=0, max_workers=1)[0], block_months=12
+    )
+
+    for name, model in models.items():
+        paths = generate_paths(model, num_paths, num_months, seed=42)
+        serial = generate_paths(model, num_paths, num_months, seed=42, max_workers=1)
+        print(f"{name}: shape={paths.shape} mean final rate={paths[:, -1].mean():.4f} "
+              f"p5/p95={np.percentile(paths[:, -1], 5):.4f}/{np.percentile(paths[:, -1], 95):.4f} "
+              f"reproducible={np.array_equal(paths, serial)}")
+
+if __name__ == "__main__":
+    example_usage()
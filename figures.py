@@ -0,0 +1,117 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+#
+# Figure builders in this repo return a matplotlib Figure and never call
+# plt.show(), importing matplotlib inside the builder so the calculations
+# can be imported and run without it. Scripts show the figures from main();
+# render_batch() saves them headless with the Agg backend instead.
+#
+
+#
+# DOWNSAMPLING
+#
+
+DEFAULT_MAX_POINTS = 2000
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS):
+    """
+    (x, y) thinned to about max_points points for drawing: the series is cut
+    into max_points/2 buckets and each keeps its lowest and highest point
+    (in x order, plus both ends), so spikes and the envelope of the line
+    look the same as the full series. Shorter series are returned unchanged.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    buckets = max(max_points // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lows = starts + np.array([np.argmin(y[lo:hi]) for lo, hi in zip(edges[:-1], edges[1:])])
+    highs = starts + np.array([np.argmax(y[lo:hi]) for lo, hi in zip(edges[:-1], edges[1:])])
+    keep = np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+    return x[keep], y[keep]
+
+#
+# BATCH RENDERING
+#
+
+def use_agg():
+    """Switches matplotlib to the non-interactive Agg backend (no display needed)."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+def _render(job):
+    name, builder, kwargs, out_dir, formats, dpi = job
+    import matplotlib.pyplot as plt
+
+    fig = builder(**kwargs)
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        fig.savefig(path, dpi=dpi)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+def render_batch(jobs, out_dir, formats=("png",), max_workers=None, dpi=100, chunksize=4):
+    """
+    Renders (name, builder, kwargs) jobs to out_dir/name.<format> for every
+    format (anything savefig accepts, e.g. png, svg, pdf) with the Agg
+    backend, spread over max_workers processes (1 => in this process).
+    builder must be a module-level function returning a Figure, so it can be
+    sent to the workers. Returns the paths written, in job order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(name, builder, kwargs, out_dir, tuple(formats), dpi) for name, builder, kwargs in jobs]
+    if max_workers == 1:
+        use_agg()
+        rendered = map(_render, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg) as pool:
+            rendered = list(pool.map(_render, jobs, chunksize=chunksize))
+    return [path for paths in rendered for path in paths]
+
+#
+# CLI
+#
+
+def example_jobs(num_paths, seed=0):
+    """
+    A report batch: a loan repayment chart for every principal x rate x
+    term, and a mortgage comparison for each of num_paths Fed rate paths.
+    """
+    from fed_rate_paths import RandomWalkModel, generate_paths
+    from mortgage_simulator import mortgage_comparison_report
+    from simple_interest_plotter import loan_repayment_report
+
+    jobs = []
+    for principal in (20_000, 37_000, 60_000):
+        for rate in (0.029, 0.039, 0.049, 0.059):
+            for years in (3, 4, 5, 6):
+                jobs.append((f"loan_{principal}_{rate*1000:.0f}_{years}y", loan_repayment_report, dict(principal=principal, annual_interest_rate=rate, loan_term_years=years)))
+    for i, path in enumerate(generate_paths(RandomWalkModel(), num_paths, 360, seed=seed, max_workers=1)):
+        jobs.append((f"mortgages_path{i:04d}", mortgage_comparison_report, dict(fed_rates=path.tolist(), principal=400_000)))
+    return jobs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a batch of report figures headless, in parallel.")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--format", nargs="+", default=["png"], help="one or more of png, svg, pdf, ...")
+    parser.add_argument("--paths", type=int, default=100, help="Fed rate paths to render mortgage comparisons for")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    jobs = example_jobs(args.paths)
+    start = time.perf_counter()
+    paths = render_batch(jobs, args.out, args.format, args.workers, args.dpi)
+    print(f"Rendered {len(jobs)} reports ({len(paths)} files) to {args.out} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import importlib
+
+#
+# One command line for every calculator: `python finance.py <command> [args]`.
+# Each command names the module and function that runs it; the module is
+# only imported once its command is chosen, so a quick query such as
+# `finance.py paycheck` never loads numpy, matplotlib or the other heavy
+# dependencies the plotting commands need. startup_benchmark.py keeps an
+# eye on how long that takes.
+#
+
+#
+# COMMANDS
+#
+
+# command => (module, function, takes command line arguments, help)
+COMMANDS = {
+    "paycheck": ("paycheck_calculator", "main", True, "per-paycheck taxes and contributions for a salary"),
+    "taxes": ("tax_calculator", "main", True, "simplified federal, NY state and payroll taxes on an income"),
+    "401k": ("account_maximizer", "main", False, "example pre-tax/Roth/employer 401k split"),
+    "options": ("compare_option_underlying", "main", False, "example option positions vs holding the underlying"),
+    "loan": ("simple_interest_plotter", "main", False, "plot a simple interest loan repayment"),
+    "payoff": ("payoff_loan_vs_investing", "main", False, "paying a loan off early vs investing"),
+    "loan-invest": ("loan_and_investment_simulation", "main", False, "loan and rental scenarios' net worth"),
+    "fixed-rate": ("fixed_rate_comparison", "main", False, "compare fixed rate mortgage offers"),
+    "15-vs-30": ("mortgage_15_vs_30", "main", False, "15 vs 30 year mortgage, investing the difference"),
+    "health": ("health_insurance_comparison", "main", False, "health plan costs by qualifying health expense"),
+    "mortgage": ("mortgage_simulator", "example_usage", False, "plot a 30-year fixed, a 5/1 ARM and a 5/1 ARM refinanced to fixed on a random Fed rate path"),
+    "mortgage-batch": ("mortgage_batch", "example_usage", False, "time the batch mortgage simulation against the loop"),
+    "mortgage-sweep": ("mortgage_sweep", "main", True, "sweep mortgage products over Fed rate paths"),
+    "fed-paths": ("fed_rate_paths", "example_usage", False, "example Fed rate path models"),
+    "figures": ("figures", "main", True, "render a batch of report figures headless"),
+    "bench-arm": ("arm_rate_benchmark", "main", True, "time the precomputed ARM rate schedule against the per-month path"),
+    "bench-cash-flow": ("cash_flow_benchmark", "main", True, "time the cash_flow kernel backends"),
+    "bench-startup": ("startup_benchmark", "main", True, "time quick queries through this command line"),
+}
+
+def run(command, argv=()):
+    """Imports the module behind command and runs it with argv."""
+    module_name, function_name, takes_args, _ = COMMANDS[command]
+    function = getattr(importlib.import_module(module_name), function_name)
+    if takes_args:
+        return function(list(argv))
+    if argv:
+        raise SystemExit(f"finance {command}: takes no arguments, got {' '.join(argv)}")
+    return function()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="finance",
+        description="Personal finance calculators.",
+        epilog="commands:\n" + "\n".join(f"  {name:<16}{help}" for name, (_, _, _, help) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="one of the commands below")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="passed on to the command (try <command> --help)")
+    args = parser.parse_args(argv)
+    return run(args.command, args.args)
+
+if __name__ == "__main__":
+    main()
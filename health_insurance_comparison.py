@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 FEDERAL_TAX_RATE = 0.24
 STATE_TAX_RATE = 0.0649
@@ -65,23 +64,39 @@ def calculate_hdhp_cost(qhe: float, in_network: bool = True):
     
     return cost + yearly_premium - EMPLOYER_HSA_CONTRIBUTION - EMPLOYEE_HSA_CONTRIBUTION * (FEDERAL_TAX_RATE + STATE_TAX_RATE + FICA_TAX_RATE)
 
-qhe_values = np.linspace(0, 50000, 500)
+def plan_costs(qhe_values):
+    """Effective yearly cost of each plan, in and out of network, for every qualified health expense amount."""
+    return {
+        "thp_in": np.array([calculate_thp_cost(qhe) for qhe in qhe_values]),
+        "thp_out": np.array([calculate_thp_cost(qhe, in_network=False) for qhe in qhe_values]),
+        "hdhp_in": np.array([calculate_hdhp_cost(qhe) for qhe in qhe_values]),
+        "hdhp_out": np.array([calculate_hdhp_cost(qhe, in_network=False) for qhe in qhe_values]),
+    }
 
-thp_costs_in = [calculate_thp_cost(qhe) for qhe in qhe_values]
-thp_costs_out = [calculate_thp_cost(qhe, in_network=False) for qhe in qhe_values]
-hdhp_costs_in = [calculate_hdhp_cost(qhe) for qhe in qhe_values]
-hdhp_costs_out = [calculate_hdhp_cost(qhe, in_network=False) for qhe in qhe_values]
+def plot_plan_costs(qhe_values, costs):
+    """Figure of the in-network costs from plan_costs. Does not call plt.show()."""
+    import matplotlib.pyplot as plt
 
-plt.figure(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
 
-plt.plot(qhe_values, thp_costs_in, label='Traditional Health Plan (In-Network)')
-#plt.plot(qhe_values, thp_costs_out, label='Traditional Health Plan (Out-of-Network)')
-plt.plot(qhe_values, hdhp_costs_in, label='High Deductible Health Plan (In-Network)')
-#plt.plot(qhe_values, hdhp_costs_out, label='High Deductible Health Plan (Out-of-Network)')
+    ax.plot(qhe_values, costs["thp_in"], label='Traditional Health Plan (In-Network)')
+    #ax.plot(qhe_values, costs["thp_out"], label='Traditional Health Plan (Out-of-Network)')
+    ax.plot(qhe_values, costs["hdhp_in"], label='High Deductible Health Plan (In-Network)')
+    #ax.plot(qhe_values, costs["hdhp_out"], label='High Deductible Health Plan (Out-of-Network)')
 
-plt.title('Qualified Health Expenses vs Effective Cost')
-plt.xlabel('Qualified Health Expenses ($)')
-plt.ylabel('Effective Cost ($)')
-plt.legend()
-plt.grid(True)
-plt.show()
+    ax.set_title('Qualified Health Expenses vs Effective Cost')
+    ax.set_xlabel('Qualified Health Expenses ($)')
+    ax.set_ylabel('Effective Cost ($)')
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+def main():
+    import matplotlib.pyplot as plt
+
+    qhe_values = np.linspace(0, 50000, 500)
+    plot_plan_costs(qhe_values, plan_costs(qhe_values))
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import time
+import numpy as np
+from mortgage_simulator import Mortgage, MortgageResults
+from fed_rate_paths import RandomWalkModel, generate_paths
+
+class MortgageBatchResults:
+    """
+    Month-by-month results for a batch of Fed rate paths, one row per path:
+      - annual_interest_rate, interest_paid, principal_paid, remaining_balance
+        => float arrays of shape (paths, months)
+      - num_months => number of months actually simulated for each path
+    Months after a path has been paid off are left at zero.
+    """
+    def __init__(self, annual_interest_rate, interest_paid, principal_paid, remaining_balance, num_months):
+        self.annual_interest_rate = annual_interest_rate
+        self.interest_paid = interest_paid
+        self.principal_paid = principal_paid
+        self.remaining_balance = remaining_balance
+        self.num_months = num_months
+
+    @property
+    def monthly_payment(self):
+        return self.interest_paid + self.principal_paid
+
+    @property
+    def total_interest(self):
+        return self.interest_paid.sum(axis=1)
+
+    def path_results(self, path_idx):
+        """
+        Returns one path as MortgageResults (the same type Mortgage.simulate()
+        returns), viewing the batch rows without copying them.
+        """
+        n = int(self.num_months[path_idx])
+        return MortgageResults.from_columns(
+            np.arange(1, n+1),
+            self.annual_interest_rate[path_idx, :n],
+            self.interest_paid[path_idx, :n],
+            self.principal_paid[path_idx, :n],
+            self.remaining_balance[path_idx, :n],
+        )
+
+
+def _calculate_monthly_payments(annual_rates, balances, remaining_months):
+    r = annual_rates/12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortized = (balances*r)/(1-(1+r)**(-remaining_months))
+    return np.where(r<=0, balances/remaining_months, amortized)
+
+def simulate_batch(
+    principal,
+    fed_rates,
+    margin,
+    term_years=30,
+    mortgage_type='fixed',
+    arm_schedule=None,
+    arm_caps=None,
+    events=None
+):
+    """
+    Vectorized equivalent of Mortgage(...).simulate() over many Fed rate paths.
+
+    fed_rates : 2-D array (paths x months) of monthly Fed rates; a 1-D array is
+                treated as a single path
+    principal : scalar, or one starting balance per path
+
+    All other arguments mean the same as for Mortgage. The month loop is kept,
+    but each step updates every path at once, so the fixed, ARM schedule, cap
+    and refinance-event rules are applied exactly as in Mortgage.simulate.
+    """
+    fed_rates = np.atleast_2d(np.asarray(fed_rates, dtype=float))
+    num_paths, num_fed = fed_rates.shape
+    if num_fed == 0:
+        raise ValueError("fed_rates must contain at least one month")
+
+    # reuse Mortgage's parsing of the schedule, caps and events
+    template = Mortgage(
+        principal=0.0,
+        fed_rates=[],
+        margin=margin,
+        term_years=term_years,
+        mortgage_type=mortgage_type,
+        arm_schedule=arm_schedule,
+        arm_caps=arm_caps,
+        events=events
+    )
+    events = template.events
+    num_events = len(events)
+    current_type = template.mortgage_type
+    current_margin = template.margin
+    term_months = template.term_months
+    fixed_months = template.arm_fixed_years*12
+    adjust_months = template.arm_adjust_period_years*12
+    has_schedule = fixed_months>0 and adjust_months>0
+    has_caps = all([template.arm_initial_cap, template.arm_periodic_cap, template.arm_lifetime_cap])
+
+    balance = np.array(np.broadcast_to(np.asarray(principal, dtype=float), (num_paths,)))
+    locked_fed_rate = fed_rates[:, 0].copy()
+    initial_arm_rate = None
+    did_first_arm_adjust = np.zeros(num_paths, dtype=bool)
+    last_rate = None  # rate recorded for the previous month, None until a month is recorded
+
+    def apply_arm_caps(new_rate):
+        nonlocal initial_arm_rate, did_first_arm_adjust
+        if not has_caps:
+            return new_rate
+        if last_rate is None:
+            initial_arm_rate = new_rate
+            return new_rate
+        old_rate = last_rate
+        if initial_arm_rate is None:
+            initial_arm_rate = old_rate
+        max_lifetime = initial_arm_rate + template.arm_lifetime_cap
+
+        changed = np.abs(new_rate - old_rate)>1e-9
+        first = changed & ~did_first_arm_adjust
+        did_first_arm_adjust = did_first_arm_adjust | first
+        capped = np.where(first, np.minimum(new_rate, old_rate + template.arm_initial_cap),
+                 np.where(changed, np.minimum(new_rate, old_rate + template.arm_periodic_cap), new_rate))
+        return np.minimum(capped, max_lifetime)
+
+    def get_annual_interest_rate(month_idx):
+        if current_type == 'fixed':
+            return locked_fed_rate + current_margin
+        if has_schedule:
+            month_idx = max(month_idx, 0)
+            if month_idx < fixed_months:
+                base_rate = locked_fed_rate + current_margin
+            else:
+                chunk_idx = (month_idx - fixed_months) // adjust_months
+                start_m = fixed_months + chunk_idx*adjust_months
+                base_rate = fed_rates[:, min(start_m, num_fed-1)] + current_margin
+        else:
+            base_rate = fed_rates[:, min(month_idx, num_fed-1)] + current_margin
+        return apply_arm_caps(base_rate)
+
+    num_months_total = template.term_months
+    # filled one month (row) at a time, transposed to paths x months at the end
+    rates_out = np.zeros((num_months_total, num_paths))
+    interest_out = np.zeros((num_months_total, num_paths))
+    principal_out = np.zeros((num_months_total, num_paths))
+    balance_out = np.zeros((num_months_total, num_paths))
+    num_months = np.zeros(num_paths, dtype=np.int64)
+    active = np.ones(num_paths, dtype=bool)
+
+    annual_rate_now = get_annual_interest_rate(0)
+    monthly_payment = _calculate_monthly_payments(annual_rate_now, balance, term_months)
+
+    event_idx = 0
+    for month in range(1, num_months_total+1):
+        # process events
+        while event_idx < num_events and events[event_idx].month == month:
+            ev = events[event_idx]
+            event_idx+=1
+            if ev.new_principal is not None:
+                balance = np.full(num_paths, float(ev.new_principal))
+            balance = balance + ev.fees
+
+            if ev.new_mortgage_type:
+                current_type = ev.new_mortgage_type
+                if current_type=='fixed':
+                    locked_fed_rate = fed_rates[:, min(month-1, num_fed-1)].copy()
+
+            if ev.new_margin is not None:
+                current_margin = ev.new_margin
+
+            if ev.new_term_years is not None:
+                term_months = (month-1)+ev.new_term_years*12
+
+            annual_rate_now = get_annual_interest_rate(month-1)
+            rem = term_months-(month-1)
+            if rem<=0:
+                break
+            monthly_payment = _calculate_monthly_payments(annual_rate_now, balance, rem)
+
+        active &= balance>0
+        if month>term_months or not active.any():
+            break
+
+        if current_type=='arm':
+            annual_rate_now = get_annual_interest_rate(month-1)
+            rem = term_months-(month-1)
+            if rem<=0:
+                break
+            monthly_payment = _calculate_monthly_payments(annual_rate_now, balance, rem)
+
+        # interest/principal
+        r = annual_rate_now/12
+        interest_paid = balance*r
+        principal_paid = monthly_payment-interest_paid
+        overpaid = principal_paid>balance
+        principal_paid = np.where(overpaid, balance, principal_paid)
+        monthly_payment = np.where(overpaid, interest_paid+principal_paid, monthly_payment)
+        balance = np.where(active, balance-principal_paid, balance)
+
+        row = month-1
+        np.copyto(rates_out[row], annual_rate_now, where=active)
+        np.copyto(interest_out[row], interest_paid, where=active)
+        np.copyto(principal_out[row], principal_paid, where=active)
+        np.copyto(balance_out[row], balance, where=active)
+        num_months[active] = month
+        last_rate = annual_rate_now
+
+        active &= balance>0
+        if not active.any():
+            break
+
+    return MortgageBatchResults(rates_out.T, interest_out.T, principal_out.T, balance_out.T, num_months)
+
+
+#
+# EXAMPLE USAGE
+#
+
+def example_usage(num_paths=10_000, num_months=360, num_checked=200):
+    fed_rates = generate_paths(RandomWalkModel(initial_rate=0.0433), num_paths, num_months, seed=42)
+
+    product = dict(
+        principal=400000,
+        margin=0.02,
+        term_years=30,
+        mortgage_type='arm',
+        arm_schedule="5/1",
+        arm_caps="2/2/5",
+    )
+
+    start = time.perf_counter()
+    batch = simulate_batch(fed_rates=fed_rates, **product)
+    batch_seconds = time.perf_counter() - start
+
+    # loop the scalar class over a subset and extrapolate
+    start = time.perf_counter()
+    max_diff = 0.0
+    for i in range(num_checked):
+        results = Mortgage(fed_rates=list(fed_rates[i]), **product).simulate()
+        expected = results.remaining_balance
+        max_diff = max(max_diff, float(np.max(np.abs(batch.remaining_balance[i, :len(results)] - expected))))
+    loop_seconds = (time.perf_counter() - start) * num_paths / num_checked
+
+    print(f"Batch: {num_paths} paths in {batch_seconds:.3f}s")
+    print(f"Loop (extrapolated): {loop_seconds:.3f}s")
+    print(f"Speedup: {loop_seconds / batch_seconds:.1f}x")
+    print(f"Max balance difference vs Mortgage.simulate: {max_diff:.2e}")
+
+if __name__ == "__main__":
+    example_usage()
@@ -1,5 +1,8 @@
 import math
-import matplotlib.pyplot as plt
+from array import array
+import numpy as np
+from amortization import amortization_schedule
+from figures import DEFAULT_MAX_POINTS, downsample
 
 class MortgageEvent:
     """
@@ -29,6 +32,228 @@ class MortgageEvent:
         self.fees = fees
         self.name = name or f"Event@{month}"
 
+class MortgageResults:
+    """
+    Month-by-month results of Mortgage.simulate(), stored column-wise in
+    preallocated typed arrays:
+      - month, annual_interest_rate, interest_paid, principal_paid, remaining_balance
+    Column properties return numpy views trimmed to the months recorded so far
+    (no copies). For compatibility, len(), indexing and iteration behave like
+    the old list of per-month dicts.
+    """
+    COLUMNS = ('month', 'annual_interest_rate', 'interest_paid', 'principal_paid', 'remaining_balance')
+    __slots__ = ('_month', '_annual_interest_rate', '_interest_paid', '_principal_paid', '_remaining_balance', '_size')
+
+    def __init__(self, capacity=0):
+        # array.array keeps per-month scalar writes cheap; numpy reads it through the buffer protocol
+        self._month = array('q', bytes(8*capacity))
+        self._annual_interest_rate = array('d', bytes(8*capacity))
+        self._interest_paid = array('d', bytes(8*capacity))
+        self._principal_paid = array('d', bytes(8*capacity))
+        self._remaining_balance = array('d', bytes(8*capacity))
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, month, annual_interest_rate, interest_paid, principal_paid, remaining_balance):
+        """
+        Wraps existing equal-length arrays without copying them.
+        """
+        results = cls.__new__(cls)
+        results._month = np.asarray(month)
+        results._annual_interest_rate = np.asarray(annual_interest_rate)
+        results._interest_paid = np.asarray(interest_paid)
+        results._principal_paid = np.asarray(principal_paid)
+        results._remaining_balance = np.asarray(remaining_balance)
+        results._size = len(results._month)
+        return results
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds columns from a list of per-month dicts (the old results format).
+        """
+        if isinstance(records, cls):
+            return records
+        return cls.from_columns(*(
+            np.array([r[col] for r in records], dtype=np.int64 if col == 'month' else float)
+            for col in cls.COLUMNS
+        ))
+
+    def append(self, month, annual_interest_rate, interest_paid, principal_paid, remaining_balance):
+        i = self._size
+        if i == len(self._month):
+            self._grow(max(1, 2*i))
+        self._month[i] = month
+        self._annual_interest_rate[i] = annual_interest_rate
+        self._interest_paid[i] = interest_paid
+        self._principal_paid[i] = principal_paid
+        self._remaining_balance[i] = remaining_balance
+        self._size = i+1
+
+    def extend(self, month, annual_interest_rate, interest_paid, principal_paid, remaining_balance):
+        """
+        Appends several months at once from arrays (scalars are broadcast).
+        """
+        n = len(month)
+        i = self._size
+        if i + n > len(self._month):
+            self._grow(max(i + n, 2*i))
+        np.asarray(self._month)[i:i+n] = month
+        np.asarray(self._annual_interest_rate)[i:i+n] = annual_interest_rate
+        np.asarray(self._interest_paid)[i:i+n] = interest_paid
+        np.asarray(self._principal_paid)[i:i+n] = principal_paid
+        np.asarray(self._remaining_balance)[i:i+n] = remaining_balance
+        self._size = i+n
+
+    def _grow(self, capacity):
+        # new arrays rather than resizing in place: an array can't be resized
+        # while a column view exported from it is alive. Such views keep the
+        # months recorded when they were taken.
+        for name in ('_month', '_annual_interest_rate', '_interest_paid', '_principal_paid', '_remaining_balance'):
+            old = getattr(self, name)
+            extra = capacity - len(old)
+            if isinstance(old, array):
+                setattr(self, name, old + array(old.typecode, bytes(old.itemsize*extra)))
+            else:
+                setattr(self, name, np.concatenate([old, np.zeros(extra, dtype=old.dtype)]))
+
+    def last(self, column):
+        """
+        Value of a column for the most recently recorded month.
+        """
+        return getattr(self, '_' + column)[self._size-1]
+
+    @property
+    def month(self):
+        return np.asarray(self._month)[:self._size]
+
+    @property
+    def annual_interest_rate(self):
+        return np.asarray(self._annual_interest_rate)[:self._size]
+
+    @property
+    def interest_paid(self):
+        return np.asarray(self._interest_paid)[:self._size]
+
+    @property
+    def principal_paid(self):
+        return np.asarray(self._principal_paid)[:self._size]
+
+    @property
+    def remaining_balance(self):
+        return np.asarray(self._remaining_balance)[:self._size]
+
+    @property
+    def monthly_payment(self):
+        return self.interest_paid + self.principal_paid
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._size))]
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("MortgageResults index out of range")
+        return {
+            'month': int(self._month[idx]),
+            'annual_interest_rate': float(self._annual_interest_rate[idx]),
+            'interest_paid': float(self._interest_paid[idx]),
+            'principal_paid': float(self._principal_paid[idx]),
+            'remaining_balance': float(self._remaining_balance[idx]),
+        }
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def to_records(self):
+        return list(self)
+
+#
+# ARM RATE SCHEDULE
+#
+# Builds a run of monthly ARM rates in one go instead of asking for one month
+# at a time, so the simulation loop only indexes into a precomputed vector.
+#
+
+def arm_base_rates(fed_rates, margin, start_idx, num_months, arm_fixed_years, arm_adjust_period_years, locked_fed_rate):
+    """
+    Uncapped ARM rates (Fed rate + margin) for month indices
+    start_idx .. start_idx+num_months-1.
+      - with a hybrid schedule: locked_fed_rate during the initial fixed window,
+        then the Fed rate at the start of each adjustment chunk
+      - without one: the Fed rate of each month
+    Months past the end of fed_rates reuse its last value.
+    """
+    fed_rates = np.asarray(fed_rates, dtype=float)
+    if len(fed_rates) == 0:
+        fed_rates = np.zeros(1)
+    idx = np.maximum(np.arange(start_idx, start_idx + num_months), 0)
+    fixed_months = arm_fixed_years*12
+    adjust_months = arm_adjust_period_years*12
+    if fixed_months>0 and adjust_months>0:
+        # months inside the fixed window get locked_fed_rate below; clamp them so they index a real chunk
+        chunk_start = fixed_months + np.maximum(idx - fixed_months, 0)//adjust_months*adjust_months
+        rates = fed_rates[np.minimum(chunk_start, len(fed_rates)-1)]
+        rates = np.where(idx < fixed_months, locked_fed_rate, rates)
+    else:
+        rates = fed_rates[np.minimum(idx, len(fed_rates)-1)]
+    return rates + margin
+
+def cap_arm_rates(base_rates, initial_cap, periodic_cap, lifetime_cap, prev_rate=None, initial_arm_rate=None, did_first_adjust=False):
+    """
+    Applies "initial/periodic/lifetime" caps to consecutive uncapped rates.
+      - prev_rate: rate of the month before the run (None => first month of the loan)
+      - initial_arm_rate: base of the lifetime cap (None => taken from the first month)
+      - did_first_adjust: whether the initial-cap adjustment has already happened
+    A change in rate uses the initial cap the first time and the periodic cap
+    after that; caps only limit increases. Returns
+    (capped rates, initial_arm_rate, did_first_adjust) so a later run can continue.
+    """
+    capped_rates = np.empty(len(base_rates))
+    for i, new_rate in enumerate(base_rates.tolist() if isinstance(base_rates, np.ndarray) else base_rates):
+        if prev_rate is None:
+            # first month => set initial_arm_rate
+            initial_arm_rate = new_rate
+            capped = new_rate
+        else:
+            if initial_arm_rate is None:
+                initial_arm_rate = prev_rate
+            changed = abs(new_rate - prev_rate)>1e-9
+            if changed and not did_first_adjust:
+                did_first_adjust = True
+                capped = min(new_rate, prev_rate + initial_cap)
+            elif changed:
+                capped = min(new_rate, prev_rate + periodic_cap)
+            else:
+                capped = new_rate
+            capped = min(capped, initial_arm_rate + lifetime_cap)
+        capped_rates[i] = capped
+        prev_rate = capped
+    return capped_rates, initial_arm_rate, did_first_adjust
+
+def arm_rate_schedule(fed_rates, margin, num_months, arm_schedule=None, arm_caps=None, start_idx=0, locked_fed_rate=None):
+    """
+    Full capped ARM rate vector for a loan with no events, e.g.
+      arm_rate_schedule(fed_rates, 0.015, 360, "5/1", "2/2/5")
+    locked_fed_rate defaults to the first Fed rate.
+    """
+    if len(fed_rates) == 0:
+        raise ValueError("arm_rate_schedule needs at least one Fed rate, got an empty fed_rates")
+    mortgage = Mortgage(0.0, fed_rates, margin, mortgage_type='arm', arm_schedule=arm_schedule, arm_caps=arm_caps)
+    if locked_fed_rate is None:
+        locked_fed_rate = fed_rates[0]
+    rates = arm_base_rates(fed_rates, margin, start_idx, num_months, mortgage.arm_fixed_years, mortgage.arm_adjust_period_years, locked_fed_rate)
+    if mortgage._has_arm_caps:
+        rates, _, _ = cap_arm_rates(rates, mortgage.arm_initial_cap, mortgage.arm_periodic_cap, mortgage.arm_lifetime_cap)
+    return rates
+
+# shorter constant-rate runs are cheaper to step than to set up in numpy
+CLOSED_FORM_MIN_MONTHS = 12
+
 class Mortgage:
     """
     Handles:
@@ -90,29 +315,35 @@ class Mortgage:
 
         # Internal
         self.balance = principal
-        self.results = []
+        self.results = MortgageResults(self.term_months)
         self.locked_fed_rate = None
         self.initial_arm_rate = None
         self.current_month = 0
         self.monthly_payment = 0.0
-        self._locked_chunk_rates = {}
+        self._has_arm_caps = all([self.arm_initial_cap, self.arm_periodic_cap, self.arm_lifetime_cap])
+        self._did_first_arm_adjust = False
+        # precomputed ARM rates for month indices [_rate_plan_start, _rate_plan_start + len)
+        self._rate_plan = None
+        self._rate_plan_start = 0
+        self._rate_plan_run_ends = None
 
     def get_annual_interest_rate(self, month_idx):
         # Fixed => locked fed rate
         if self.mortgage_type == 'fixed':
             if self.locked_fed_rate is None:
-                self.locked_fed_rate = self.fed_rates[0] if self.fed_rates else 0.0
+                self.locked_fed_rate = self.fed_rates[0] if len(self.fed_rates) > 0 else 0.0
             return self.locked_fed_rate + self.margin
 
-        # ARM => either a schedule or just pick month_idx + margin
+        return self._apply_arm_caps(month_idx, self._get_base_arm_rate(month_idx))
+
+    def _get_base_arm_rate(self, month_idx):
+        # ARM rate before caps => either a schedule or just pick month_idx + margin
         if self.arm_fixed_years>0 and self.arm_adjust_period_years>0:
-            base_rate = self._get_custom_arm_rate(month_idx)
-        else:
-            # If no schedule, treat it as a generic immediate ARM
-            base_rate = (self.fed_rates[month_idx] + self.margin
-                         if month_idx < len(self.fed_rates)
-                         else self.fed_rates[-1] + self.margin)
-        return self._apply_arm_caps(month_idx, base_rate)
+            return self._get_custom_arm_rate(month_idx)
+        # If no schedule, treat it as a generic immediate ARM
+        return (self.fed_rates[month_idx] + self.margin
+                if month_idx < len(self.fed_rates)
+                else self.fed_rates[-1] + self.margin)
 
     def _get_custom_arm_rate(self, month_idx):
         if month_idx < 0:
@@ -129,69 +360,89 @@ class Mortgage:
                 self.locked_fed_rate = self.fed_rates[0] if total_fed_len>0 else 0.0
             return self.locked_fed_rate + self.margin
 
-        # beyond initial fixed
-        months_into_adjust = month_idx - fixed_months
-        chunk_idx = months_into_adjust // adjust_months
-        chunk_key = f"chunk_{chunk_idx}"
-        if chunk_key not in self._locked_chunk_rates:
-            start_m = fixed_months + chunk_idx*adjust_months
-            if start_m >= total_fed_len:
-                rate_to_lock = self.fed_rates[-1] if total_fed_len>0 else 0.0
-            else:
-                rate_to_lock = self.fed_rates[start_m]
-            self._locked_chunk_rates[chunk_key] = rate_to_lock
-        locked_chunk_rate = self._locked_chunk_rates[chunk_key]
-        return locked_chunk_rate + self.margin
+        # beyond initial fixed => Fed rate at the start of the chunk
+        start_m = fixed_months + (month_idx - fixed_months)//adjust_months*adjust_months
+        if start_m >= total_fed_len:
+            return (self.fed_rates[-1] if total_fed_len>0 else 0.0) + self.margin
+        return self.fed_rates[start_m] + self.margin
 
     def _apply_arm_caps(self, month_idx, new_rate):
         # if no caps, return
-        if not all([self.arm_initial_cap, self.arm_periodic_cap, self.arm_lifetime_cap]):
-            return new_rate
-
-        if not self.results:  
-            # first month => set initial_arm_rate
-            self.initial_arm_rate = new_rate
+        if not self._has_arm_caps:
             return new_rate
-
-        old_rate = self.results[-1]['annual_interest_rate']
-        if self.initial_arm_rate is None:
-            self.initial_arm_rate = old_rate
-
-        max_lifetime = self.initial_arm_rate + self.arm_lifetime_cap
-
-        # track if we've done first adjustment
-        if not hasattr(self, '_did_first_arm_adjust'):
-            self._did_first_arm_adjust = False
-
-        # did rate actually change
-        changed = abs(new_rate - old_rate)>1e-9
-        if changed and not self._did_first_arm_adjust:
-            self._did_first_arm_adjust = True
-            # clamp by initial cap
-            capped = min(new_rate, old_rate + self.arm_initial_cap)
-        elif changed:
-            # subsequent adjustments
-            capped = min(new_rate, old_rate + self.arm_periodic_cap)
-        else:
-            capped = new_rate
-
-        # apply lifetime
-        capped = min(capped, max_lifetime)
+        prev_rate = self.results.last('annual_interest_rate') if self.results else None
+        (capped,), self.initial_arm_rate, self._did_first_arm_adjust = cap_arm_rates(
+            [new_rate], self.arm_initial_cap, self.arm_periodic_cap, self.arm_lifetime_cap,
+            prev_rate, self.initial_arm_rate, self._did_first_arm_adjust
+        )
         return capped
 
+    def _plan_arm_rates(self, month_idx, event_idx):
+        """
+        Precomputes capped ARM rates from month_idx up to the next event (or
+        the end of the term) and records the cap state reached at its end.
+        """
+        end_idx = self.term_months
+        if event_idx < len(self.events) and self.events[event_idx].month > month_idx+1:
+            end_idx = min(end_idx, self.events[event_idx].month-1)
+        if self.locked_fed_rate is None:
+            self.locked_fed_rate = self.fed_rates[0] if len(self.fed_rates) > 0 else 0.0
+
+        rates = arm_base_rates(
+            self.fed_rates, self.margin, month_idx, max(end_idx-month_idx, 1),
+            self.arm_fixed_years, self.arm_adjust_period_years, self.locked_fed_rate
+        )
+        if self._has_arm_caps:
+            prev_rate = self.results.last('annual_interest_rate') if self.results else None
+            rates, self.initial_arm_rate, self._did_first_arm_adjust = cap_arm_rates(
+                rates, self.arm_initial_cap, self.arm_periodic_cap, self.arm_lifetime_cap,
+                prev_rate, self.initial_arm_rate, self._did_first_arm_adjust
+            )
+        self._rate_plan = rates
+        self._rate_plan_start = month_idx
+        # for each position, the last position of its run of equal rates
+        boundaries = np.flatnonzero(rates[1:] != rates[:-1])
+        self._rate_plan_run_ends = np.append(boundaries, len(rates)-1)[
+            np.searchsorted(boundaries, np.arange(len(rates)))
+        ]
+
+    def _planned_arm_rate(self, month_idx, event_idx):
+        if self._rate_plan is None or not 0 <= month_idx-self._rate_plan_start < len(self._rate_plan):
+            self._plan_arm_rates(month_idx, event_idx)
+        return self._rate_plan[month_idx-self._rate_plan_start].item()
+
     def calculate_monthly_payment(self, annual_rate, balance, remaining_months):
         r = annual_rate/12
         if r<=0:
             return balance/remaining_months
         return (balance*r)/(1-(1+r)**(-remaining_months))
 
+    def _constant_rate_run_end(self, month, annual_rate, event_idx):
+        """
+        Last month of the run starting at `month` over which the rate and
+        payment stay constant, so it can be amortized in closed form:
+        up to the next event, the end of the term and, for an ARM, the end
+        of the current run of equal precomputed rates.
+        """
+        end = self.term_months
+        if event_idx < len(self.events) and self.events[event_idx].month > month:
+            end = min(end, self.events[event_idx].month-1)
+        if self.mortgage_type=='arm':
+            # below zero an ARM re-levels its payment to balance/remaining months each month
+            pos = month-1-self._rate_plan_start
+            if annual_rate < 0 or self._rate_plan is None or not 0 <= pos < len(self._rate_plan):
+                return month
+            end = min(end, self._rate_plan_start + self._rate_plan_run_ends[pos].item() + 1)
+        return end
+
     def simulate(self):
         event_idx = 0
         num_events = len(self.events)
+        last_month = self.term_months
 
         # If we start fixed
         if self.mortgage_type=='fixed' and self.locked_fed_rate is None:
-            self.locked_fed_rate = self.fed_rates[0] if self.fed_rates else 0.0
+            self.locked_fed_rate = self.fed_rates[0] if len(self.fed_rates) > 0 else 0.0
 
         # initial payment
         annual_rate_now = self.get_annual_interest_rate(0)
@@ -199,11 +450,16 @@ class Mortgage:
             annual_rate_now, self.balance, self.term_months
         )
 
-        for month in range(1, self.term_months+1):
+        month = 0
+        while month < last_month:
+            month += 1
             self.current_month = month
 
             # process events
+            had_event = False
             while event_idx < num_events and self.events[event_idx].month == month:
+                had_event = True
+                self._rate_plan = None
                 ev = self.events[event_idx]
                 event_idx+=1
                 if ev.new_principal is not None:
@@ -235,7 +491,10 @@ class Mortgage:
                 break
 
             if self.mortgage_type=='arm':
-                annual_rate_now = self.get_annual_interest_rate(month-1)
+                if had_event:
+                    annual_rate_now = self.get_annual_interest_rate(month-1)
+                else:
+                    annual_rate_now = self._planned_arm_rate(month-1, event_idx)
                 rem = self.term_months-(month-1)
                 if rem<=0:
                     break
@@ -243,6 +502,22 @@ class Mortgage:
                     annual_rate_now, self.balance, rem
                 )
 
+            # constant-rate run => closed form instead of stepping
+            run_end = min(self._constant_rate_run_end(month, annual_rate_now, event_idx), last_month)
+            if run_end-month+1 >= CLOSED_FORM_MIN_MONTHS:
+                interest, principal, balances = amortization_schedule(
+                    self.balance, annual_rate_now, self.monthly_payment, run_end-month+1
+                )
+                n = len(balances)
+                self.results.extend(np.arange(month, month+n), annual_rate_now, interest, principal, balances)
+                self.balance = balances[-1].item()
+                month += n-1
+                self.current_month = month
+                if self.balance<=0:
+                    self.monthly_payment = (interest[-1] + principal[-1]).item()
+                    break
+                continue
+
             # interest/principal
             r = annual_rate_now/12
             interest_paid = self.balance*r
@@ -252,13 +527,7 @@ class Mortgage:
                 self.monthly_payment = interest_paid+principal_paid
             self.balance -= principal_paid
 
-            self.results.append({
-                'month': month,
-                'annual_interest_rate': annual_rate_now,
-                'interest_paid': interest_paid,
-                'principal_paid': principal_paid,
-                'remaining_balance': self.balance
-            })
+            self.results.append(month, annual_rate_now, interest_paid, principal_paid, self.balance)
 
             if self.balance<=0:
                 break
@@ -275,6 +544,8 @@ def plot_fed_rate_history(fed_rates):
     Creates a Figure for Fed rate history and returns it.
     Does not call plt.show().
     """
+    import matplotlib.pyplot as plt
+
     fig = plt.figure(figsize=(8,4))
     ax = fig.add_subplot(111)
     months = range(1, len(fed_rates)+1)
@@ -286,7 +557,7 @@ def plot_fed_rate_history(fed_rates):
     fig.tight_layout()
     return fig
 
-def plot_mortgages_3x2(mortgage_results_dict, title="Mortgage Comparison 3x2"):
+def plot_mortgages_3x2(mortgage_results_dict, title="Mortgage Comparison 3x2", max_points=DEFAULT_MAX_POINTS):
     """
     Creates a 3x2 plot for multiple mortgage scenarios, returning a Figure.
     Subplots:
@@ -296,8 +567,11 @@ def plot_mortgages_3x2(mortgage_results_dict, title="Mortgage Comparison 3x2"):
       (1,1) => Total Amount Paid (cumulative sum)
       (2,0) => Remaining Balance
       (2,1) => Annual Interest Rate
+    Series longer than max_points are downsampled before drawing (keeping
+    each stretch's extremes), which keeps long or many-scenario comparisons
+    fast to draw and small as SVG.
     """
-    import numpy as np
+    import matplotlib.pyplot as plt
 
     fig, axs = plt.subplots(3, 2, figsize=(12, 12))
 
@@ -309,25 +583,27 @@ def plot_mortgages_3x2(mortgage_results_dict, title="Mortgage Comparison 3x2"):
     ax_rate         = axs[2][1]
 
     for label, results in mortgage_results_dict.items():
-        months    = [r['month'] for r in results]
-        interests = [r['interest_paid'] for r in results]
-        principals= [r['principal_paid'] for r in results]
-        balances  = [r['remaining_balance'] for r in results]
-        rates     = [r['annual_interest_rate'] for r in results]
+        # columns are used in place; lists of dicts are converted once
+        results   = MortgageResults.from_records(results)
+        months    = results.month
+        interests = results.interest_paid
+        principals= results.principal_paid
+        balances  = results.remaining_balance
+        rates     = results.annual_interest_rate
 
         # monthly payment
-        payments = [i + p for i,p in zip(interests, principals)]
+        payments = results.monthly_payment
 
         # cumulative sum of monthly payments
         total_paid = np.cumsum(payments)
 
         # Plot each subplot
-        ax_interest.plot(months, interests, label=f"{label} Interest")
-        ax_principal.plot(months, principals, label=f"{label} Principal")
-        ax_monthly_pay.plot(months, payments, label=f"{label} Payment")
-        ax_total_paid.plot(months, total_paid, label=f"{label} Total Paid")
-        ax_balance.plot(months, balances, label=f"{label} Balance")
-        ax_rate.plot(months, rates, label=f"{label} Rate")
+        ax_interest.plot(*downsample(months, interests, max_points), label=f"{label} Interest")
+        ax_principal.plot(*downsample(months, principals, max_points), label=f"{label} Principal")
+        ax_monthly_pay.plot(*downsample(months, payments, max_points), label=f"{label} Payment")
+        ax_total_paid.plot(*downsample(months, total_paid, max_points), label=f"{label} Total Paid")
+        ax_balance.plot(*downsample(months, balances, max_points), label=f"{label} Balance")
+        ax_rate.plot(*downsample(months, rates, max_points), label=f"{label} Rate")
 
     # Labeling
     ax_interest.set_title("Monthly Interest")
@@ -364,24 +640,11 @@ def plot_mortgages_3x2(mortgage_results_dict, title="Mortgage Comparison 3x2"):
 # EXAMPLE USAGE
 #
 
-def example_usage():
-    import random
-    random.seed(42)
-
-    # 1) Create a Fed rate history for ~30 years (360 months).
-    fed_rates = []
-    current_rate = 0.0433
-    for _ in range(360):
-        delta = random.uniform(-0.001, 0.0013)
-        current_rate = max(0.0, current_rate + delta)
-        fed_rates.append(current_rate)
-
-    # 2) Plot Fed rate (first window)
-    fig_fed = plot_fed_rate_history(fed_rates)
-
-    # 3) Create some mortgage examples
-    principal = 400000
-
+def example_mortgages(fed_rates, principal=400000):
+    """
+    Results of the example mortgages on one Fed rate path, by label: a
+    30-year fixed, a 5/1 ARM and a 5/1 ARM refinanced to fixed.
+    """
     # a) 30-year Fixed
     mortgage_fixed = Mortgage(
         principal=principal,
@@ -404,19 +667,7 @@ def example_usage():
     )
     arm_5_1_results = mortgage_arm_5_1.simulate()
 
-    # c) 7/2 ARM with 2/2/5 caps
-    mortgage_arm_7_2 = Mortgage(
-        principal=principal,
-        fed_rates=fed_rates,
-        margin=0.015,
-        term_years=30,
-        mortgage_type='arm',
-        arm_schedule="7/2",
-        arm_caps="2/2/5"
-    )
-    arm_7_2_results = mortgage_arm_7_2.simulate()
-
-    # d) Refinance Example:
+    # c) Refinance Example:
     #    Start as a 5/1 ARM, then at month 60 (after 5 years), switch to fixed
     #    with some fees ($2,000) rolled in, keep the old principal (None).
     events_refi = [
@@ -441,16 +692,30 @@ def example_usage():
     )
     refi_results = mortgage_refi.simulate()
 
-    # 4) Plot the mortgages in a 3x2 grid (second window)
-    results_dict = {
+    return {
         "Fixed30": fixed_results,
         "5/1 ARM": arm_5_1_results,
-        #"7/2 ARM": arm_7_2_results,
         "Refi (5/1->Fixed)": refi_results
     }
-    fig_compare = plot_mortgages_3x2(results_dict, title="Mortgage Comparison (3x2): Interest, Principal, Payment, etc.")
 
-    # 5) Finally, show both figures
+def mortgage_comparison_report(fed_rates, principal=400000):
+    """The example mortgages on one Fed rate path as a 3x2 comparison Figure (for figures.render_batch)."""
+    return plot_mortgages_3x2(example_mortgages(fed_rates, principal), title="Mortgage Comparison (3x2): Interest, Principal, Payment, etc.")
+
+def example_usage():
+    import matplotlib.pyplot as plt
+    from fed_rate_paths import RandomWalkModel, generate_paths
+
+    # 1) Create a Fed rate history for ~30 years (360 months).
+    fed_rates = list(generate_paths(RandomWalkModel(initial_rate=0.0433), 1, 360, seed=42, max_workers=1)[0])
+
+    # 2) Plot Fed rate (first window)
+    fig_fed = plot_fed_rate_history(fed_rates)
+
+    # 3) Plot the example mortgages in a 3x2 grid (second window)
+    fig_compare = mortgage_comparison_report(fed_rates)
+
+    # 4) Finally, show both figures
     plt.show()
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from mortgage_simulator import Mortgage, MortgageEvent
+from fed_rate_paths import RandomWalkModel, generate_paths
+
+#
+# PRODUCTS AND GRIDS
+#
+
+# Products compared in mortgage_simulator.example_usage
+PRODUCTS = {
+    "Fixed30": dict(mortgage_type='fixed'),
+    "5/1 ARM": dict(mortgage_type='arm', arm_schedule="5/1"),
+    "7/2 ARM": dict(mortgage_type='arm', arm_schedule="7/2"),
+    "Refi (5/1->Fixed)": dict(mortgage_type='arm', arm_schedule="5/1", refinance=True),
+}
+
+# Parameters a grid may vary; anything not in the grid takes these values
+DEFAULT_CASE = {
+    "product": "Fixed30",
+    "principal": 400000,
+    "margin": 0.02,
+    "term_years": 30,
+    "arm_caps": "2/2/5",
+    "refi_month": 60,
+    "refi_margin": 0.03,
+    "refi_term_years": 25,
+    "refi_fees": 2000.0,
+}
+
+DEFAULT_GRID = {
+    "product": list(PRODUCTS),
+    "margin": [0.01, 0.015, 0.02, 0.025, 0.03],
+    "arm_caps": ["1/1/5", "2/2/5", "5/2/5"],
+    "refi_month": [36, 60, 84],
+    "refi_fees": [0.0, 2000.0, 5000.0],
+}
+
+SUMMARY_FIELDS = ["total_interest", "total_paid", "max_payment", "payoff_month", "final_balance"]
+
+ARM_PARAMETERS = ("arm_caps",)
+REFI_PARAMETERS = ("refi_month", "refi_margin", "refi_term_years", "refi_fees")
+
+def product_parameters(product):
+    """The case parameters that change a product's results."""
+    spec = PRODUCTS[product]
+    ignored = set()
+    if spec["mortgage_type"] != 'arm':
+        ignored.update(ARM_PARAMETERS)
+    if not spec.get("refinance"):
+        ignored.update(REFI_PARAMETERS)
+    return [k for k in DEFAULT_CASE if k not in ignored]
+
+def expand_grid(grid):
+    """
+    Cartesian product of a {parameter: [values]} grid as a list of cases,
+    with parameters a product ignores (caps for a fixed loan, refinance terms
+    without a refinance) set to None and the duplicates this leaves dropped,
+    so each distinct mortgage is simulated once.
+    Each case gets a case_id from its position, which is stable for a given
+    grid, so a resumed sweep can tell which cases are already done.
+    """
+    unknown = set(grid) - set(DEFAULT_CASE)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    keys = list(grid)
+    cases = []
+    seen = set()
+    for values in itertools.product(*(grid[k] for k in keys)):
+        case = dict(DEFAULT_CASE)
+        case.update(zip(keys, values))
+        used = product_parameters(case["product"])
+        case = {k: (v if k in used else None) for k, v in case.items()}
+        key = tuple(case.values())
+        if key in seen:
+            continue
+        seen.add(key)
+        case["case_id"] = len(cases)
+        cases.append(case)
+    return cases
+
+def build_mortgage(case, fed_rates):
+    product = PRODUCTS[case["product"]]
+    events = None
+    if product.get("refinance"):
+        events = [
+            MortgageEvent(
+                month=case["refi_month"],
+                new_mortgage_type='fixed',
+                new_margin=case["refi_margin"],
+                new_term_years=case["refi_term_years"],
+                fees=case["refi_fees"],
+                name=f"RefiToFixed@Month{case['refi_month']}"
+            )
+        ]
+    return Mortgage(
+        principal=case["principal"],
+        fed_rates=fed_rates,
+        margin=case["margin"],
+        term_years=case["term_years"],
+        mortgage_type=product["mortgage_type"],
+        arm_schedule=product.get("arm_schedule"),
+        arm_caps=case["arm_caps"] if product["mortgage_type"] == 'arm' else None,
+        events=events
+    )
+
+def summarize_case(case, fed_rates):
+    results = build_mortgage(case, fed_rates).simulate()
+    payments = results.monthly_payment
+    row = dict(case)
+    row.update({
+        "total_interest": float(results.interest_paid.sum()),
+        "total_paid": float(payments.sum()),
+        "max_payment": float(payments.max()) if len(results) else 0.0,
+        "payoff_month": int(results.month[-1]) if len(results) else 0,
+        "final_balance": float(results.remaining_balance[-1]) if len(results) else float(case["principal"]),
+    })
+    return row
+
+#
+# EXECUTION
+#
+
+_worker_fed_rates = None
+
+def _init_worker(fed_rates):
+    global _worker_fed_rates
+    _worker_fed_rates = fed_rates
+
+def _run_chunk(cases):
+    return [summarize_case(case, _worker_fed_rates) for case in cases]
+
+def _load_completed(output_path, fieldnames):
+    """
+    Reads the rows already in output_path, keyed by case_id, and rewrites the
+    file without a trailing row cut short by an interruption.
+    """
+    if not os.path.exists(output_path):
+        return {}
+    with open(output_path, newline='') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != fieldnames:
+            raise ValueError(f"{output_path} is not a mortgage sweep output; use a new output file or disable resume")
+        rows = [row for row in reader if None not in row.values() and row.get(fieldnames[-1]) != '']
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, output_path)
+    return {int(row["case_id"]): row for row in rows}
+
+def run_sweep(grid, fed_rates, output_path, chunk_size=200, max_workers=None, resume=True):
+    """
+    Simulates every case of the grid against one Fed rate path and streams a
+    summary row per case to a CSV at output_path as chunks finish.
+
+    Cases are sent to a ProcessPoolExecutor in chunks of chunk_size. With
+    resume=True, cases already present in output_path are skipped, so an
+    interrupted sweep can be restarted with the same arguments.
+    Returns the number of cases simulated in this call.
+    """
+    cases = expand_grid(grid)
+    fieldnames = ["case_id"] + list(DEFAULT_CASE) + SUMMARY_FIELDS
+    fed_rates = list(fed_rates)
+
+    completed = _load_completed(output_path, fieldnames) if resume else {}
+    for case in cases:
+        row = completed.get(case["case_id"])
+        if row is not None and any(row[k] != ('' if case[k] is None else str(case[k])) for k in DEFAULT_CASE):
+            raise ValueError(f"{output_path} was written by a different grid; use a new output file or disable resume")
+    pending = [case for case in cases if case["case_id"] not in completed]
+    chunks = [pending[i:i+chunk_size] for i in range(0, len(pending), chunk_size)]
+    if completed:
+        print(f"Resuming: {len(completed)} of {len(cases)} cases already done")
+
+    write_header = not (resume and os.path.exists(output_path))
+    with open(output_path, 'a' if not write_header else 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if write_header:
+            writer.writeheader()
+            f.flush()
+        if not chunks:
+            return 0
+
+        done = 0
+        if max_workers == 1:
+            _init_worker(fed_rates)
+            finished = (_run_chunk(chunk) for chunk in chunks)
+        else:
+            pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(fed_rates,))
+            futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+            finished = (future.result() for future in as_completed(futures))
+        try:
+            for rows in finished:
+                writer.writerows(rows)
+                f.flush()
+                done += len(rows)
+                print(f"{len(completed) + done}/{len(cases)} cases")
+        finally:
+            if max_workers != 1:
+                pool.shutdown(cancel_futures=True)
+    return done
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep mortgage products over a parameter grid.")
+    parser.add_argument("--grid", help="JSON file or inline JSON object of {parameter: [values]}; defaults to a built-in grid")
+    parser.add_argument("--output", default="mortgage_sweep.csv", help="CSV file the summary rows are streamed to")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the simulated Fed rate path")
+    parser.add_argument("--months", type=int, default=360, help="length of the simulated Fed rate path")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="cases per task sent to a worker")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of skipping finished cases")
+    args = parser.parse_args(argv)
+
+    if args.grid is None:
+        grid = DEFAULT_GRID
+    elif os.path.exists(args.grid):
+        with open(args.grid) as f:
+            grid = json.load(f)
+    else:
+        grid = json.loads(args.grid)
+
+    fed_rates = generate_paths(RandomWalkModel(), 1, args.months, seed=args.seed, max_workers=1)[0]
+    start = time.perf_counter()
+    done = run_sweep(grid, fed_rates, args.output, chunk_size=args.chunk_size, max_workers=args.workers, resume=not args.no_resume)
+    print(f"Simulated {done} cases in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,371 @@
-# doesn't seem to be working
 # sales data obtained here from 2003 onwards https://www.nyc.gov/site/finance/property/property-annualized-sales-update.page
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import email.utils
+import http.client
+import json
 import os
+import re
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from raw_data_to_csv import convert_all, csv_dir_path, pattern as WORKBOOK_PATTERN, raw_data_dir_path
+
+SALES_PAGE_URL = 'https://www.nyc.gov/site/finance/property/property-annualized-sales-update.page'
+
+# nyc.gov answers 403 to the default python user agent
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) nyc-historical-mortgage-analysis'
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+CHUNK_SIZE = 1 << 16
+
+# Written next to the workbooks: {filename: {"url", "etag", "last_modified"}}
+MANIFEST_NAME = '.download_manifest.json'
+# An unfinished download lives in {file}.part, with the validators of the
+# response it came from in {file}.part.json so a later run can resume it
+PART_SUFFIX = '.part'
+
+#
+# LINKS
+#
+
+class LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.hrefs.append(href)
+
+def canonical_filename(file_name):
+    """
+    {year}_{borough}.xls(x) name for a workbook as published, using the same
+    rules as rename_old_convention.py:
+      - sales_{borough}_{yy}.xls => 20{yy}_{borough}.xls
+      - sales_{yyyy}_{borough}.xls => {yyyy}_{borough}.xls
+      - staten_island / statenisland => si
+    """
+    file_name = file_name.lower()
+    match = re.match(r"sales_(.*?)_(\d{2})\.xls$", file_name)
+    if match:
+        borough, year = match.groups()
+        file_name = f"20{year}_{borough}.xls"
+    match = re.match(r"sales_(\d{4})_(.*?)(\.xlsx?)$", file_name)
+    if match:
+        year, borough, extension = match.groups()
+        file_name = f"{year}_{borough}{extension}"
+    return file_name.replace("staten_island", "si").replace("statenisland", "si")
+
+def find_workbook_links(page_url, html):
+    """
+    {canonical filename: absolute URL} for every workbook linked from the
+    page that raw_data_to_csv.py knows how to convert. Citywide and rolling
+    sales files are left out.
+    """
+    parser = LinkParser()
+    parser.feed(html)
+    links = {}
+    for href in parser.hrefs:
+        url = urllib.parse.urljoin(page_url, href)
+        file_name = canonical_filename(os.path.basename(urllib.parse.urlparse(url).path))
+        if re.match(WORKBOOK_PATTERN, file_name):
+            links[file_name] = url
+    return links
+
+#
+# FETCHING
+#
+
+def _open(url, headers, timeout):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, **headers})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+def _is_transient(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError))
+
+def with_retries(fn, retries=DEFAULT_RETRIES, backoff=BACKOFF_SECONDS):
+    """Calls fn(), retrying connection errors, timeouts, 429 and 5xx with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not _is_transient(e):
+                raise
+            time.sleep(backoff*2**attempt)
+
+def fetch_page(url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    def fetch():
+        with _open(url, {}, timeout) as response:
+            return response.read().decode(response.headers.get_content_charset() or 'utf-8', errors='replace')
+    return with_retries(fetch, retries)
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def _fetch_once(url, file_path, validators, timeout):
+    """
+    One request for url => file_path. Sends a Range request when a .part
+    file from an earlier attempt exists, else a conditional GET when the
+    file exists and validators were recorded for it.
+    Returns (status, validators).
+    """
+    part_path = file_path + PART_SUFFIX
+    part_meta_path = part_path + '.json'
+    part_validators = _read_json(part_meta_path)
+    headers = {}
+    offset = 0
+    if os.path.exists(part_path) and part_validators and (part_validators['etag'] or part_validators['last_modified']):
+        offset = os.path.getsize(part_path)
+        headers['Range'] = f'bytes={offset}-'
+        headers['If-Range'] = part_validators['etag'] or part_validators['last_modified']
+    elif os.path.exists(file_path) and validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
 
-def download_excel_files(url, target_folder):
     try:
-        # Create target folder if it doesn't exist
-        if not os.path.exists(target_folder):
-            os.makedirs(target_folder)
+        response = _open(url, headers, timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 'not modified', validators
+        if e.code == 416:
+            # the partial file no longer fits the remote one; start over
+            _remove(part_path, part_meta_path)
+            return _fetch_once(url, file_path, validators, timeout)
+        raise
+
+    with response:
+        new_validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        if response.status == 206:
+            status, mode = 'resumed', 'ab'
+        else:
+            # a 200 to a Range request means the remote file changed
+            status, mode, offset = 'downloaded', 'wb', 0
+            with open(part_meta_path, 'w') as f:
+                json.dump(new_validators, f)
+        with open(part_path, mode) as f:
+            shutil.copyfileobj(response, f, CHUNK_SIZE)
+        expected = response.headers.get('Content-Length')
+        if expected is not None and os.path.getsize(part_path) != offset + int(expected):
+            raise http.client.IncompleteRead(b'', offset + int(expected) - os.path.getsize(part_path))
+
+    os.replace(part_path, file_path)
+    _remove(part_meta_path)
+    return status, new_validators
+
+def fetch_workbook(url, file_path, validators=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    Downloads url to file_path unless the server says the copy on disk is
+    current. A connection dropped mid-file keeps what arrived, and the retry
+    (or the next run) asks only for the rest.
+    Returns (status, validators):
+      - status: 'downloaded', 'resumed' or 'not modified'
+      - validators: {"etag", "last_modified"} to send next time
+    """
+    return with_retries(lambda: _fetch_once(url, file_path, validators, timeout), retries)
+
+#
+# PIPELINE
+#
+
+def load_manifest(target_folder):
+    return _read_json(os.path.join(target_folder, MANIFEST_NAME)) or {}
+
+def save_manifest(manifest, target_folder):
+    manifest_path = os.path.join(target_folder, MANIFEST_NAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def download_excel_files(url=SALES_PAGE_URL, target_folder=raw_data_dir_path, max_workers=DEFAULT_WORKERS,
+                         timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, force=False):
+    """
+    Downloads every sales workbook linked from the page at url into
+    target_folder under its {year}_{borough} name, max_workers at a time.
+    Workbooks the server reports unchanged since the last run are skipped.
+    force : ignore recorded ETag/Last-Modified and fetch everything
+    Returns the names of the files that were (re)written.
+    """
+    os.makedirs(target_folder, exist_ok=True)
+    links = find_workbook_links(url, fetch_page(url, timeout, retries))
+    manifest = {} if force else load_manifest(target_folder)
+    written = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for file_name, file_url in sorted(links.items()):
+            entry = manifest.get(file_name)
+            validators = entry if entry is not None and entry.get('url') == file_url else None
+            future = pool.submit(fetch_workbook, file_url, os.path.join(target_folder, file_name), validators, timeout, retries)
+            futures[future] = (file_name, file_url)
+        for future in as_completed(futures):
+            file_name, file_url = futures[future]
+            try:
+                status, validators = future.result()
+            except Exception as e:
+                print(f'Error downloading {file_url}: {e}')
+                continue
+            manifest[file_name] = {'url': file_url, **validators}
+            save_manifest(manifest, target_folder)
+            if status != 'not modified':
+                written.append(file_name)
+            print(f'{file_name}: {status}')
+    return sorted(written)
+
+#
+# LOCAL STAND-IN
+#
+# Serves a directory of fixture workbooks the way the finance site does
+# (a page linking them, ETag/Last-Modified, conditional GET, byte ranges), so
+# the downloader can be exercised without the network:
+#   with FixtureServer("fixtures", truncate_after=1000) as server:
+#       download_excel_files(server.url, "out")
+#
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        path = urllib.parse.unquote(urllib.parse.urlparse(self.path).path)
+        if path in ('/', '/index.html'):
+            names = sorted(n for n in os.listdir(server.directory) if n.endswith(('.xls', '.xlsx')))
+            body = ''.join(f'<a href="files/{urllib.parse.quote(n)}">{n}</a>\n' for n in names).encode()
+            return self._send(200, {'Content-Type': 'text/html; charset=utf-8'}, body)
+
+        file_path = os.path.join(server.directory, os.path.basename(path))
+        if not path.startswith('/files/') or not os.path.isfile(file_path):
+            return self._send(404, {}, b'')
+        stat = os.stat(file_path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        validators = {'ETag': etag, 'Last-Modified': last_modified}
+
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            if if_none_match == etag:
+                return self._send(304, validators, b'')
+        elif if_modified_since is not None:
+            since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            if int(stat.st_mtime) <= since:
+                return self._send(304, validators, b'')
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        byte_range = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        if byte_range and self.headers.get('If-Range') in (None, etag, last_modified):
+            start = int(byte_range.group(1))
+            if start >= len(data):
+                return self._send(416, {'Content-Range': f'bytes */{len(data)}'}, b'')
+            headers = {**validators, 'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'}
+            return self._send(206, headers, data[start:])
+
+        if server.truncate_after is not None and file_path not in server.truncated:
+            # drop the connection part way through the first full response
+            server.truncated.add(file_path)
+            return self._send(200, validators, data, truncate_after=server.truncate_after)
+        return self._send(200, validators, data)
+
+    def _send(self, code, headers, body, truncate_after=None):
+        self.server.log.append((self.path, self.headers.get('Range'), code))
+        self.send_response(code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if code != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if truncate_after is not None:
+            self.wfile.write(body[:truncate_after])
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
 
-        # Send a GET request to the URL
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error if the request failed
+class FixtureServer(ThreadingHTTPServer):
+    """
+    HTTP stand-in for the finance site serving the workbooks in directory
+    on a free localhost port while used as a context manager.
+      - truncate_after: cut the first full response for each file after
+        this many bytes, to exercise resuming
+      - log: (path, Range header, status) of every response
+    """
+    daemon_threads = True
 
-        # Parse the content of the page
-        soup = BeautifulSoup(response.content, 'html.parser')
+    def __init__(self, directory, truncate_after=None):
+        super().__init__(('127.0.0.1', 0), FixtureRequestHandler)
+        self.directory = directory
+        self.truncate_after = truncate_after
+        self.truncated = set()
+        self.log = []
+        self._thread = None
 
-        # Find all hyperlinks on the page
-        links = soup.find_all('a')
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/'
 
-        # Filter links that end with '.xls' or '.xlsx' (Excel files)
-        excel_links = [link for link in links if link.get('href') and link.get('href').endswith(('.xls', '.xlsx'))]
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
 
-        for link in excel_links:
-            file_url = link.get('href')
-            if not file_url.startswith('http'):
-                file_url = url + file_url  # Handle relative URLs
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
 
-            file_response = requests.get(file_url)
-            file_name = file_url.split('/')[-1]
-            file_path = os.path.join(target_folder, file_name)
+#
+# CLI
+#
 
-            # Write the file to the target folder
-            with open(file_path, 'wb') as file:
-                file.write(file_response.content)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the NYC annualized sales workbooks and convert new ones to CSV.")
+    parser.add_argument("--url", default=SALES_PAGE_URL)
+    parser.add_argument("--raw-dir", default=raw_data_dir_path)
+    parser.add_argument("--csv-dir", default=csv_dir_path)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent downloads")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--force", action="store_true", help="ignore ETag/Last-Modified and download everything")
+    parser.add_argument("--no-convert", action="store_true", help="only download, don't run the CSV conversion")
+    parser.add_argument("--fixtures", help="serve the workbooks in this directory locally and download from there instead of --url")
+    parser.add_argument("--truncate-after", type=int, help="with --fixtures, drop each first response after this many bytes")
+    args = parser.parse_args(argv)
 
-            print(f'Downloaded: {file_name}')
+    def run(url):
+        written = download_excel_files(url, args.raw_dir, args.workers, args.timeout, args.retries, force=args.force)
+        print(f"{len(written)} workbooks new or changed")
+        if written and not args.no_convert:
+            convert_all(args.raw_dir, args.csv_dir)
 
-    except Exception as e:
-        print(f'An error occurred: {e}')
+    if args.fixtures:
+        with FixtureServer(args.fixtures, args.truncate_after) as server:
+            run(server.url)
+    else:
+        run(args.url)
 
-# Example usage
-url = 'https://www.nyc.gov/site/finance/property/property-annualized-sales-update.page'
-download_excel_files(url, 'downloaded_excel_files')
+if __name__ == "__main__":
+    main()
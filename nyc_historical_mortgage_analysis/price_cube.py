@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from sales_store import CSV_DIR, MODULE_DIR, STORE_DIR, SalesQuery, list_csv_partitions, query_sales
+
+#
+# CUBE LAYOUT
+#
+
+CUBE_PATH = os.path.join(MODULE_DIR, "price_cube.csv")
+# {"{year}_{borough}": source mtime} of the partitions already in the cube
+CUBE_MANIFEST_SUFFIX = ".manifest.json"
+
+KEY_COLUMNS = ["borough", "NEIGHBORHOOD", "BUILDING CLASS CATEGORY", "year"]
+QUANTILES = {"p10": 0.10, "p25": 0.25, "median": 0.50, "p75": 0.75, "p90": 0.90}
+STAT_COLUMNS = (
+    ["count", "mean", "std"] + list(QUANTILES)
+    + ["sqft_count", "mean_price_per_sqft", "median_price_per_sqft"]
+)
+
+#
+# ONE-PASS AGGREGATION
+#
+
+def _sorted_group_quantiles(codes, values, num_groups, quantiles):
+    """
+    Linear-interpolated quantiles (pandas' default) of values within each
+    group, from a single lexsort instead of one groupby pass per quantile.
+    Returns (counts, {name: per-group array}); empty groups get NaN.
+    """
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    out = {}
+    with np.errstate(invalid='ignore'):
+        for name, q in quantiles.items():
+            pos = q*(counts - 1)
+            lo = np.floor(pos).astype(np.int64)
+            frac = pos - lo
+            hi = np.minimum(lo + 1, counts - 1)
+            lo_idx = np.clip(starts + lo, 0, max(len(sorted_values) - 1, 0))
+            hi_idx = np.clip(starts + hi, 0, max(len(sorted_values) - 1, 0))
+            if len(sorted_values):
+                result = sorted_values[lo_idx]*(1 - frac) + sorted_values[hi_idx]*frac
+            else:
+                result = np.zeros(num_groups)
+            out[name] = np.where(counts > 0, result, np.nan)
+    return counts, out
+
+def aggregate_sales(df):
+    """
+    Cube rows for a frame of sales with positive SALE PRICE: every statistic
+    per (borough, NEIGHBORHOOD, BUILDING CLASS CATEGORY, year), computed from
+    one factorization of the keys and one sort per measure.
+    """
+    if not len(df):
+        return pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+    keys = df[KEY_COLUMNS].astype({"NEIGHBORHOOD": "string", "BUILDING CLASS CATEGORY": "string"}).fillna({"NEIGHBORHOOD": "", "BUILDING CLASS CATEGORY": ""})
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    num_groups = len(uniques)
+    prices = df["SALE PRICE"].to_numpy(dtype=float)
+
+    counts, price_quantiles = _sorted_group_quantiles(codes, prices, num_groups, QUANTILES)
+    sums = np.bincount(codes, weights=prices, minlength=num_groups)
+    sums_sq = np.bincount(codes, weights=prices*prices, minlength=num_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums/counts
+        var = (sums_sq - counts*mean*mean)/(counts - 1)
+    std = np.where(counts > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+    sqft = df["GROSS SQUARE FEET"].to_numpy(dtype=float)
+    has_sqft = sqft > 0
+    ppsf = prices[has_sqft]/sqft[has_sqft]
+    sqft_counts, ppsf_quantiles = _sorted_group_quantiles(codes[has_sqft], ppsf, num_groups, {"median": 0.5})
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_ppsf = np.bincount(codes[has_sqft], weights=ppsf, minlength=num_groups)/sqft_counts
+
+    cube = uniques.to_frame(index=False, name=KEY_COLUMNS)
+    cube["count"] = counts
+    cube["mean"] = mean
+    cube["std"] = std
+    for name in QUANTILES:
+        cube[name] = price_quantiles[name]
+    cube["sqft_count"] = sqft_counts
+    cube["mean_price_per_sqft"] = mean_ppsf
+    cube["median_price_per_sqft"] = ppsf_quantiles["median"]
+    return cube
+
+def partition_sales(year, borough, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """Positive-price sales of one {year}_{borough} file, with borough and year key columns."""
+    query = SalesQuery(
+        start_date=f"{year}-01-01",
+        end_date=f"{year}-12-31",
+        boroughs=[borough],
+        ranges={"SALE PRICE": (1, None)},
+        columns=["NEIGHBORHOOD", "BUILDING CLASS CATEGORY", "GROSS SQUARE FEET", "SALE PRICE", "SALE DATE"],
+    )
+    df = query_sales(query, store_dir=store_dir, csv_dir=csv_dir)
+    df["borough"] = borough
+    df["year"] = year
+    return df
+
+#
+# PERSISTED CUBE
+#
+
+class PriceCube:
+    """
+    Materialized sale price statistics keyed by (borough, NEIGHBORHOOD,
+    BUILDING CLASS CATEGORY, year). The table is indexed on its keys so
+    lookups are index slices rather than scans of the sales data.
+    """
+    def __init__(self, table):
+        table = table.copy()
+        table["NEIGHBORHOOD"] = table["NEIGHBORHOOD"].astype(str)
+        table["BUILDING CLASS CATEGORY"] = table["BUILDING CLASS CATEGORY"].astype(str)
+        table["year"] = table["year"].astype(int)
+        self.table = table.set_index(KEY_COLUMNS).sort_index()
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        text_keys = {"borough": str, "NEIGHBORHOOD": str, "BUILDING CLASS CATEGORY": str}
+        return cls(pd.read_csv(path, dtype=text_keys, keep_default_na=False,
+                               na_values={col: [""] for col in STAT_COLUMNS}, float_precision="round_trip"))
+
+    def save(self, path=CUBE_PATH):
+        tmp_path = path + ".tmp"
+        self.table.reset_index().to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def lookup(self, neighborhood=None, building_class_contains=None, borough=None, years=None):
+        """
+        Rows matching the given keys; neighborhood is matched case-insensitively
+        and building_class_contains as a case-insensitive substring.
+        """
+        table = self.table
+        if borough is not None:
+            table = table.xs(borough, level="borough", drop_level=False)
+        if neighborhood is not None:
+            names = table.index.get_level_values("NEIGHBORHOOD")
+            table = table[names.str.lower() == neighborhood.strip().lower()]
+        if building_class_contains is not None:
+            classes = table.index.get_level_values("BUILDING CLASS CATEGORY")
+            table = table[classes.str.lower().str.contains(building_class_contains.lower(), regex=False)]
+        if years is not None:
+            table = table[table.index.get_level_values("year").isin(list(years))]
+        return table
+
+    def yearly(self, stat, **keys):
+        """
+        One statistic by year and neighborhood (the shape of the notebook's
+        groupby(...).unstack(0)), for a single building class or neighborhood
+        combination. Rolling several classes together is only exact for count
+        and mean, so other statistics require keys that select one group per
+        year and neighborhood.
+        """
+        rows = self.lookup(**keys)
+        frame = rows[stat].reset_index()
+        duplicated = frame.duplicated(["NEIGHBORHOOD", "year"]).any()
+        if duplicated and stat not in ("count", "mean"):
+            raise ValueError(f"{stat} cannot be combined across groups; narrow the lookup to one building class per neighborhood")
+        if stat == "count":
+            return frame.pivot_table(index="year", columns="NEIGHBORHOOD", values=stat, aggfunc="sum")
+        if stat == "mean":
+            weights = rows["count"].reset_index(drop=True)
+            frame["weighted"] = frame[stat]*weights
+            frame["count"] = weights
+            summed = frame.groupby(["year", "NEIGHBORHOOD"])[["weighted", "count"]].sum()
+            return (summed["weighted"]/summed["count"]).unstack("NEIGHBORHOOD")
+        return frame.pivot(index="year", columns="NEIGHBORHOOD", values=stat)
+
+def build_cube(csv_dir=CSV_DIR, store_dir=STORE_DIR, cube_path=CUBE_PATH, force=False):
+    """
+    Builds or updates the cube at cube_path. Each (year, borough) file feeds
+    a disjoint set of cube rows, so only partitions that are new or whose CSV
+    changed since the last build are aggregated; their old rows are replaced
+    and the rest of the cube is kept as is.
+    Returns (PriceCube, number of partitions aggregated).
+    """
+    manifest_path = cube_path + CUBE_MANIFEST_SUFFIX
+    manifest = {}
+    existing = None
+    if not force and os.path.exists(cube_path) and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        existing = PriceCube.load(cube_path).table.reset_index()
+
+    partitions = list_csv_partitions(csv_dir)
+    stale = [(year, borough, path) for year, borough, path in partitions
+             if manifest.get(f"{year}_{borough}") != os.path.getmtime(path)]
+    current = {f"{year}_{borough}" for year, borough, _ in partitions}
+
+    pieces = []
+    if existing is not None:
+        stale_keys = {(year, borough) for year, borough, _ in stale}
+        partition_keys = pd.Series(list(zip(existing["year"], existing["borough"])), index=existing.index)
+        keep = ~partition_keys.isin(stale_keys) & (existing["year"].astype(str) + "_" + existing["borough"]).isin(current)
+        pieces.append(existing[keep])
+    for year, borough, path in stale:
+        pieces.append(aggregate_sales(partition_sales(year, borough, csv_dir, store_dir)))
+        manifest[f"{year}_{borough}"] = os.path.getmtime(path)
+    manifest = {key: mtime for key, mtime in manifest.items() if key in current}
+
+    pieces = [piece for piece in pieces if len(piece)]
+    table = pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+    cube = PriceCube(table)
+    cube.save(cube_path)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return cube, len(stale)
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the neighborhood-by-year price cube.")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--cube", default=CUBE_PATH)
+    parser.add_argument("--force", action="store_true", help="rebuild every partition")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cube, aggregated = build_cube(args.csv_dir, args.store_dir, args.cube, force=args.force)
+    print(f"Aggregated {aggregated} partitions into {len(cube.table)} cube rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    medians = cube.yearly("median", neighborhood="Forest Hills", building_class_contains="10 COOPS")
+    print(f"Forest Hills co-op medians looked up in {1000*(time.perf_counter() - start):.1f}ms")
+    print(medians)
+
+if __name__ == "__main__":
+    main()
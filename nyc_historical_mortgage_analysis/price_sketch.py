@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_cube import KEY_COLUMNS, partition_sales
+from sales_store import CSV_DIR, MODULE_DIR, STORE_DIR, list_csv_partitions
+
+#
+# SKETCH
+#
+# Log-bucketed quantile sketch (the DDSketch construction): a positive value
+# x falls in bucket ceil(log(x)/log(gamma)) with gamma = (1+a)/(1-a), so
+# every value in a bucket is within relative error a of the bucket's
+# midpoint. Merging two sketches just adds their bucket counts, so rollups
+# are exact merges with the same error bound as the parts.
+#
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+SKETCH_PATH = os.path.join(MODULE_DIR, "price_sketches.npz")
+
+class PriceSketch:
+    """
+    Mergeable sketch of a set of positive prices.
+      - keys: sorted bucket indices, counts: number of values in each
+    quantile(q) is within relative_accuracy of a true q-quantile of the
+    values (nearest-rank, i.e. an actual data point, not an interpolation).
+    """
+    __slots__ = ("relative_accuracy", "keys", "counts")
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, keys=None, counts=None):
+        self.relative_accuracy = relative_accuracy
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else np.asarray(keys, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+
+    @property
+    def gamma(self):
+        return (1 + self.relative_accuracy)/(1 - self.relative_accuracy)
+
+    @classmethod
+    def from_values(cls, values, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        values = np.asarray(values, dtype=float)
+        values = values[values > 0]
+        sketch = cls(relative_accuracy)
+        buckets = np.ceil(np.log(values)/np.log(sketch.gamma)).astype(np.int64)
+        sketch.keys, sketch.counts = np.unique(buckets, return_counts=True)
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        """One sketch of the union of the sketches' values."""
+        sketches = list(sketches)
+        if any(s.relative_accuracy != relative_accuracy for s in sketches):
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        if not sketches:
+            return cls(relative_accuracy)
+        keys = np.concatenate([s.keys for s in sketches])
+        counts = np.concatenate([s.counts for s in sketches])
+        merged_keys, inverse = np.unique(keys, return_inverse=True)
+        return cls(relative_accuracy, merged_keys, np.bincount(inverse, weights=counts).astype(np.int64))
+
+    def __add__(self, other):
+        return PriceSketch.merged([self, other], self.relative_accuracy)
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantiles(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if not len(self.keys):
+            return np.full(qs.shape, np.nan)
+        ranks = np.floor(qs*(self.count - 1))
+        bucket = np.searchsorted(np.cumsum(self.counts), ranks, side='right')
+        return 2*self.gamma**self.keys[bucket]/(self.gamma + 1)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+#
+# PER-GROUP SKETCHES
+#
+
+class SketchIndex:
+    """
+    One PriceSketch per (borough, NEIGHBORHOOD, BUILDING CLASS CATEGORY,
+    year) group, held as flat arrays (group i owns keys/counts
+    [offsets[i]:offsets[i+1]]) so a rollup over any subset of groups is a
+    mask plus one bincount.
+    """
+    def __init__(self, groups, offsets, keys, counts, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.groups = groups.reset_index(drop=True)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.relative_accuracy = relative_accuracy
+
+    @classmethod
+    def from_sketches(cls, groups, sketches, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        sizes = [len(s.keys) for s in sketches]
+        offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        keys = np.concatenate([s.keys for s in sketches]) if sketches else np.empty(0, dtype=np.int64)
+        counts = np.concatenate([s.counts for s in sketches]) if sketches else np.empty(0, dtype=np.int64)
+        return cls(groups, offsets, keys, counts, relative_accuracy)
+
+    def sketch(self, i):
+        lo, hi = self.offsets[i], self.offsets[i+1]
+        return PriceSketch(self.relative_accuracy, self.keys[lo:hi], self.counts[lo:hi])
+
+    def select(self, neighborhoods=None, building_class_contains=None, boroughs=None, years=None):
+        """Boolean mask of the groups matching every given filter."""
+        keep = np.ones(len(self.groups), dtype=bool)
+        if neighborhoods is not None:
+            wanted = {n.strip().lower() for n in neighborhoods}
+            keep &= self.groups["NEIGHBORHOOD"].str.lower().isin(wanted).to_numpy()
+        if building_class_contains is not None:
+            keep &= self.groups["BUILDING CLASS CATEGORY"].str.lower().str.contains(building_class_contains.lower(), regex=False).to_numpy()
+        if boroughs is not None:
+            keep &= self.groups["borough"].isin(list(boroughs)).to_numpy()
+        if years is not None:
+            keep &= self.groups["year"].isin(list(years)).to_numpy()
+        return keep
+
+    def rollup(self, **filters):
+        """Merged sketch of every group matching the filters of select()."""
+        selected = np.flatnonzero(self.select(**filters))
+        sizes = self.offsets[selected + 1] - self.offsets[selected]
+        if not sizes.sum():
+            return PriceSketch(self.relative_accuracy)
+        idx = np.repeat(self.offsets[selected] - np.concatenate(([0], np.cumsum(sizes)[:-1])), sizes) + np.arange(sizes.sum())
+        merged_keys, inverse = np.unique(self.keys[idx], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.counts[idx]).astype(np.int64)
+        return PriceSketch(self.relative_accuracy, merged_keys, counts)
+
+    def save(self, path=SKETCH_PATH, manifest=None):
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            offsets=self.offsets,
+            keys=self.keys,
+            counts=self.counts,
+            relative_accuracy=self.relative_accuracy,
+            manifest=json.dumps(manifest or {}),
+            **{f"group_{col}": self.groups[col].to_numpy(dtype=str if col != "year" else np.int64) for col in KEY_COLUMNS},
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SKETCH_PATH):
+        """Returns (SketchIndex, manifest of the partitions it was built from)."""
+        with np.load(path) as data:
+            groups = pd.DataFrame({col: data[f"group_{col}"] for col in KEY_COLUMNS})
+            index = cls(groups, data["offsets"], data["keys"], data["counts"], float(data["relative_accuracy"]))
+            manifest = json.loads(str(data["manifest"]))
+        return index, manifest
+
+def sketch_groups(df, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """(groups frame, [PriceSketch]) for a frame of sales with KEY_COLUMNS and SALE PRICE."""
+    keys = df[KEY_COLUMNS].astype({"NEIGHBORHOOD": "string", "BUILDING CLASS CATEGORY": "string"}).fillna({"NEIGHBORHOOD": "", "BUILDING CLASS CATEGORY": ""})
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    prices = df["SALE PRICE"].to_numpy(dtype=float)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    sketches = [PriceSketch.from_values(prices[order[bounds[i]:bounds[i+1]]], relative_accuracy) for i in range(len(uniques))]
+    return uniques.to_frame(index=False, name=KEY_COLUMNS), sketches
+
+def build_sketches(csv_dir=CSV_DIR, store_dir=STORE_DIR, sketch_path=SKETCH_PATH, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, force=False):
+    """
+    Builds or updates the per-group sketches at sketch_path during a single
+    ingest of the sales files. Like build_cube, only {year}_{borough} files
+    that are new or changed since the last build are read.
+    Returns (SketchIndex, number of partitions read).
+    """
+    manifest = {}
+    kept_groups, kept_sketches = [], []
+    if not force and os.path.exists(sketch_path):
+        existing, manifest = SketchIndex.load(sketch_path)
+        if existing.relative_accuracy != relative_accuracy:
+            existing, manifest = None, {}
+    else:
+        existing = None
+
+    partitions = list_csv_partitions(csv_dir)
+    current = {f"{year}_{borough}" for year, borough, _ in partitions}
+    stale = [(year, borough, path) for year, borough, path in partitions
+             if manifest.get(f"{year}_{borough}") != os.path.getmtime(path)]
+    if existing is not None:
+        stale_keys = {f"{year}_{borough}" for year, borough, _ in stale}
+        group_partition = existing.groups["year"].astype(str) + "_" + existing.groups["borough"]
+        keep = np.flatnonzero(~group_partition.isin(stale_keys) & group_partition.isin(current))
+        kept_groups.append(existing.groups.iloc[keep])
+        kept_sketches += [existing.sketch(i) for i in keep]
+
+    for year, borough, path in stale:
+        groups, sketches = sketch_groups(partition_sales(year, borough, csv_dir, store_dir), relative_accuracy)
+        kept_groups.append(groups)
+        kept_sketches += sketches
+        manifest[f"{year}_{borough}"] = os.path.getmtime(path)
+    manifest = {key: mtime for key, mtime in manifest.items() if key in current}
+
+    groups = pd.concat(kept_groups, ignore_index=True) if kept_groups else pd.DataFrame(columns=KEY_COLUMNS)
+    index = SketchIndex.from_sketches(groups, kept_sketches, relative_accuracy)
+    index.save(sketch_path, manifest)
+    return index, len(stale)
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update mergeable sale price sketches.")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--sketches", default=SKETCH_PATH)
+    parser.add_argument("--relative-accuracy", type=float, default=DEFAULT_RELATIVE_ACCURACY)
+    parser.add_argument("--force", action="store_true", help="rebuild every partition")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index, read = build_sketches(args.csv_dir, args.store_dir, args.sketches, args.relative_accuracy, force=args.force)
+    print(f"Sketched {read} partitions into {len(index.groups)} groups in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    sketch = index.rollup(building_class_contains="coop", boroughs=["queens"])
+    p10, median, p90 = sketch.quantiles([0.1, 0.5, 0.9])
+    print(f"Queens co-ops, all years ({sketch.count} sales): p10={p10:,.0f} median={median:,.0f} p90={p90:,.0f} "
+          f"in {1000*(time.perf_counter() - start):.1f}ms")
+
+if __name__ == "__main__":
+    main()
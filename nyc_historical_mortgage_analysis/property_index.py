@@ -0,0 +1,217 @@
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from sales_store import CSV_DIR, MODULE_DIR, STORE_DIR, SalesQuery, query_sales
+
+#
+# KEYS
+#
+
+INDEX_PATH = os.path.join(MODULE_DIR, "property_index.npz")
+
+# Street types spelled both ways across the files => one spelling
+STREET_ABBREVIATIONS = {
+    "STREET": "ST", "STR": "ST",
+    "AVENUE": "AVE", "AV": "AVE",
+    "ROAD": "RD",
+    "PLACE": "PL",
+    "DRIVE": "DR",
+    "BOULEVARD": "BLVD",
+    "PARKWAY": "PKWY",
+    "LANE": "LN",
+    "COURT": "CT",
+    "TERRACE": "TER",
+    "EAST": "E", "WEST": "W", "NORTH": "N", "SOUTH": "S",
+}
+UNIT_PREFIX_PATTERN = re.compile(r"^(APT\.?|APARTMENT|UNIT|#)\s*")
+ORDINAL_PATTERN = re.compile(r"\b(\d+)(ST|ND|RD|TH)\b")
+
+RECORD_COLUMNS = ["bbl", "unit", "address", "SALE DATE", "SALE PRICE", "GROSS SQUARE FEET", "NEIGHBORHOOD", "BUILDING CLASS CATEGORY"]
+
+def make_bbl(borough, block, lot):
+    """NYC borough-block-lot as one integer: B BBBBB LLLL."""
+    return np.asarray(borough, dtype=np.int64)*1_000_000_000 + np.asarray(block, dtype=np.int64)*10_000 + np.asarray(lot, dtype=np.int64)
+
+def normalize_unit(unit):
+    if unit is None or pd.isna(unit):
+        return ""
+    unit = " ".join(str(unit).upper().split())
+    return UNIT_PREFIX_PATTERN.sub("", unit).replace(" ", "")
+
+def normalize_address(address):
+    """
+    Canonical street address: upper case, single spaces, no unit suffix,
+    ordinals without their suffix ("81ST" => "81") and street types
+    abbreviated, so the spellings used by different years line up.
+    """
+    if address is None or pd.isna(address):
+        return ""
+    address = str(address).upper().split(",")[0]
+    address = ORDINAL_PATTERN.sub(r"\1", address)
+    words = [STREET_ABBREVIATIONS.get(word, word) for word in address.replace(".", " ").split()]
+    return " ".join(words)
+
+def _split_units(addresses, units):
+    """Unit from APARTMENT NUMBER, else from an "ADDRESS, UNIT" suffix."""
+    out = []
+    for address, unit in zip(addresses, units):
+        unit = normalize_unit(unit)
+        if not unit and isinstance(address, str) and "," in address:
+            unit = normalize_unit(address.split(",", 1)[1])
+        out.append(unit)
+    return out
+
+#
+# INDEX
+#
+
+class PropertyIndex:
+    """
+    Every sale record, sorted by (bbl, unit, SALE DATE), with a second
+    ordering by (address, unit). Both lookups are binary searches over
+    sorted arrays, so fetching a property's history costs microseconds.
+    """
+    def __init__(self, records, address_order):
+        self.records = records.reset_index(drop=True)
+        self.address_order = np.asarray(address_order, dtype=np.int64)
+        self._bbl = self.records["bbl"].to_numpy(dtype=np.int64)
+        self._units = self.records["unit"].to_numpy(dtype=str)
+        self._sorted_addresses = self.records["address"].to_numpy(dtype=str)[self.address_order]
+
+    @classmethod
+    def from_sales(cls, sales):
+        """Builds the index from sales with BOROUGH, BLOCK, LOT, ADDRESS, APARTMENT NUMBER and the RECORD_COLUMNS values."""
+        sales = sales.dropna(subset=["BOROUGH", "BLOCK", "LOT"])
+        records = pd.DataFrame({
+            "bbl": make_bbl(sales["BOROUGH"], sales["BLOCK"], sales["LOT"]),
+            "unit": _split_units(sales["ADDRESS"], sales["APARTMENT NUMBER"]),
+            "address": [normalize_address(a) for a in sales["ADDRESS"]],
+            "SALE DATE": sales["SALE DATE"].to_numpy(),
+            "SALE PRICE": sales["SALE PRICE"].to_numpy(dtype=float),
+            "GROSS SQUARE FEET": sales["GROSS SQUARE FEET"].to_numpy(dtype=float),
+            "NEIGHBORHOOD": sales["NEIGHBORHOOD"].astype(str).to_numpy(),
+            "BUILDING CLASS CATEGORY": sales["BUILDING CLASS CATEGORY"].astype(str).to_numpy(),
+        })
+        # the same sale is sometimes listed twice
+        records = records.drop_duplicates(["bbl", "unit", "SALE DATE", "SALE PRICE"])
+        records = records.sort_values(["bbl", "unit", "SALE DATE"], kind='stable').reset_index(drop=True)
+        address_order = np.lexsort((records["unit"].to_numpy(dtype=str), records["address"].to_numpy(dtype=str)))
+        return cls(records, address_order)
+
+    def _unit_rows(self, rows, unit):
+        if unit is None:
+            return rows
+        return rows[self._units[rows] == normalize_unit(unit)]
+
+    def history_by_bbl(self, borough, block, lot, unit=None):
+        """Sales of one lot (and unit, if given) in date order."""
+        bbl = int(make_bbl(borough, block, lot))
+        lo, hi = np.searchsorted(self._bbl, [bbl, bbl + 1])
+        return self.records.iloc[self._unit_rows(np.arange(lo, hi), unit)]
+
+    def history_by_address(self, address, unit=None):
+        """Sales at one street address (and unit, if given) in date order."""
+        key = normalize_address(address)
+        lo = np.searchsorted(self._sorted_addresses, key, side='left')
+        hi = np.searchsorted(self._sorted_addresses, key, side='right')
+        rows = np.sort(self.address_order[lo:hi])
+        return self.records.iloc[self._unit_rows(rows, unit)]
+
+    def repeat_sales(self, min_price=10_000, min_days=180):
+        """
+        Consecutive pairs of sales of the same (bbl, unit): one row per pair
+        with the first and second date and price. Sales under min_price
+        (transfers for nominal amounts) are ignored, and pairs less than
+        min_days apart are dropped as likely flips or re-recordings.
+        """
+        sales = self.records[self.records["SALE PRICE"] >= min_price]
+        bbl = sales["bbl"].to_numpy()
+        unit = sales["unit"].to_numpy()
+        dates = sales["SALE DATE"].to_numpy()
+        prices = sales["SALE PRICE"].to_numpy()
+        same = (bbl[1:] == bbl[:-1]) & (unit[1:] == unit[:-1])
+        first = np.flatnonzero(same)
+        second = first + 1
+        days = (dates[second] - dates[first])/np.timedelta64(1, 'D')
+        keep = days >= min_days
+        first, second = first[keep], second[keep]
+        pairs = pd.DataFrame({
+            "bbl": bbl[first],
+            "unit": unit[first],
+            "address": sales["address"].to_numpy()[first],
+            "NEIGHBORHOOD": sales["NEIGHBORHOOD"].to_numpy()[second],
+            "BUILDING CLASS CATEGORY": sales["BUILDING CLASS CATEGORY"].to_numpy()[second],
+            "first_date": dates[first],
+            "first_price": prices[first],
+            "second_date": dates[second],
+            "second_price": prices[second],
+        })
+        return pairs
+
+    def save(self, path=INDEX_PATH):
+        tmp_path = path + ".tmp.npz"
+        columns = {}
+        for col in RECORD_COLUMNS:
+            values = self.records[col]
+            if col == "SALE DATE":
+                columns[col] = values.to_numpy(dtype="datetime64[D]")
+            elif values.dtype.kind in "if":
+                columns[col] = values.to_numpy()
+            else:
+                columns[col] = values.to_numpy(dtype=str)
+        np.savez_compressed(tmp_path, address_order=self.address_order, **columns)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as data:
+            records = pd.DataFrame({col: data[col] for col in RECORD_COLUMNS})
+            address_order = data["address_order"]
+        return cls(records, address_order)
+
+def build_index(csv_dir=CSV_DIR, store_dir=STORE_DIR, index_path=INDEX_PATH):
+    """Reads the key and price columns of every sale once and saves a PropertyIndex at index_path."""
+    query = SalesQuery(columns=[
+        "BOROUGH", "BLOCK", "LOT", "ADDRESS", "APARTMENT NUMBER", "SALE DATE", "SALE PRICE",
+        "GROSS SQUARE FEET", "NEIGHBORHOOD", "BUILDING CLASS CATEGORY",
+    ])
+    index = PropertyIndex.from_sales(query_sales(query, store_dir=store_dir, csv_dir=csv_dir))
+    index.save(index_path)
+    return index
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the BBL/address index over NYC sales and look up a property.")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if the index file exists")
+    parser.add_argument("--address", default="327 EAST 3RD STREET", help="address to look up")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.rebuild or not os.path.exists(args.index):
+        index = build_index(args.csv_dir, args.store_dir, args.index)
+    else:
+        index = PropertyIndex.load(args.index)
+    print(f"Index of {len(index.records)} sales ready in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    history = index.history_by_address(args.address)
+    print(f"{len(history)} sales at {args.address} found in {1e6*(time.perf_counter() - start):.0f}us")
+    print(history[["bbl", "unit", "SALE DATE", "SALE PRICE"]].to_string(index=False))
+
+    start = time.perf_counter()
+    pairs = index.repeat_sales()
+    print(f"{len(pairs)} repeat-sale pairs in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,194 @@
-import pandas as pd
+import argparse
+import hashlib
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def find_header_row(file_path):
-    # Try reading only the first few rows of the file
-    try:
-        df = pd.read_excel(file_path, nrows=10)  # Adjust the number of rows as needed
-        for i, row in df.iterrows():
-            if 'BOROUGH' in row.values or 'BOROUGH\n' in row.values:  # Check for a key column name
-                return i + 1
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
+import pandas as pd
+
+# Directory containing your files
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+raw_data_dir_path = os.path.join(MODULE_DIR, 'mortgage_data_raw')
+csv_dir_path = os.path.join(MODULE_DIR, 'mortgage_data_csv')
+
+pattern = r"(\d{4})_(queens|manhattan|bronx|brooklyn|si)\.xlsx?$"
+
+# Written next to the CSVs: {workbook filename: {"sha256", "mtime", "size", "csv"}}
+MANIFEST_NAME = '.manifest.json'
+
+# Rows searched for the header before giving up
+HEADER_SEARCH_ROWS = 10
+
+#
+# CONVERSION
+#
+
+def find_header_row(raw):
+    """
+    Index of the row holding the column names in a workbook read with
+    header=None, or None if no BOROUGH column shows up in the first rows.
+    """
+    for i in range(min(HEADER_SEARCH_ROWS, len(raw))):
+        values = [str(v).strip() for v in raw.iloc[i].values]
+        if 'BOROUGH' in values:
+            return i
     return None
 
 def read_data(file_path):
-    header_row = find_header_row(file_path)
-    if header_row is not None:
-        df = pd.read_excel(file_path, header=header_row)
-        return df
-    else:
+    """
+    Reads a workbook once and returns its sales table with cleaned column
+    names, or None if the header cannot be found.
+    """
+    raw = pd.read_excel(file_path, header=None)
+    header_row = find_header_row(raw)
+    if header_row is None:
         print(f"Header not found in {file_path}")
         return None
+    df = raw.iloc[header_row+1:].reset_index(drop=True)
+    df.columns = [str(col).replace('\n', '').strip() for col in raw.iloc[header_row].values]
+    return df.infer_objects()
 
-# Directory containing your files
-raw_data_dir_path = r'.\nyc_historical_mortgage_analysis\mortgage_data_raw'
-csv_dir_path = r".\nyc_historical_mortgage_analysis\mortgage_data_csv"
+def write_csv_atomic(df, csv_file_path):
+    """Writes to a temporary file and renames it, so an interrupted run never leaves a partial CSV."""
+    tmp_path = csv_file_path + '.tmp'
+    try:
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-pattern = r"(\d{4})_(queens|manhattan|bronx|brooklyn|si)\.xls"
+def convert_file(file_path, csv_file_path):
+    """
+    Converts one workbook to CSV. Runs in a worker process; returns the
+    number of rows written, or None if the workbook had no header.
+    """
+    df = read_data(file_path)
+    if df is None:
+        return None
+    df['SALE DATE'] = pd.to_datetime(df['SALE DATE'])
+    write_csv_atomic(df, csv_file_path)
+    return len(df)
 
-for filename in os.listdir(raw_data_dir_path):
-    if (filename.endswith('.xls') or filename.endswith('.xlsx')) and re.match(pattern, filename):
-        file_path = os.path.join(raw_data_dir_path, filename)
-        # Define the CSV file name (same as original but with .csv)
-        base_name, _ = os.path.splitext(filename)
-        csv_filename = base_name + '.csv'
-        csv_file_path = os.path.join(csv_dir_path, csv_filename)
-        if os.path.exists(csv_file_path):
+#
+# MANIFEST
+#
+
+def file_sha256(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(csv_dir):
+    manifest_path = os.path.join(csv_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, csv_dir):
+    manifest_path = os.path.join(csv_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def plan_conversions(raw_dir, csv_dir, manifest):
+    """
+    Returns [(filename, file_path, csv_file_path, fingerprint)] for workbooks
+    that are new, changed, or whose CSV is missing.
+
+    A workbook whose size and mtime match the manifest is skipped without
+    being read. Otherwise its content hash decides: an identical hash (e.g.
+    the file was only touched or re-copied) just refreshes the manifest entry.
+    """
+    todo = []
+    for filename in sorted(os.listdir(raw_dir)):
+        if not re.match(pattern, filename):
             continue
-        print(file_path)
-        df = read_data(file_path)  # Assuming read_data returns a cleaned DataFrame
-        df.columns = [col.replace('\n', '').strip() for col in df.columns]
-        if df is not None:
-            df['SALE DATE'] = pd.to_datetime(df['SALE DATE'])
-
-            # Save the DataFrame to a CSV file
-            df.to_csv(csv_file_path, index=False)
-            print(f"Saved to {csv_file_path}")
+        file_path = os.path.join(raw_dir, filename)
+        base_name, _ = os.path.splitext(filename)
+        csv_file_path = os.path.join(csv_dir, base_name + '.csv')
+        stat = os.stat(file_path)
+        entry = manifest.get(filename)
+        if entry is not None and os.path.exists(csv_file_path):
+            if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                continue
+            sha256 = file_sha256(file_path)
+            if entry['sha256'] == sha256:
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)
+                continue
+        else:
+            sha256 = file_sha256(file_path)
+        fingerprint = {'sha256': sha256, 'mtime': stat.st_mtime, 'size': stat.st_size, 'csv': os.path.basename(csv_file_path)}
+        todo.append((filename, file_path, csv_file_path, fingerprint))
+    return todo
+
+#
+# PIPELINE
+#
+
+def convert_all(raw_dir=raw_data_dir_path, csv_dir=csv_dir_path, max_workers=None, force=False):
+    """
+    Converts new or changed workbooks in raw_dir to CSVs in csv_dir across a
+    process pool, recording each finished file in the manifest as soon as it
+    is written so an interrupted run resumes where it stopped.
+    max_workers : None => one worker per CPU, 1 => run in this process
+    Returns the number of files converted.
+    """
+    os.makedirs(csv_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(csv_dir)
+    todo = plan_conversions(raw_dir, csv_dir, manifest)
+    save_manifest(manifest, csv_dir)
+    if not todo:
+        print("All CSVs are up to date")
+        return 0
+
+    converted = 0
+
+    def record(filename, csv_file_path, fingerprint, rows):
+        nonlocal converted
+        if rows is None:
+            return
+        manifest[filename] = fingerprint
+        save_manifest(manifest, csv_dir)
+        converted += 1
+        print(f"Saved to {csv_file_path} ({rows} rows)")
+
+    if max_workers == 1:
+        for filename, file_path, csv_file_path, fingerprint in todo:
+            try:
+                rows = convert_file(file_path, csv_file_path)
+            except Exception as e:
+                print(f"Error converting {filename}: {e}")
+                continue
+            record(filename, csv_file_path, fingerprint, rows)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(convert_file, file_path, csv_file_path): (filename, csv_file_path, fingerprint)
+                       for filename, file_path, csv_file_path, fingerprint in todo}
+            for future in as_completed(futures):
+                filename, csv_file_path, fingerprint = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"Error converting {filename}: {e}")
+                    continue
+                record(filename, csv_file_path, fingerprint, rows)
+    return converted
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert new or changed NYC sales workbooks to CSV.")
+    parser.add_argument("--raw-dir", default=raw_data_dir_path)
+    parser.add_argument("--csv-dir", default=csv_dir_path)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and convert every workbook")
+    args = parser.parse_args(argv)
+    converted = convert_all(args.raw_dir, args.csv_dir, max_workers=args.workers, force=args.force)
+    print(f"Converted {converted} files")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
+import argparse
+import os
+import sys
+import time
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+
+# accelerate (the optional numba guard) lives in the repo root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+import accelerate
 
 def pmt(rate, loan_term, pv):
     """
@@ -16,21 +26,33 @@ def pmt(rate, loan_term, pv):
     """
     return (rate * pv) / (1 - (1 + rate) ** -loan_term)
 
-def simulate_rent_vs_buy(
-    monthly_rent,
-    annual_rent_increase,
-    annual_investment_return,
-    downpayment,
-    mortgage_length,
-    mortgage_interest_rate,
-    monthly_maintenance,
-    house_appreciation_rate,
-    monthly_paycheck,
-    annual_raise,
-    house_price,
-    simulation_years
-):
-    months = simulation_years * 12
+def annual_rate_for_month(rate, month):
+    """
+    Annual rate in effect in a given month: rate is either a constant or a
+    path of one rate per simulation year (e.g. repeat_sales_index.annual_appreciation),
+    whose last value carries on past its end.
+    """
+    if np.ndim(rate) == 0:
+        return rate
+    rate = np.asarray(rate, dtype=float)
+    return rate[min((month - 1) // 12, len(rate) - 1)]
+
+#
+# MONTH LOOP
+#
+# Compiled with numba when it is installed (see accelerate.py in the repo
+# root, shared with the cash_flow kernels); otherwise, or with
+# FINANCE_DISABLE_JIT=1, the same function runs as plain Python. It only uses
+# + - * / so both give identical results.
+#
+
+@accelerate.jit
+def _rent_vs_buy_months(months, monthly_rent, annual_rent_increase, annual_investment_return, downpayment, mortgage_months,
+                        mortgage_interest_rate, monthly_maintenance, appreciation, monthly_paycheck, annual_raise, house_price, mortgage_payment):
+    """
+    The simulate_rent_vs_buy recurrences. appreciation[month - 1] is the
+    annual appreciation rate in effect in month (1..months-1).
+    """
     rent = np.zeros(months)
     rent[0] = monthly_rent
     investment_value_rent = np.zeros(months)
@@ -38,7 +60,6 @@ def simulate_rent_vs_buy(
     investment_value_buy = np.zeros(months)
     home_value = np.zeros(months)
     home_value[0] = house_price
-    mortgage_payment = pmt(mortgage_interest_rate / 12, mortgage_length * 12, house_price - downpayment)
     mortgage_balance = np.zeros(months)
     mortgage_balance[0] = house_price - downpayment
     equity = np.zeros(months)
@@ -52,7 +73,7 @@ def simulate_rent_vs_buy(
         rent[month] = rent[month - 1] * (1 + annual_rent_increase / 12)
         investment_value_rent[month] = investment_value_rent[month - 1] * (1 + annual_investment_return / 12) + paycheck[month - 1] - rent[month - 1]
 
-        if month <= mortgage_length * 12:
+        if month <= mortgage_months:
             interest_payment = mortgage_balance[month - 1] * (mortgage_interest_rate / 12)
             principal_payment = mortgage_payment - interest_payment
             mortgage_balance[month] = mortgage_balance[month - 1] - principal_payment
@@ -62,8 +83,8 @@ def simulate_rent_vs_buy(
             equity[month] = home_value[month - 1]
             extra_investment[month] = paycheck[month - 1] - monthly_maintenance
             investment_value_buy[month] = investment_value_buy[month - 1] * (1 + annual_investment_return / 12) + extra_investment[month - 1]
-        
-        home_value[month] = home_value[month - 1] * (1 + house_appreciation_rate / 12)
+
+        home_value[month] = home_value[month - 1] * (1 + appreciation[month - 1] / 12)
 
         if month % 12 == 0:
             paycheck[month] = paycheck[month - 12] * (1 + annual_raise)
@@ -72,7 +93,50 @@ def simulate_rent_vs_buy(
 
         net_worth_rent[month] = investment_value_rent[month]
         net_worth_buy[month] = equity[month] + investment_value_buy[month]
-    
+
+    return rent, investment_value_rent, home_value, mortgage_balance, equity, investment_value_buy, net_worth_rent, net_worth_buy
+
+def _month_loop_inputs(simulation_years, monthly_rent, annual_rent_increase, annual_investment_return, downpayment, mortgage_length,
+                       mortgage_interest_rate, monthly_maintenance, house_appreciation_rate, monthly_paycheck, annual_raise, house_price):
+    """_rent_vs_buy_months arguments, as floats so the compiled loop has a single signature."""
+    months = simulation_years * 12
+    appreciation = np.array([annual_rate_for_month(house_appreciation_rate, month) for month in range(1, months)], dtype=float)
+    mortgage_payment = pmt(mortgage_interest_rate / 12, mortgage_length * 12, house_price - downpayment)
+    return (
+        months, float(monthly_rent), float(annual_rent_increase), float(annual_investment_return), float(downpayment),
+        int(mortgage_length * 12), float(mortgage_interest_rate), float(monthly_maintenance), appreciation,
+        float(monthly_paycheck), float(annual_raise), float(house_price), float(mortgage_payment),
+    )
+
+def simulate_rent_vs_buy(
+    monthly_rent,
+    annual_rent_increase,
+    annual_investment_return,
+    downpayment,
+    mortgage_length,
+    mortgage_interest_rate,
+    monthly_maintenance,
+    house_appreciation_rate,
+    monthly_paycheck,
+    annual_raise,
+    house_price,
+    simulation_years,
+    plot=False
+):
+    """
+    house_appreciation_rate may be a constant annual rate or a path of annual
+    rates, one per simulation year. For many parameter combinations at once
+    use rent_vs_buy_grid. plot=True also draws plot_net_worth(df); showing or
+    saving the figure is up to the caller.
+    """
+    months = simulation_years * 12
+    rent, investment_value_rent, home_value, mortgage_balance, equity, investment_value_buy, net_worth_rent, net_worth_buy = _rent_vs_buy_months(
+        *_month_loop_inputs(
+            simulation_years, monthly_rent, annual_rent_increase, annual_investment_return, downpayment, mortgage_length,
+            mortgage_interest_rate, monthly_maintenance, house_appreciation_rate, monthly_paycheck, annual_raise, house_price,
+        )
+    )
+
     df = pd.DataFrame({
         'Month': np.arange(1, months + 1),
         'Rent': rent,
@@ -85,42 +149,330 @@ def simulate_rent_vs_buy(
         'Net Worth (Buy)': net_worth_buy
     })
 
-    plt.figure(figsize=(12, 8))
-    plt.plot(df['Month'] / 12, df['Net Worth (Rent)'], label='Net Worth (Rent)')
-    plt.plot(df['Month'] / 12, df['Net Worth (Buy)'], label='Net Worth (Buy)')
-    plt.xlabel('Years')
-    plt.ylabel('Net Worth')
-    plt.title('Net Worth Over Time: Renting vs Buying')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    if plot:
+        plot_net_worth(df)
 
     return df
 
-monthly_rent = 3000
-annual_rent_increase = 0.03
-annual_investment_return = 0.07
-downpayment = 90000
-mortgage_length = 15
-mortgage_interest_rate = 0.06
-monthly_maintenance = 1000
-house_appreciation_rate = 0.04
-monthly_paycheck = 3600
-annual_raise = 0.03
-house_price = 450000
-simulation_years = mortgage_length + 30
-
-df = simulate_rent_vs_buy(
-    monthly_rent,
-    annual_rent_increase,
-    annual_investment_return,
-    downpayment,
-    mortgage_length,
-    mortgage_interest_rate,
-    monthly_maintenance,
-    house_appreciation_rate,
-    monthly_paycheck,
-    annual_raise,
-    house_price,
-    simulation_years
-)
+def plot_net_worth(df):
+    """Figure of both net worth columns of simulate_rent_vs_buy by year. Does not call plt.show()."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.plot(df['Month'] / 12, df['Net Worth (Rent)'], label='Net Worth (Rent)')
+    ax.plot(df['Month'] / 12, df['Net Worth (Buy)'], label='Net Worth (Buy)')
+    ax.set_xlabel('Years')
+    ax.set_ylabel('Net Worth')
+    ax.set_title('Net Worth Over Time: Renting vs Buying')
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+def check_parity(simulation_years, house_appreciation_rate=(0.05, -0.02, 0.03, 0.08)):
+    """
+    Max absolute difference of the net worth series between the month loop
+    as run (compiled when accelerate.JIT_ENABLED) and
+      - the uncompiled loop: 0, they are identical
+      - net_worth_paths: rounding only, its closed forms sum in another order
+    for DEFAULT_PARAMETERS with a path of appreciation rates.
+    """
+    parameters = dict(DEFAULT_PARAMETERS, house_appreciation_rate=np.asarray(house_appreciation_rate, dtype=float))
+    inputs = _month_loop_inputs(simulation_years, **parameters)
+    loop = _rent_vs_buy_months(*inputs)[6:]
+    python_loop = accelerate.python_function(_rent_vs_buy_months)(*inputs)[6:]
+    appreciation = inputs[8]
+    paths = net_worth_paths(simulation_years, monthly_appreciation=appreciation / 12,
+                            **{k: v for k, v in parameters.items() if k != "house_appreciation_rate"})
+    return {
+        "uncompiled loop": accelerate.max_difference(loop, python_loop),
+        "net_worth_paths": accelerate.max_difference(loop, tuple(paths)),
+    }
+
+#
+# VECTORIZED OVER PARAMETER COMBINATIONS
+#
+# The same model as simulate_rent_vs_buy with every recurrence in closed
+# form along the month axis. A balance compounding at a per month with
+# deposits f, x[m] = a*x[m-1] + f[m-1], is x[m] = A[m]*(x[0] + sum_{k<m} f[k]/A[k+1])
+# with A = cumprod(a), so each series is one cumprod and one cumsum along
+# the last (month) axis instead of a Python loop per month.
+#
+# Parameters are broadcast rather than expanded: with one array axis per
+# varied parameter, each series is computed over only the axes it depends
+# on (renting never sees the mortgage rate or appreciation axes) and only
+# the final rent vs buy comparison spans the whole grid.
+#
+
+# Scalar parameters of simulate_rent_vs_buy, with the values of the example below
+DEFAULT_PARAMETERS = {
+    "monthly_rent": 3000,
+    "annual_rent_increase": 0.03,
+    "annual_investment_return": 0.07,
+    "downpayment": 90000,
+    "mortgage_length": 15,
+    "mortgage_interest_rate": 0.06,
+    "monthly_maintenance": 1000,
+    "house_appreciation_rate": 0.04,
+    "monthly_paycheck": 3600,
+    "annual_raise": 0.03,
+    "house_price": 450000,
+}
+
+# Grid combinations compared at once; bounds memory to a few arrays of this
+# many rows by the number of months
+GRID_CHUNK_SIZE = 8192
+
+def _growth(factors):
+    """Cumulative product of per-month factors (months 1..) along the last axis, with 1 at month 0."""
+    out = np.ones(factors.shape[:-1] + (factors.shape[-1] + 1,))
+    np.cumprod(factors, axis=-1, out=out[..., 1:])
+    return out
+
+def _compound(factor, months):
+    """factor**m for m in range(months) as a cumulative product along a new last axis."""
+    factor = np.asarray(factor, dtype=float)[..., np.newaxis]
+    return _growth(np.broadcast_to(factor, factor.shape[:-1] + (months - 1,)))
+
+def _accumulate(start, growth, deposits):
+    """x[m] = growth[m]*(start + sum_{k<m} deposits[k]/growth[k+1]) along the last axis."""
+    discounted = deposits[..., :-1]/growth[..., 1:]
+    out = np.zeros(discounted.shape[:-1] + (discounted.shape[-1] + 1,))
+    np.cumsum(discounted, axis=-1, out=out[..., 1:])
+    return growth*(start + out)
+
+def _month_rates(rates, months):
+    rates = np.asarray(rates, dtype=float)
+    if rates.shape[-1:] != (months - 1,):
+        raise ValueError(f"Monthly rate paths need {months - 1} months (1..{months - 1}), got shape {rates.shape}")
+    return rates
+
+def _shifted(values):
+    """values one month later, with 0 in month 0."""
+    out = np.zeros_like(values)
+    out[..., 1:] = values[..., :-1]
+    return out
+
+def net_worth_paths(simulation_years, monthly_investment_returns=None, monthly_appreciation=None, **parameters):
+    """
+    Monthly net worth when renting and when buying for arrays of parameters
+    (names as in simulate_rent_vs_buy, anything missing from DEFAULT_PARAMETERS)
+    that broadcast against each other. house_appreciation_rate must be a
+    constant rate here, not a path.
+      - monthly_investment_returns, monthly_appreciation: optional per-month
+        rates of shape (..., months - 1) for months 1.. (e.g. one row per
+        Monte Carlo path), used instead of annual_investment_return / 12 and
+        house_appreciation_rate / 12
+    Returns (net_worth_rent, net_worth_buy), each of the broadcast shape of
+    the parameters it depends on + (months,) and equal to the matching
+    column of simulate_rent_vs_buy.
+    """
+    unknown = set(parameters) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown rent vs buy parameters: {sorted(unknown)}")
+    p = {name: np.asarray(parameters.get(name, default), dtype=float) for name, default in DEFAULT_PARAMETERS.items()}
+    # the same values as columns, to broadcast against the month axis
+    c = {name: v[..., np.newaxis] for name, v in p.items()}
+    months = simulation_years * 12
+    month = np.arange(months)
+
+    if monthly_investment_returns is None:
+        investment_growth = _compound(1 + p["annual_investment_return"] / 12, months)
+    else:
+        investment_growth = _growth(1 + _month_rates(monthly_investment_returns, months))
+    if monthly_appreciation is None:
+        home_value = c["house_price"]*_compound(1 + p["house_appreciation_rate"] / 12, months)
+    else:
+        home_value = c["house_price"]*_growth(1 + _month_rates(monthly_appreciation, months))
+    rent = c["monthly_rent"]*_compound(1 + p["annual_rent_increase"] / 12, months)
+    paycheck = c["monthly_paycheck"]*_compound(1 + p["annual_raise"], months // 12 + 1)[..., month // 12]
+    net_worth_rent = _accumulate(c["downpayment"], investment_growth, paycheck - rent)
+    net_worth_rent[..., 0] = 0.0
+
+    mortgage_months = c["mortgage_length"] * 12
+    monthly_rate = c["mortgage_interest_rate"] / 12
+    principal = c["house_price"] - c["downpayment"]
+    mortgage_payment = pmt(monthly_rate, mortgage_months, principal)
+    rate_growth = _compound(1 + p["mortgage_interest_rate"] / 12, months)
+    in_mortgage = month <= mortgage_months
+    mortgage_balance = np.where(in_mortgage, principal*rate_growth - mortgage_payment*(rate_growth - 1)/monthly_rate, 0.0)
+
+    # equity[m] is valued at last month's home value; equity and net worth at month 0 are left at 0
+    equity = _shifted(home_value) - mortgage_balance
+    equity[..., 0] = 0.0
+    # after the mortgage the paycheck less maintenance is invested, starting a month late
+    extra_investment = np.where(in_mortgage, 0.0, _shifted(paycheck) - c["monthly_maintenance"])
+    net_worth_buy = equity + _accumulate(0.0, investment_growth, extra_investment)
+    return net_worth_rent, net_worth_buy
+
+def breakeven_month(net_worth_rent, net_worth_buy):
+    """
+    Month from which buying stays at or ahead of renting through the last
+    month simulated (along the last axis), nan if renting finishes ahead.
+    """
+    behind = net_worth_buy[..., 1:] < net_worth_rent[..., 1:]
+    months = behind.shape[-1]
+    last_behind = months - np.argmax(behind[..., ::-1], axis=-1)
+    last_behind = np.where(behind.any(axis=-1), last_behind, 0)
+    return np.where(behind[..., -1], np.nan, last_behind + 1.0)
+
+class RentVsBuyGrid:
+    """
+    Outcome of every combination of a parameter grid, one array axis per
+    varied parameter in the order of axes ({parameter: values}):
+      - final_net_worth_rent, final_net_worth_buy => net worth in the last month
+      - breakeven_month => see breakeven_month()
+    """
+    STATS = ("final_net_worth_rent", "final_net_worth_buy", "breakeven_month")
+
+    def __init__(self, axes, final_net_worth_rent, final_net_worth_buy, breakeven_month):
+        self.axes = {name: np.asarray(values) for name, values in axes.items()}
+        self.final_net_worth_rent = final_net_worth_rent
+        self.final_net_worth_buy = final_net_worth_buy
+        self.breakeven_month = breakeven_month
+
+    @property
+    def shape(self):
+        return self.breakeven_month.shape
+
+    @property
+    def breakeven_years(self):
+        return self.breakeven_month / 12
+
+    @property
+    def buy_advantage(self):
+        return self.final_net_worth_buy - self.final_net_worth_rent
+
+    def _index(self, name, value):
+        matches = np.flatnonzero(np.isclose(self.axes[name], value))
+        if not len(matches):
+            raise ValueError(f"{value} is not on the {name} axis {self.axes[name].tolist()}")
+        return matches[0]
+
+    def table(self, stat, rows, columns, **fixed):
+        """
+        2-D slice of a statistic (any of STATS, breakeven_years or
+        buy_advantage) as a DataFrame indexed by the rows axis with the
+        columns axis across. Every other axis needs a value in fixed.
+        """
+        values = getattr(self, stat)
+        missing = set(self.axes) - {rows, columns} - set(fixed)
+        if missing:
+            raise ValueError(f"Fix a value for {sorted(missing)}")
+        index = tuple(slice(None) if name in (rows, columns) else self._index(name, fixed[name]) for name in self.axes)
+        values = values[index]
+        if list(self.axes).index(rows) > list(self.axes).index(columns):
+            values = values.T
+        return pd.DataFrame(values, index=pd.Index(self.axes[rows], name=rows), columns=pd.Index(self.axes[columns], name=columns))
+
+    def to_frame(self):
+        """One row per combination: the parameter values and STATS."""
+        grids = np.meshgrid(*self.axes.values(), indexing='ij')
+        frame = pd.DataFrame({name: g.ravel() for name, g in zip(self.axes, grids)})
+        for stat in self.STATS:
+            frame[stat] = getattr(self, stat).ravel()
+        return frame
+
+def _grid_blocks(shape, chunk_size):
+    """
+    Index tuples (all slices, so blocks keep every axis) cutting an array
+    of the given shape into blocks of about chunk_size elements: whole
+    trailing axes, a run along one axis, and one position on the leading ones.
+    """
+    split = len(shape)
+    while split > 0 and np.prod(shape[split - 1:]) <= chunk_size:
+        split -= 1
+    if split == 0:
+        yield (slice(None),)*len(shape)
+        return
+    step = max(1, chunk_size // int(np.prod(shape[split:])))
+    for lead in np.ndindex(*shape[:split - 1]):
+        for lo in range(0, shape[split - 1], step):
+            yield tuple(slice(i, i + 1) for i in lead) + (slice(lo, lo + step),) + (slice(None),)*(len(shape) - split)
+
+def rent_vs_buy_grid(grid, simulation_years, chunk_size=GRID_CHUNK_SIZE, **fixed):
+    """
+    Simulates every combination of grid ({parameter: values}) with the
+    other parameters from fixed, then DEFAULT_PARAMETERS. Only the summary
+    statistics of each combination are kept, and the full-grid comparison
+    runs chunk_size combinations at a time, so memory stays bounded however
+    large the grid is.
+    Returns a RentVsBuyGrid.
+    """
+    axes = {name: np.asarray(values, dtype=float) for name, values in grid.items()}
+    shape = tuple(len(values) for values in axes.values())
+    # one array axis per grid parameter
+    columns = {name: values.reshape([-1 if i == j else 1 for j in range(len(axes))]) for i, (name, values) in enumerate(axes.items())}
+    final_rent = np.empty(shape)
+    final_buy = np.empty(shape)
+    breakeven = np.empty(shape)
+    for block in _grid_blocks(shape, chunk_size):
+        block_parameters = {**fixed, **{name: values[tuple(s if values.shape[i] > 1 else slice(None) for i, s in enumerate(block))]
+                                        for name, values in columns.items()}}
+        net_worth_rent, net_worth_buy = net_worth_paths(simulation_years, **block_parameters)
+        block_shape = final_rent[block].shape
+        final_rent[block] = np.broadcast_to(net_worth_rent[..., -1], block_shape)
+        final_buy[block] = np.broadcast_to(net_worth_buy[..., -1], block_shape)
+        breakeven[block] = np.broadcast_to(breakeven_month(net_worth_rent, net_worth_buy), block_shape)
+    return RentVsBuyGrid(axes, final_rent, final_buy, breakeven)
+
+def plot_breakeven_heatmap(grid, rows, columns, ax=None, **fixed):
+    """Heatmap of breakeven years over two axes of a RentVsBuyGrid (blank where renting ends ahead)."""
+    import matplotlib.pyplot as plt
+
+    table = grid.table("breakeven_years", rows, columns, **fixed)
+    if ax is None:
+        _, ax = plt.subplots(figsize=(10, 8))
+    mesh = ax.pcolormesh(table.columns, table.index, table.to_numpy(), shading='nearest', cmap='viridis')
+    ax.figure.colorbar(mesh, ax=ax, label='Years until buying stays ahead')
+    ax.set_xlabel(columns)
+    ax.set_ylabel(rows)
+    ax.set_title('Rent vs Buy Breakeven' + ''.join(f'\n{name}={value}' for name, value in fixed.items()))
+    return ax
+
+#
+# EXAMPLE USAGE
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare renting and buying for one scenario or a grid of them.")
+    parser.add_argument("--grid", action="store_true",
+                        help="breakeven over rent growth x appreciation x return x mortgage rate (10^5 combinations)")
+    parser.add_argument("--heatmap", help="with --grid, save a breakeven heatmap to this image file")
+    parser.add_argument("--parity", action="store_true", help="check the compiled, plain Python and vectorized paths agree")
+    args = parser.parse_args(argv)
+    simulation_years = DEFAULT_PARAMETERS["mortgage_length"] + 30
+
+    if args.parity:
+        for name, difference in check_parity(simulation_years).items():
+            print(f"{name}: max abs difference {difference:.2e}")
+        return
+
+    if not args.grid:
+        import matplotlib.pyplot as plt
+
+        simulate_rent_vs_buy(*DEFAULT_PARAMETERS.values(), simulation_years, plot=True)
+        plt.show()
+        return
+
+    grid = {
+        "annual_rent_increase": np.linspace(0.0, 0.06, 50),
+        "house_appreciation_rate": np.linspace(0.0, 0.08, 50),
+        "annual_investment_return": np.linspace(0.03, 0.10, 8),
+        "mortgage_interest_rate": np.linspace(0.03, 0.08, 5),
+    }
+    start = time.perf_counter()
+    result = rent_vs_buy_grid(grid, simulation_years)
+    print(f"{result.breakeven_month.size} combinations x {simulation_years*12} months in {time.perf_counter() - start:.2f}s")
+    print(f"Buying ends ahead in {np.mean(~np.isnan(result.breakeven_month)):.0%} of them")
+
+    if args.heatmap:
+        import matplotlib.pyplot as plt
+
+        fixed = {"annual_investment_return": grid["annual_investment_return"][4], "mortgage_interest_rate": grid["mortgage_interest_rate"][3]}
+        ax = plot_breakeven_heatmap(result, "house_appreciation_rate", "annual_rent_increase", **fixed)
+        ax.figure.savefig(args.heatmap)
+        plt.close(ax.figure)
+        print(f"Saved {args.heatmap}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from price_sketch import DEFAULT_RELATIVE_ACCURACY
+from property_index import INDEX_PATH, PropertyIndex, build_index
+from rent_vs_buy import DEFAULT_PARAMETERS, net_worth_paths
+from repeat_sales_index import monthly_appreciation, repeat_sales_index
+
+#
+# HISTORIES
+#
+
+DEFAULT_NUM_PATHS = 100_000
+CHUNK_PATHS = 5_000
+BLOCK_MONTHS = 12
+BANDS = {"p5": 0.05, "p25": 0.25, "median": 0.50, "p75": 0.75, "p95": 0.95}
+
+def block_bootstrap(rng, history, num_paths, num_months, block_months=BLOCK_MONTHS):
+    """
+    (num_paths x num_months) sequences stitched from randomly chosen runs of
+    block_months consecutive history values, which keeps the short-range
+    autocorrelation (momentum in house prices, volatility clusters in
+    equities) that drawing single months would lose.
+    """
+    history = np.asarray(history, dtype=float)
+    block_months = max(1, min(int(block_months), len(history)))
+    num_blocks = -(-num_months // block_months)
+    starts = rng.integers(0, len(history) - block_months + 1, size=(num_paths, num_blocks))
+    idx = (starts[:, :, None] + np.arange(block_months)).reshape(num_paths, -1)[:, :num_months]
+    return history[idx]
+
+def load_monthly_returns(path):
+    """
+    Monthly returns from a CSV with a date column and either a return column
+    (decimal monthly returns) or a close column (month-end index levels,
+    dividends included for total returns).
+    """
+    df = pd.read_csv(path)
+    columns = {col.lower(): col for col in df.columns}
+    df = df.sort_values(columns["date"]) if "date" in columns else df
+    if "return" in columns:
+        return df[columns["return"]].dropna().to_numpy(dtype=float)
+    if "close" in columns:
+        return df[columns["close"]].pct_change().dropna().to_numpy(dtype=float)
+    raise ValueError(f"{path} needs a 'return' or 'close' column, found {list(df.columns)}")
+
+def synthetic_equity_history(num_months=1200, annual_return=0.07, annual_volatility=0.15, seed=0):
+    """
+    Lognormal monthly returns with the given annual mean and volatility, a
+    stand-in for a real equity history when none is supplied.
+    """
+    sigma = annual_volatility/np.sqrt(12)
+    mu = np.log1p(annual_return)/12 - sigma**2/2
+    return np.expm1(np.random.default_rng(seed).normal(mu, sigma, num_months))
+
+def nyc_appreciation_history(index_path=INDEX_PATH, neighborhood=None, building_class_contains=None, periods_per_year=4):
+    """
+    Monthly NYC price appreciation from a repeat-sales index over the sales
+    data, for all repeat sales or those matching neighborhood
+    (case-insensitive) and building_class_contains (substring).
+    """
+    index = PropertyIndex.load(index_path) if os.path.exists(index_path) else build_index(index_path=index_path)
+    pairs = index.repeat_sales()
+    if neighborhood is not None:
+        pairs = pairs[pairs["NEIGHBORHOOD"].str.lower() == neighborhood.strip().lower()]
+    if building_class_contains is not None:
+        pairs = pairs[pairs["BUILDING CLASS CATEGORY"].str.lower().str.contains(building_class_contains.lower(), regex=False)]
+    if not len(pairs):
+        raise ValueError("No repeat sales match the filters")
+    return monthly_appreciation(repeat_sales_index(pairs, periods_per_year), periods_per_year).to_numpy()
+
+#
+# RUNNING QUANTILES
+#
+
+class RunningQuantiles:
+    """
+    Quantiles of each column of a stream of (rows x num_columns) blocks in
+    fixed memory: one signed log-bucket histogram per column (the
+    price_sketch construction mirrored for negative values, plus a zero
+    bucket for |x| <= min_value). Quantiles are within relative_accuracy of
+    a true sample quantile for |x| between min_value and max_value, and
+    accumulators built from separate chunks merge exactly by adding counts.
+    """
+    def __init__(self, num_columns, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, min_value=1.0, max_value=1e12):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        gamma = (1 + relative_accuracy)/(1 - relative_accuracy)
+        self.log_gamma = np.log(gamma)
+        self.num_keys = int(np.ceil(np.log(max_value/min_value)/self.log_gamma))
+        self.counts = np.zeros((num_columns, 2*self.num_keys + 1), dtype=np.int64)
+        keys = np.arange(-self.num_keys, self.num_keys + 1)
+        self._bucket_values = np.sign(keys)*min_value*2*gamma**np.abs(keys)/(gamma + 1)
+
+    @property
+    def num_columns(self):
+        return self.counts.shape[0]
+
+    @property
+    def count(self):
+        return int(self.counts[0].sum()) if self.num_columns else 0
+
+    def add(self, values):
+        """Adds the rows of a (rows x num_columns) block of finite values."""
+        values = np.asarray(values, dtype=float).reshape(-1, self.num_columns)
+        with np.errstate(divide='ignore'):
+            keys = np.ceil(np.log(np.maximum(np.abs(values), self.min_value)/self.min_value)/self.log_gamma)
+        keys = np.minimum(keys, self.num_keys).astype(np.int64)
+        buckets = self.num_keys + np.where(values < 0, -keys, keys)
+        buckets += np.arange(self.num_columns)*self.counts.shape[1]
+        self.counts += np.bincount(buckets.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def merge(self, other):
+        if other.counts.shape != self.counts.shape or other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only accumulators with the same layout can be merged")
+        self.counts += other.counts
+        return self
+
+    def quantiles(self, qs):
+        """(len(qs) x num_columns) nearest-rank quantile estimates."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        cumulative = np.cumsum(self.counts, axis=1)
+        out = np.empty((len(qs), self.num_columns))
+        for i, q in enumerate(qs):
+            ranks = np.floor(q*(cumulative[:, -1] - 1))
+            out[i] = self._bucket_values[np.argmax(cumulative > ranks[:, None], axis=1)]
+        return out
+
+#
+# SIMULATION
+#
+
+class MonteCarloBands:
+    """
+    Percentile bands of monthly net worth over many simulated paths:
+      - rent, buy => {band name: array over months} for each band in BANDS
+      - prob_buy_ahead => share of paths where buying is at or ahead of
+        renting, by month
+    """
+    def __init__(self, num_paths, rent, buy, prob_buy_ahead):
+        self.num_paths = num_paths
+        self.rent = rent
+        self.buy = buy
+        self.prob_buy_ahead = prob_buy_ahead
+
+    @property
+    def months(self):
+        return len(self.prob_buy_ahead)
+
+    def to_frame(self, step=12):
+        """Bands every step months (yearly by default), one row per sampled month."""
+        rows = np.arange(step, self.months + 1, step) - 1
+        frame = pd.DataFrame({"year": (rows + 1)/12})
+        for name in self.rent:
+            frame[f"rent_{name}"] = self.rent[name][rows]
+        for name in self.buy:
+            frame[f"buy_{name}"] = self.buy[name][rows]
+        frame["prob_buy_ahead"] = self.prob_buy_ahead[rows]
+        return frame.set_index("year")
+
+    def plot(self, ax=None):
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            _, ax = plt.subplots(figsize=(12, 8))
+        years = np.arange(1, self.months + 1)/12
+        for label, bands, color in [("Rent", self.rent, "tab:blue"), ("Buy", self.buy, "tab:orange")]:
+            ax.fill_between(years, bands["p5"], bands["p95"], color=color, alpha=0.15, label=f"{label} p5-p95")
+            ax.fill_between(years, bands["p25"], bands["p75"], color=color, alpha=0.3, label=f"{label} p25-p75")
+            ax.plot(years, bands["median"], color=color, label=f"{label} median")
+        ax.set_xlabel("Years")
+        ax.set_ylabel("Net Worth")
+        ax.set_title(f"Net Worth Over Time: Renting vs Buying ({self.num_paths:,} bootstrapped paths)")
+        ax.legend()
+        ax.grid(True)
+        return ax
+
+def _simulate_chunk(seed_seq, num_paths, simulation_years, equity_history, appreciation_history, block_months, parameters):
+    """One chunk of paths, reduced to (rent accumulator, buy accumulator, paths with buy ahead by month)."""
+    rng = np.random.default_rng(seed_seq)
+    months = simulation_years*12
+    net_worth_rent, net_worth_buy = net_worth_paths(
+        simulation_years,
+        monthly_investment_returns=block_bootstrap(rng, equity_history, num_paths, months - 1, block_months),
+        monthly_appreciation=block_bootstrap(rng, appreciation_history, num_paths, months - 1, block_months),
+        **parameters,
+    )
+    # month 0 is the zero the loop model starts from; bands cover months 1..
+    net_worth_rent = np.broadcast_to(net_worth_rent, (num_paths, months))[:, 1:]
+    net_worth_buy = np.broadcast_to(net_worth_buy, (num_paths, months))[:, 1:]
+    rent = RunningQuantiles(months - 1).add(net_worth_rent)
+    buy = RunningQuantiles(months - 1).add(net_worth_buy)
+    return rent, buy, (net_worth_buy >= net_worth_rent).sum(axis=0)
+
+def simulate_rent_vs_buy_monte_carlo(equity_history, appreciation_history, num_paths=DEFAULT_NUM_PATHS, simulation_years=None,
+                                     block_months=BLOCK_MONTHS, seed=None, chunk_paths=CHUNK_PATHS, max_workers=None, **parameters):
+    """
+    Runs num_paths rent vs buy simulations (rent_vs_buy.net_worth_paths) in
+    which the investment return and home appreciation of each month are
+    block-bootstrapped from the monthly equity_history and
+    appreciation_history; other parameters are fixed, from parameters then
+    DEFAULT_PARAMETERS. Paths run in chunks of chunk_paths, each with its
+    own stream spawned from SeedSequence(seed), and only the chunks'
+    quantile accumulators are kept, so memory does not grow with num_paths
+    and the result does not depend on max_workers.
+    max_workers : None => one worker per CPU, 1 => run in this process
+    Returns MonteCarloBands.
+    """
+    if simulation_years is None:
+        simulation_years = int(parameters.get("mortgage_length", DEFAULT_PARAMETERS["mortgage_length"])) + 30
+    months = simulation_years*12
+    chunk_sizes = [min(chunk_paths, num_paths - start) for start in range(0, num_paths, chunk_paths)]
+    jobs = list(zip(np.random.SeedSequence(seed).spawn(len(chunk_sizes)), chunk_sizes))
+    args = (simulation_years, np.asarray(equity_history, dtype=float), np.asarray(appreciation_history, dtype=float), block_months, parameters)
+
+    rent = RunningQuantiles(months - 1)
+    buy = RunningQuantiles(months - 1)
+    buy_ahead = np.zeros(months - 1, dtype=np.int64)
+
+    def merge(result):
+        nonlocal buy_ahead
+        chunk_rent, chunk_buy, chunk_ahead = result
+        rent.merge(chunk_rent)
+        buy.merge(chunk_buy)
+        buy_ahead += chunk_ahead
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if min(max_workers, len(jobs)) <= 1:
+        for seed_seq, n in jobs:
+            merge(_simulate_chunk(seed_seq, n, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+            futures = [pool.submit(_simulate_chunk, seed_seq, n, *args) for seed_seq, n in jobs]
+            for future in as_completed(futures):
+                merge(future.result())
+
+    rent_bands = rent.quantiles(list(BANDS.values()))
+    buy_bands = buy.quantiles(list(BANDS.values()))
+    return MonteCarloBands(
+        num_paths,
+        dict(zip(BANDS, rent_bands)),
+        dict(zip(BANDS, buy_bands)),
+        buy_ahead/max(num_paths, 1),
+    )
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap Monte Carlo of renting vs buying with historical equity returns and NYC appreciation.")
+    parser.add_argument("--paths", type=int, default=DEFAULT_NUM_PATHS)
+    parser.add_argument("--years", type=int, default=None, help="years simulated (default: mortgage length + 30)")
+    parser.add_argument("--block-months", type=int, default=BLOCK_MONTHS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--equity-returns", help="CSV of monthly equity returns (date, return) or levels (date, close); "
+                                                 "default: a synthetic 7%%/15%% lognormal history")
+    parser.add_argument("--index", default=INDEX_PATH, help="property index built by property_index.py")
+    parser.add_argument("--neighborhood", help="appreciation from this neighborhood's repeat sales only")
+    parser.add_argument("--building-class", help="appreciation from building classes containing this text only")
+    parser.add_argument("--plot", help="save the percentile bands to this image file")
+    args = parser.parse_args(argv)
+
+    if args.equity_returns:
+        equity_history = load_monthly_returns(args.equity_returns)
+    else:
+        print("No --equity-returns given; using a synthetic lognormal equity history")
+        equity_history = synthetic_equity_history()
+    appreciation_history = nyc_appreciation_history(args.index, args.neighborhood, args.building_class)
+    print(f"Equity history: {len(equity_history)} months, {np.expm1(12*np.log1p(equity_history).mean()):.2%}/yr; "
+          f"NYC appreciation: {len(appreciation_history)} months, {np.expm1(12*np.log1p(appreciation_history).mean()):.2%}/yr")
+
+    start = time.perf_counter()
+    bands = simulate_rent_vs_buy_monte_carlo(equity_history, appreciation_history, args.paths, args.years,
+                                             block_months=args.block_months, seed=args.seed, max_workers=args.workers)
+    print(f"{args.paths} paths in {time.perf_counter() - start:.1f}s")
+    table = bands.to_frame(step=60)
+    print(table.to_string(formatters={col: "{:,.0f}".format for col in table.columns if col != "prob_buy_ahead"}))
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        ax = bands.plot()
+        ax.figure.savefig(args.plot)
+        plt.close(ax.figure)
+        print(f"Saved {args.plot}")
+
+if __name__ == "__main__":
+    main()
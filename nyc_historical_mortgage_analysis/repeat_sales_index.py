@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from property_index import INDEX_PATH, PropertyIndex, build_index
+from sales_store import MODULE_DIR
+
+#
+# REPEAT-SALES REGRESSION
+#
+# Case-Shiller style: for a pair of sales of the same unit bought in period s
+# and sold in period t, log(p_t/p_s) = b_t - b_s + e. Each pair is one row of
+# a sparse design matrix with a -1 and a +1, so the normal equations X'WX are
+# a weighted graph Laplacian over periods, assembled here with bincount
+# straight from the pair list instead of materializing X. The three stages:
+#   1. OLS for b
+#   2. regress the squared residuals on the holding period (noise grows
+#      with time between sales)
+#   3. WLS with weights 1/fitted variance
+#
+
+CACHE_PATH = os.path.join(MODULE_DIR, "repeat_sales_cache.json")
+SEGMENT_COLUMNS = ["NEIGHBORHOOD", "BUILDING CLASS CATEGORY"]
+
+def _solve_repeat_sales(start, end, log_ratio, weights, num_periods):
+    """
+    Weighted least squares for period log-levels b from pairs (start, end,
+    log_ratio), with the first period any pair touches pinned to 0. Periods
+    no pair touches come back NaN.
+    """
+    w = weights
+    laplacian = np.zeros((num_periods, num_periods))
+    np.add.at(laplacian, (start, start), w)
+    np.add.at(laplacian, (end, end), w)
+    np.add.at(laplacian, (start, end), -w)
+    np.add.at(laplacian, (end, start), -w)
+    rhs = np.bincount(end, weights=w*log_ratio, minlength=num_periods) - np.bincount(start, weights=w*log_ratio, minlength=num_periods)
+
+    observed = np.flatnonzero(np.diag(laplacian) > 0)
+    levels = np.full(num_periods, np.nan)
+    if len(observed) < 2:
+        return levels
+    base, free = observed[0], observed[1:]
+    solution = np.linalg.lstsq(laplacian[np.ix_(free, free)], rhs[free], rcond=None)[0]
+    levels[base] = 0.0
+    levels[free] = solution
+    return levels
+
+# Pairs implying more than this annualized log change are treated as
+# non-market transactions (partial interests, renovations, data errors)
+MAX_ANNUAL_LOG_CHANGE = 0.5
+
+def repeat_sales_index(pairs, periods_per_year=1, first_year=None, last_year=None, max_annual_log_change=MAX_ANNUAL_LOG_CHANGE):
+    """
+    Index levels (first observed period = 100) for a set of repeat-sale pairs
+    with first_date/first_price/second_date/second_price, as a Series indexed
+    by period start date. Periods without data are NaN.
+    """
+    first = pd.DatetimeIndex(pairs["first_date"])
+    second = pd.DatetimeIndex(pairs["second_date"])
+    first_year = int(first.year.min()) if first_year is None else first_year
+    last_year = int(second.year.max()) if last_year is None else last_year
+    num_periods = (last_year - first_year + 1)*periods_per_year
+
+    def period(dates):
+        return ((dates.year - first_year)*periods_per_year + (dates.month - 1)*periods_per_year//12).to_numpy()
+
+    start, end = period(first), period(second)
+    keep = (end > start) & (start >= 0) & (end < num_periods)
+    start, end = start[keep], end[keep]
+    log_ratio = np.log(pairs["second_price"].to_numpy(dtype=float)[keep]/pairs["first_price"].to_numpy(dtype=float)[keep])
+    years_held = ((second - first).days.to_numpy()[keep])/365.25
+    plausible = np.abs(log_ratio) <= max_annual_log_change*np.maximum(years_held, 1.0)
+    start, end, log_ratio = start[plausible], end[plausible], log_ratio[plausible]
+
+    levels = _solve_repeat_sales(start, end, log_ratio, np.ones(len(start)), num_periods)
+    if len(start) > 2 and not np.isnan(levels).all():
+        residuals = log_ratio - (np.nan_to_num(levels[end]) - np.nan_to_num(levels[start]))
+        gap = (end - start).astype(float)
+        design = np.column_stack([np.ones_like(gap), gap])
+        coef = np.linalg.lstsq(design, residuals**2, rcond=None)[0]
+        variance = np.maximum(design @ coef, 1e-4)
+        levels = _solve_repeat_sales(start, end, log_ratio, 1/variance, num_periods)
+
+    dates = pd.date_range(f"{first_year}-01-01", periods=num_periods, freq=f"{12//periods_per_year}MS")
+    return pd.Series(100*np.exp(levels), index=dates, name="index")
+
+def annual_appreciation(index):
+    """
+    Year-over-year appreciation rates implied by an index series, with gaps
+    (years without data) filled by log-linear interpolation between the
+    observed levels. This is the path rent_vs_buy and the loan scenarios take
+    in place of a constant appreciation rate.
+    """
+    yearly = index.groupby(index.index.year).mean()
+    log_levels = np.log(yearly).interpolate(limit_area="inside")
+    return np.exp(log_levels.diff()).sub(1).dropna()
+
+def monthly_appreciation(index, periods_per_year):
+    """
+    Month-by-month appreciation rates implied by an index with
+    periods_per_year periods, each period's change spread evenly over its
+    months and gaps log-linearly interpolated. Quarterly indexes are a good
+    source: monthly ones add sampling noise that shows up as spurious
+    month-to-month reversals.
+    """
+    months_per_period = 12 // periods_per_year
+    log_changes = np.log(index).interpolate(limit_area="inside").diff().dropna()
+    rates = np.repeat(np.expm1(log_changes.to_numpy()/months_per_period), months_per_period)
+    return pd.Series(rates, index=pd.date_range(log_changes.index[0], periods=len(rates), freq="MS"), name="appreciation")
+
+#
+# SEGMENT CACHE
+#
+
+def _pairs_digest(pairs, first_year, last_year, periods_per_year):
+    """Digest of a segment's pairs and the period grid its index is fitted on."""
+    digest = hashlib.sha256(f"{first_year}|{last_year}|{periods_per_year}".encode())
+    for col in ["first_date", "first_price", "second_date", "second_price"]:
+        digest.update(np.ascontiguousarray(pairs[col].to_numpy()).tobytes())
+    return digest.hexdigest()
+
+class RepeatSalesIndexCache:
+    """
+    Repeat-sales indexes per (NEIGHBORHOOD, BUILDING CLASS CATEGORY) segment,
+    persisted as JSON. Each entry stores a digest of the pairs it was fitted
+    on and of the years the whole pair set spans, so refresh() only refits
+    segments whose pairs changed, e.g. the ones a new year's file added sales
+    to, unless the new sales also extend the date range, which refits every
+    segment so they all keep covering the same periods.
+    """
+    def __init__(self, path=CACHE_PATH, periods_per_year=1, min_pairs=30):
+        self.path = path
+        self.periods_per_year = periods_per_year
+        self.min_pairs = min_pairs
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            if stored.get("periods_per_year") == periods_per_year and stored.get("min_pairs") == min_pairs:
+                self.entries = stored["segments"]
+
+    @staticmethod
+    def segment_key(neighborhood, building_class):
+        return f"{neighborhood}|{building_class}"
+
+    def refresh(self, pairs):
+        """
+        Fits every segment with at least min_pairs pairs whose pair set is new
+        or changed, drops segments that no longer qualify, and saves.
+        Returns the number of segments refitted.
+        """
+        first_year = int(pd.DatetimeIndex(pairs["first_date"]).year.min())
+        last_year = int(pd.DatetimeIndex(pairs["second_date"]).year.max())
+        refitted = 0
+        seen = set()
+        for (neighborhood, building_class), segment in pairs.groupby(SEGMENT_COLUMNS, sort=False, observed=True):
+            if len(segment) < self.min_pairs:
+                continue
+            key = self.segment_key(neighborhood, building_class)
+            seen.add(key)
+            digest = _pairs_digest(segment, first_year, last_year, self.periods_per_year)
+            if key in self.entries and self.entries[key]["digest"] == digest:
+                continue
+            index = repeat_sales_index(segment, self.periods_per_year, first_year, last_year)
+            self.entries[key] = {
+                "digest": digest,
+                "pairs": len(segment),
+                "dates": [d.strftime("%Y-%m-%d") for d in index.index],
+                "levels": [None if np.isnan(v) else float(v) for v in index.to_numpy()],
+            }
+            refitted += 1
+        self.entries = {key: entry for key, entry in self.entries.items() if key in seen}
+        self.save()
+        return refitted
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"periods_per_year": self.periods_per_year, "min_pairs": self.min_pairs, "segments": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def index(self, neighborhood, building_class):
+        """Cached index Series of a segment (KeyError if it had too few pairs)."""
+        entry = self.entries[self.segment_key(neighborhood, building_class)]
+        levels = np.array([np.nan if v is None else v for v in entry["levels"]])
+        return pd.Series(levels, index=pd.DatetimeIndex(entry["dates"]), name="index")
+
+    def segments(self):
+        return [tuple(key.split("|", 1)) + (entry["pairs"],) for key, entry in self.entries.items()]
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit repeat-sales price indexes per neighborhood and building class.")
+    parser.add_argument("--index", default=INDEX_PATH, help="property index built by property_index.py")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--periods-per-year", type=int, default=1, choices=[1, 2, 4, 12])
+    parser.add_argument("--min-pairs", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    property_index = PropertyIndex.load(args.index) if os.path.exists(args.index) else build_index(index_path=args.index)
+    pairs = property_index.repeat_sales()
+    cache = RepeatSalesIndexCache(args.cache, args.periods_per_year, args.min_pairs)
+    refitted = cache.refresh(pairs)
+    print(f"Refitted {refitted} of {len(cache.entries)} segments in {time.perf_counter() - start:.1f}s")
+
+    neighborhood, building_class, num_pairs = max(cache.segments(), key=lambda s: s[2])
+    index = cache.index(neighborhood, building_class)
+    print(f"{neighborhood} / {building_class} ({num_pairs} pairs)")
+    print(annual_appreciation(index).round(4).to_string())
+
+if __name__ == "__main__":
+    main()
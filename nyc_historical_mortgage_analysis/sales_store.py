@@ -0,0 +1,442 @@
+import argparse
+import importlib.util
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+#
+# COLUMNS
+#
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_DIR = os.path.join(MODULE_DIR, "mortgage_data_csv")
+STORE_DIR = os.path.join(MODULE_DIR, "mortgage_data_store")
+
+BOROUGHS = ["manhattan", "bronx", "brooklyn", "queens", "si"]
+CSV_PATTERN = re.compile(rf"(\d{{4}})_({'|'.join(BOROUGHS)})\.csv$")
+
+# Header spellings used by the raw files over the years => canonical name
+COLUMN_ALIASES = {
+    "RESIDENTIALUNITS": "RESIDENTIAL UNITS",
+    "COMMERCIALUNITS": "COMMERCIAL UNITS",
+    "BUILDING CLASSAT TIME OF SALE": "BUILDING CLASS AT TIME OF SALE",
+}
+FINAL_ROLL_PATTERN = re.compile(r"^(TAX CLASS|BUILDING CLASS) AS OF FINAL ROLL \d{2}/\d{2}$")
+
+CATEGORY_COLUMNS = [
+    "NEIGHBORHOOD",
+    "BUILDING CLASS CATEGORY",
+    "TAX CLASS AT PRESENT",
+    "BUILDING CLASS AT PRESENT",
+    "BUILDING CLASS AT TIME OF SALE",
+]
+STRING_COLUMNS = ["EASE-MENT", "ADDRESS", "APARTMENT NUMBER"]
+# Compact dtypes: nullable ints sized to the codes they hold, float32 for
+# amounts (exact to the dollar below $16.7M, within $8 above)
+INT_DTYPES = {
+    "BOROUGH": "Int8",
+    "BLOCK": "Int32",
+    "LOT": "Int32",
+    "ZIP CODE": "Int32",
+    "RESIDENTIAL UNITS": "Int32",
+    "COMMERCIAL UNITS": "Int32",
+    "TOTAL UNITS": "Int32",
+    "YEAR BUILT": "Int16",
+    "TAX CLASS AT TIME OF SALE": "Int8",
+}
+FLOAT_DTYPES = {"LAND SQUARE FEET": "float32", "GROSS SQUARE FEET": "float32", "SALE PRICE": "float32"}
+DATE_COLUMNS = ["SALE DATE"]
+
+# Partition keys, stored in the directory names rather than the files
+PARTITION_COLUMNS = ["year", "borough"]
+
+# Sales below this price are deed transfers (gifts, estate, $0/$10 sales),
+# not market transactions
+NON_ARMS_LENGTH_PRICE = 10_000
+NON_ARMS_LENGTH_COLUMN = "NON ARMS LENGTH"
+
+def canonical_column(name):
+    name = " ".join(name.replace("\n", " ").split())
+    name = COLUMN_ALIASES.get(name, name)
+    match = FINAL_ROLL_PATTERN.match(name)
+    if match:
+        name = f"{match.group(1)} AT PRESENT"
+    return name
+
+#
+# CSV => DATAFRAME
+#
+
+class IngestReport:
+    """What ingesting one file did: rows kept, dropped and flagged, and memory saved by typing."""
+    __slots__ = ("file", "rows_read", "rows_dropped", "rows_flagged", "raw_bytes", "typed_bytes")
+
+    def __init__(self, file, rows_read, rows_dropped, rows_flagged, raw_bytes, typed_bytes):
+        self.file = file
+        self.rows_read = rows_read
+        self.rows_dropped = rows_dropped
+        self.rows_flagged = rows_flagged
+        self.raw_bytes = raw_bytes
+        self.typed_bytes = typed_bytes
+
+    @property
+    def bytes_saved(self):
+        return self.raw_bytes - self.typed_bytes
+
+    def __str__(self):
+        return (f"{os.path.basename(self.file)}: {self.rows_read} rows, {self.rows_dropped} dropped, "
+                f"{self.rows_flagged} flagged non-arm's-length, {self.raw_bytes/1e6:.1f}MB -> {self.typed_bytes/1e6:.1f}MB")
+
+def ingest_sales_csv(file_path):
+    """
+    Reads one {year}_{borough}.csv into typed columns and reports what it did:
+      - headers renamed to their canonical spelling
+      - blank separator rows and rows without a parseable SALE DATE dropped
+      - whitespace stripped from text and collapsed inside categorical codes
+      - counts as compact nullable ints, square feet and SALE PRICE as
+        float32, SALE DATE as datetime, descriptive codes as categoricals
+      - NON ARMS LENGTH flag added (see flag_non_arms_length)
+    Returns (DataFrame, IngestReport).
+    """
+    raw = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    raw_bytes = int(raw.memory_usage(deep=True).sum())
+    rows_read = len(raw)
+    df = normalize_sales(raw)
+    report = IngestReport(
+        file_path,
+        rows_read,
+        rows_read - len(df),
+        int(df[NON_ARMS_LENGTH_COLUMN].sum()) if NON_ARMS_LENGTH_COLUMN in df else 0,
+        raw_bytes,
+        int(df.memory_usage(deep=True).sum()),
+    )
+    return df, report
+
+def read_sales_csv(file_path):
+    """ingest_sales_csv without the report."""
+    return ingest_sales_csv(file_path)[0]
+
+def normalize_sales(df):
+    """The typing step of ingest_sales_csv, for a frame (or chunk) read with dtype=str."""
+    df.columns = [canonical_column(col) for col in df.columns]
+    df = df[(df != "").any(axis=1)].reset_index(drop=True)
+
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        # to_numeric and to_datetime skip surrounding whitespace themselves
+        values = df[col] if col in INT_DTYPES or col in FLOAT_DTYPES or col in DATE_COLUMNS else df[col].str.strip()
+        values = values.replace("", None)
+        if col in INT_DTYPES:
+            out[col] = pd.to_numeric(values, errors='coerce').round().astype(INT_DTYPES[col])
+        elif col in FLOAT_DTYPES:
+            out[col] = pd.to_numeric(values, errors='coerce').astype(FLOAT_DTYPES[col])
+        elif col in DATE_COLUMNS:
+            out[col] = pd.to_datetime(values, errors='coerce')
+        elif col in CATEGORY_COLUMNS:
+            # older files pad codes like "09  COOPS"; collapse so every year shares one category
+            codes = values.astype("category")
+            out[col] = codes.map({c: " ".join(c.split()) for c in codes.cat.categories}).astype("category")
+        else:
+            out[col] = values.astype("string")
+    if "SALE DATE" in out:
+        out = out[out["SALE DATE"].notna()].reset_index(drop=True)
+    if "SALE PRICE" in out:
+        out[NON_ARMS_LENGTH_COLUMN] = flag_non_arms_length(out)
+    return out
+
+def flag_non_arms_length(df):
+    """
+    True for sales that are not market transactions:
+      - SALE PRICE missing or under NON_ARMS_LENGTH_PRICE
+      - portfolio sales, where several lots of one block share a sale date
+        and price (the deed's total is repeated on every lot); only checked
+        when BLOCK, LOT and SALE DATE are present
+    """
+    price = df["SALE PRICE"]
+    flagged = (price.isna() | (price < NON_ARMS_LENGTH_PRICE)).to_numpy(dtype=bool, copy=True)
+    if {"BLOCK", "LOT", "SALE DATE"} <= set(df.columns):
+        lots = df.groupby(["BLOCK", "SALE DATE", "SALE PRICE"], observed=True, dropna=False)["LOT"].transform("nunique")
+        flagged |= (lots > 1).to_numpy(dtype=bool)
+    return flagged
+
+#
+# PARTITIONED STORE
+#
+# The Parquet store needs pyarrow (pip install pyarrow). Without it
+# load_sales and iter_sales read the CSVs instead, with the same partition
+# and column pruning, only slower; build_store raises.
+#
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise ImportError("The Parquet sales store needs pyarrow: pip install pyarrow")
+
+def partition_path(store_dir, year, borough):
+    return os.path.join(store_dir, f"year={year}", f"borough={borough}", "part-0.parquet")
+
+def list_csv_partitions(csv_dir=CSV_DIR):
+    """Returns [(year, borough, csv_path)] for every {year}_{borough}.csv in csv_dir."""
+    partitions = []
+    for filename in sorted(os.listdir(csv_dir)):
+        match = CSV_PATTERN.match(filename)
+        if match:
+            partitions.append((int(match.group(1)), match.group(2), os.path.join(csv_dir, filename)))
+    return partitions
+
+def build_store(csv_dir=CSV_DIR, store_dir=STORE_DIR, force=False):
+    """
+    Converts each {year}_{borough}.csv into its own Parquet file under
+    store_dir/year={year}/borough={borough}/, a hive-partitioned dataset that
+    load_sales reads with partition and column pruning.
+    Partitions newer than their CSV are skipped unless force=True; files are
+    written to a temporary name and renamed so a crash never leaves a torn
+    partition. Returns the number of partitions written.
+    """
+    _require_pyarrow()
+    written = 0
+    for year, borough, csv_path in list_csv_partitions(csv_dir):
+        out_path = partition_path(store_dir, year, borough)
+        if not force and os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(csv_path):
+            continue
+        df, report = ingest_sales_csv(csv_path)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = out_path + ".tmp"
+        # categoricals are written as plain strings (Parquet dictionary-encodes
+        # them anyway): pandas gives small category sets int8 codes, which
+        # overflow when the partitions' categories are unified on read
+        df = df.astype({col: "string" for col in CATEGORY_COLUMNS if col in df})
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, out_path)
+        written += 1
+        print(f"{report} -> {out_path}")
+    return written
+
+def load_sales(store_dir=STORE_DIR, columns=None, years=None, boroughs=None, csv_dir=CSV_DIR):
+    """
+    Loads the partitioned store as one DataFrame.
+      - columns: subset of columns to read (None => all); other column chunks
+        are never read from disk
+      - years, boroughs: partitions to read (None => all); other partition
+        directories are never opened
+    year and borough come back as int and string columns. Without pyarrow, or
+    before build_store has run, the same partitions are read from the CSVs.
+    """
+    if columns is not None:
+        columns = list(columns) + [c for c in PARTITION_COLUMNS if c not in columns]
+    if not HAS_PYARROW or not os.path.isdir(store_dir):
+        return _load_sales_csv(csv_dir, columns, years, boroughs)
+    filters = []
+    if years is not None:
+        filters.append(("year", "in", [int(y) for y in years]))
+    if boroughs is not None:
+        filters.append(("borough", "in", list(boroughs)))
+    # read the category columns straight into categoricals (int32 codes)
+    dictionary_columns = [c for c in CATEGORY_COLUMNS if columns is None or c in columns]
+    df = pd.read_parquet(store_dir, engine="pyarrow", columns=columns, filters=filters or None, read_dictionary=dictionary_columns)
+    return _typed_partition_columns(df)
+
+def _load_sales_csv(csv_dir, columns, years, boroughs, chunk_size=100_000):
+    """load_sales from the CSVs, reading only the asked-for partitions and columns."""
+    years = None if years is None else {int(y) for y in years}
+    read_columns = None if columns is None else set(columns)
+    if read_columns is not None and NON_ARMS_LENGTH_COLUMN in read_columns:
+        read_columns |= {"BLOCK", "LOT", "SALE DATE", "SALE PRICE"}
+    usecols = None if read_columns is None else (lambda col: canonical_column(col) in read_columns)
+    frames = []
+    for year, borough, csv_path in list_csv_partitions(csv_dir):
+        if (years is not None and year not in years) or (boroughs is not None and borough not in boroughs):
+            continue
+        for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, usecols=usecols, chunksize=chunk_size):
+            chunk = normalize_sales(chunk)
+            chunk["year"] = year
+            chunk["borough"] = borough
+            frames.append(chunk)
+    if not frames:
+        return pd.DataFrame(columns=columns or PARTITION_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return _typed_partition_columns(df)
+
+def _typed_partition_columns(df):
+    """Categorical codes, int year and string borough, whichever source df was read from."""
+    df = df.astype({col: "category" for col in CATEGORY_COLUMNS if col in df})
+    df["year"] = df["year"].astype("int64")
+    df["borough"] = df["borough"].astype("string")
+    return df
+
+#
+# STREAMING QUERIES
+#
+
+class SalesQuery:
+    """
+    Filter over the sales history, applied chunk by chunk by iter_sales.
+      - neighborhoods: names matched case-insensitively (e.g. ["Forest Hills"])
+      - building_class_contains: case-insensitive substring of BUILDING CLASS
+        CATEGORY (e.g. "coop")
+      - start_date, end_date: inclusive bounds on SALE DATE
+      - boroughs: file borough names (see BOROUGHS)
+      - ranges: {column: (low, high)} inclusive numeric bounds, None => open
+      - arms_length_only: drop sales flagged NON ARMS LENGTH
+      - columns: columns to return (None => all); columns only needed by the
+        filters are read but dropped from the output
+    Years outside the date range and boroughs not asked for are pruned before
+    any file is opened.
+    """
+    def __init__(self, neighborhoods=None, building_class_contains=None, start_date=None, end_date=None,
+                 boroughs=None, ranges=None, arms_length_only=False, columns=None):
+        self.neighborhoods = None if neighborhoods is None else {n.strip().lower() for n in neighborhoods}
+        self.building_class_contains = None if building_class_contains is None else building_class_contains.lower()
+        self.start_date = None if start_date is None else pd.Timestamp(start_date)
+        self.end_date = None if end_date is None else pd.Timestamp(end_date)
+        self.boroughs = None if boroughs is None else set(boroughs)
+        self.ranges = dict(ranges or {})
+        self.arms_length_only = arms_length_only
+        self.columns = None if columns is None else list(columns)
+        unknown = (self.boroughs or set()) - set(BOROUGHS)
+        if unknown:
+            raise ValueError(f"Unknown boroughs {sorted(unknown)}; expected some of {BOROUGHS}")
+
+    def filter_columns(self):
+        needed = set(self.ranges)
+        if self.neighborhoods is not None:
+            needed.add("NEIGHBORHOOD")
+        if self.building_class_contains is not None:
+            needed.add("BUILDING CLASS CATEGORY")
+        if self.start_date is not None or self.end_date is not None:
+            needed.add("SALE DATE")
+        if self.arms_length_only:
+            needed |= {"BLOCK", "LOT", "SALE DATE", "SALE PRICE", NON_ARMS_LENGTH_COLUMN}
+        return needed
+
+    def read_columns(self):
+        """Columns a chunk must contain, or None for all of them."""
+        if self.columns is None:
+            return None
+        return set(self.columns) | self.filter_columns()
+
+    def keeps_partition(self, year, borough):
+        if self.boroughs is not None and borough not in self.boroughs:
+            return False
+        if self.start_date is not None and year < self.start_date.year:
+            return False
+        if self.end_date is not None and year > self.end_date.year:
+            return False
+        return True
+
+    def mask(self, df):
+        keep = np.ones(len(df), dtype=bool)
+        if self.neighborhoods is not None:
+            keep &= df["NEIGHBORHOOD"].astype("string").str.lower().isin(self.neighborhoods).fillna(False).to_numpy(dtype=bool)
+        if self.building_class_contains is not None:
+            category = df["BUILDING CLASS CATEGORY"].astype("string").str.lower()
+            keep &= category.str.contains(self.building_class_contains, regex=False).fillna(False).to_numpy(dtype=bool)
+        if self.start_date is not None:
+            keep &= (df["SALE DATE"] >= self.start_date).fillna(False).to_numpy(dtype=bool)
+        if self.end_date is not None:
+            keep &= (df["SALE DATE"] <= self.end_date).fillna(False).to_numpy(dtype=bool)
+        for col, (low, high) in self.ranges.items():
+            if low is not None:
+                keep &= (df[col] >= low).fillna(False).to_numpy(dtype=bool)
+            if high is not None:
+                keep &= (df[col] <= high).fillna(False).to_numpy(dtype=bool)
+        if self.arms_length_only:
+            keep &= ~df[NON_ARMS_LENGTH_COLUMN].to_numpy(dtype=bool)
+        return keep
+
+    def apply(self, df):
+        df = df[self.mask(df)]
+        if self.columns is not None:
+            df = df[[c for c in self.columns if c in df.columns]]
+        return df
+
+def _iter_store_chunks(query, store_dir, chunk_size):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(store_dir, format="parquet", partitioning="hive")
+    # the same pruning as keeps_partition, as an expression pyarrow resolves from the directory names
+    partition_filter = None
+    conditions = []
+    if query.boroughs is not None:
+        conditions.append(ds.field("borough").isin(sorted(query.boroughs)))
+    if query.start_date is not None:
+        conditions.append(ds.field("year") >= query.start_date.year)
+    if query.end_date is not None:
+        conditions.append(ds.field("year") <= query.end_date.year)
+    for condition in conditions:
+        partition_filter = condition if partition_filter is None else partition_filter & condition
+
+    read_columns = query.read_columns()
+    columns = None if read_columns is None else [c for c in dataset.schema.names if c in read_columns]
+    for batch in dataset.to_batches(columns=columns, filter=partition_filter, batch_size=chunk_size):
+        chunk = batch.to_pandas()
+        yield chunk.astype({col: "category" for col in CATEGORY_COLUMNS if col in chunk})
+
+def _iter_csv_chunks(query, csv_dir, chunk_size):
+    read_columns = query.read_columns()
+    usecols = None if read_columns is None else (lambda col: canonical_column(col) in read_columns)
+    for year, borough, csv_path in list_csv_partitions(csv_dir):
+        if not query.keeps_partition(year, borough):
+            continue
+        for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, usecols=usecols, chunksize=chunk_size):
+            yield normalize_sales(chunk)
+
+def iter_sales(query, store_dir=STORE_DIR, csv_dir=CSV_DIR, chunk_size=100_000):
+    """
+    Streams the sales matching query as a sequence of DataFrames, at most
+    chunk_size rows each. Reads the Parquet store when it has been built
+    (build_store) and pyarrow is installed, else the CSVs; either way only the pruned partitions and
+    needed columns are read, and at most one chunk is held at a time.
+    """
+    if HAS_PYARROW and os.path.isdir(store_dir):
+        chunks = _iter_store_chunks(query, store_dir, chunk_size)
+    else:
+        chunks = _iter_csv_chunks(query, csv_dir, chunk_size)
+    for chunk in chunks:
+        chunk = query.apply(chunk)
+        if len(chunk):
+            yield chunk
+
+def query_sales(query, store_dir=STORE_DIR, csv_dir=CSV_DIR, chunk_size=100_000):
+    """Collects iter_sales into one DataFrame; memory scales with the matches, not the history."""
+    chunks = list(iter_sales(query, store_dir=store_dir, csv_dir=csv_dir, chunk_size=chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=query.columns or [])
+    return pd.concat(chunks, ignore_index=True)
+
+#
+# CLI
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the NYC sales CSVs into a partitioned Parquet store.")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="rewrite partitions even if they are up to date")
+    parser.add_argument("--report", action="store_true", help="only print what ingesting each CSV drops, flags and saves")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        reports = [ingest_sales_csv(path)[1] for _, _, path in list_csv_partitions(args.csv_dir)]
+        for report in reports:
+            print(report)
+        print(f"Total: {sum(r.rows_read for r in reports)} rows, {sum(r.rows_dropped for r in reports)} dropped, "
+              f"{sum(r.rows_flagged for r in reports)} flagged, {sum(r.bytes_saved for r in reports)/1e6:.0f}MB saved")
+        return
+
+    start = time.perf_counter()
+    written = build_store(args.csv_dir, args.store_dir, force=args.force)
+    print(f"Wrote {written} partitions in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    df = load_sales(args.store_dir, columns=["NEIGHBORHOOD", "SALE PRICE", "SALE DATE"])
+    print(f"Loaded {len(df)} rows x {df.shape[1]} columns in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
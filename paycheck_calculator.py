@@ -1,5 +1,11 @@
+from __future__ import annotations
+
+import argparse
+from bisect import bisect_right
+from dataclasses import dataclass, fields
 from enum import Enum
-from tax_bracket import FEDERAL_TAX_BRACKETS_INDIVIDUAL, STATE_TAX_BRACKETS_INDIVIDUAL, NYC_TAX_BRACKETS_INDIVIDUAL, NY_PFL_RATE, SOCIAL_SECURITY_MAX_TAXABLE_EARNINGS
+from functools import lru_cache
+from tax_bracket import NY_PFL_RATE, SOCIAL_SECURITY_MAX_TAXABLE_EARNINGS, get_compiled_brackets
 from contribution_limit import LIMITS_401k_INDIVIDUAL_PRETAX, LIMITS_401k_INDIVIDUAL_TOTAL, LIMITS_401k_INDIVIDUAL_CATCHUP, LIMITS_HSA_INDIVIDUAL
 
 
@@ -11,12 +17,84 @@ class PaymentFrequency(Enum):
     YEARLY = 1
 
 
+@dataclass(frozen=True, slots=True)
 class BenefitDeduction:
     name: str
     is_pre_tax: bool
     amount: float
 
 
+@dataclass(frozen=True, slots=True)
+class PaycheckScenario:
+    """
+    Hashable set of inputs to calculate_paycheck_breakdown, so identical scenarios share
+    one cached result in calculate_paycheck. Amounts are annual.
+    """
+
+    payment_frequency: PaymentFrequency
+    year: int
+    salary_income: float
+    investment_income: float
+    pre_tax_401k: float
+    after_tax_401k: float
+    pre_tax_hsa: float
+    pre_tax_commuter: float
+    employer_max_match_rate: float
+    is_in_nyc: bool
+    additional_deductions: tuple[BenefitDeduction, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PaycheckResult:
+    """Per-period breakdown returned by calculate_paycheck, in the order of BREAKDOWN_KEYS."""
+
+    gross_income_per_period: float
+    net_income_per_period_after_tax: float
+    net_income_per_period_after_tax_contributions: float
+    percent_taxed: float
+    federal_tax: float
+    state_tax: float
+    ny_pfl_tax: float
+    ny_sdi_tax: float
+    nyc_tax: float
+    social_security_tax: float
+    medicare_tax: float
+    niit_tax: float
+    pre_tax_401k: float
+    after_tax_401k: float
+    employer_match_401k: float
+    pre_tax_hsa: float
+    pre_tax_commuter: float
+
+    BREAKDOWN_KEYS = (
+        "Gross Income Per Period",
+        "Net Income Per Period (Gross - Pretax)",
+        "Net Income Per Period (Gross - Pretax - Contributions)",
+        "Percent Taxed (Total Taxes / Gross)",
+        "Federal Tax",
+        "State Tax",
+        "NY PFL Tax",
+        "NY SDI Tax",
+        "NYC Tax",
+        "Social Security Tax",
+        "Medicare Tax",
+        "NIIT Tax:",
+        "Pre-Tax 401k",
+        "Roth/After-Tax 401k",
+        "Employer Match 401k",
+        "Pre-Tax HSA",
+        "Pre-Tax Commuter",
+    )
+
+    @classmethod
+    def from_breakdown(cls, breakdown: dict[str, float]) -> "PaycheckResult":
+        return cls(*(breakdown[key] for key in cls.BREAKDOWN_KEYS))
+
+    def to_breakdown(self) -> dict[str, float]:
+        """The same string-keyed dict calculate_paycheck_breakdown returns."""
+        return dict(zip(self.BREAKDOWN_KEYS, (getattr(self, field.name) for field in fields(self))))
+
+
 def calculate_income_taxes(income: float, tax_brackets: list[tuple[float, float]]):
     taxes = 0
     for limit, rate in tax_brackets:
@@ -55,22 +133,38 @@ def calculate_ny_disability_employee_tax(magi: float):
     return min(magi * 0.005, 0.60 * 52)
 
 
+def calculate_annual_taxes(year: int, salary_income: float, investment_income: float, pre_tax_401k: float, pre_tax_hsa: float, pre_tax_commuter: float, is_in_nyc: bool) -> dict[str, float]:
+    total_pre_tax_deductions = pre_tax_401k + pre_tax_hsa + pre_tax_commuter
+    adjusted_income = salary_income + investment_income - total_pre_tax_deductions
+    medicare_income = salary_income + investment_income - pre_tax_hsa - pre_tax_commuter
+
+    return {
+        "Federal Tax": get_compiled_brackets("federal", year).tax(adjusted_income),
+        "State Tax": get_compiled_brackets("state", year).tax(adjusted_income),
+        "NY PFL Tax": calculate_ny_paid_family_leave_tax(year, adjusted_income),
+        "NY SDI Tax": calculate_ny_disability_employee_tax(adjusted_income),
+        "NYC Tax": get_compiled_brackets("nyc", year).tax(adjusted_income) if is_in_nyc else 0.0,
+        "Social Security Tax": calculate_social_security_tax(year, adjusted_income),
+        "Medicare Tax": calculate_medicare_tax(medicare_income),
+        "NIIT Tax": calculate_niit_tax(medicare_income, investment_income),
+    }
+
+
 def calculate_paycheck_breakdown(
     payment_frequency: PaymentFrequency, year: int, salary_income: float, investment_income: float, pre_tax_401k: float, after_tax_401k: float, pre_tax_hsa: float, pre_tax_commuter: float, employer_max_match_rate: float, is_in_nyc: bool, additional_deductions: list[BenefitDeduction] = []
 ) -> dict[str, float]:
     total_pre_tax_deductions = pre_tax_401k + pre_tax_hsa + pre_tax_commuter
     adjusted_income = salary_income + investment_income - total_pre_tax_deductions
-    medicare_income = salary_income + investment_income - pre_tax_hsa - pre_tax_commuter
-
-    federal_taxes = calculate_income_taxes(adjusted_income, FEDERAL_TAX_BRACKETS_INDIVIDUAL[year])
-    state_taxes = calculate_income_taxes(adjusted_income, STATE_TAX_BRACKETS_INDIVIDUAL[year])
-    ny_pfl_taxes = calculate_ny_paid_family_leave_tax(year, adjusted_income)
-    ny_sdi_taxes = calculate_ny_disability_employee_tax(adjusted_income)
-    nyc_taxes = calculate_income_taxes(adjusted_income, NYC_TAX_BRACKETS_INDIVIDUAL[year] if is_in_nyc else [])
 
-    social_security_tax = calculate_social_security_tax(year, adjusted_income)
-    medicare_tax = calculate_medicare_tax(medicare_income)
-    niit_tax = calculate_niit_tax(medicare_income, investment_income)
+    taxes = calculate_annual_taxes(year, salary_income, investment_income, pre_tax_401k, pre_tax_hsa, pre_tax_commuter, is_in_nyc)
+    federal_taxes = taxes["Federal Tax"]
+    state_taxes = taxes["State Tax"]
+    ny_pfl_taxes = taxes["NY PFL Tax"]
+    ny_sdi_taxes = taxes["NY SDI Tax"]
+    nyc_taxes = taxes["NYC Tax"]
+    social_security_tax = taxes["Social Security Tax"]
+    medicare_tax = taxes["Medicare Tax"]
+    niit_tax = taxes["NIIT Tax"]
     total_taxes = federal_taxes + state_taxes + nyc_taxes + social_security_tax + medicare_tax + ny_pfl_taxes + ny_sdi_taxes + niit_tax
 
     net_income_after_tax = adjusted_income - total_taxes
@@ -101,25 +195,223 @@ def calculate_paycheck_breakdown(
     }
 
 
+PAYCHECK_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PAYCHECK_CACHE_SIZE)
+def calculate_paycheck(scenario: PaycheckScenario) -> PaycheckResult:
+    """
+    Cached calculate_paycheck_breakdown for a PaycheckScenario. The cache keeps the
+    PAYCHECK_CACHE_SIZE most recently used scenarios; calculate_paycheck.cache_info()
+    reports hits and misses and calculate_paycheck.cache_clear() empties it.
+    """
+    breakdown = calculate_paycheck_breakdown(
+        scenario.payment_frequency,
+        scenario.year,
+        scenario.salary_income,
+        scenario.investment_income,
+        scenario.pre_tax_401k,
+        scenario.after_tax_401k,
+        scenario.pre_tax_hsa,
+        scenario.pre_tax_commuter,
+        scenario.employer_max_match_rate,
+        scenario.is_in_nyc,
+        list(scenario.additional_deductions),
+    )
+    return PaycheckResult.from_breakdown(breakdown)
+
+
+def calculate_paycheck_breakdown_vectorized(
+    payment_frequency: PaymentFrequency, year: int, salary_income: np.ndarray, investment_income: np.ndarray, pre_tax_401k: np.ndarray, after_tax_401k: np.ndarray, pre_tax_hsa: np.ndarray, pre_tax_commuter: np.ndarray, employer_max_match_rate: np.ndarray, is_in_nyc: bool
+) -> dict[str, np.ndarray]:
+    """
+    calculate_paycheck_breakdown over arrays of incomes and contributions (broadcast together).
+    Returns the same line items, each as an array.
+    """
+    import numpy as np
+
+    salary_income, investment_income, pre_tax_401k, after_tax_401k, pre_tax_hsa, pre_tax_commuter, employer_max_match_rate = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (salary_income, investment_income, pre_tax_401k, after_tax_401k, pre_tax_hsa, pre_tax_commuter, employer_max_match_rate))
+    )
+    periods = payment_frequency.value
+    total_pre_tax_deductions = pre_tax_401k + pre_tax_hsa + pre_tax_commuter
+    adjusted_income = salary_income + investment_income - total_pre_tax_deductions
+    medicare_income = salary_income + investment_income - pre_tax_hsa - pre_tax_commuter
+
+    federal_taxes = get_compiled_brackets("federal", year).tax_array(adjusted_income)
+    state_taxes = get_compiled_brackets("state", year).tax_array(adjusted_income)
+    ny_pfl_taxes = np.minimum(adjusted_income * NY_PFL_RATE[year][0], NY_PFL_RATE[year][1])
+    ny_sdi_taxes = np.minimum(adjusted_income * 0.005, 0.60 * 52)
+    nyc_taxes = get_compiled_brackets("nyc", year).tax_array(adjusted_income) if is_in_nyc else np.zeros_like(adjusted_income)
+
+    social_security_tax = np.minimum(adjusted_income, SOCIAL_SECURITY_MAX_TAXABLE_EARNINGS[year]) * SOCIAL_SECURITY_TAX_RATE
+    medicare_tax = medicare_income * MEDICARE_TAX_RATE + np.maximum(0.0, (medicare_income - 200_000) * 0.009)
+    niit_tax = np.maximum(0.0, np.minimum(medicare_income - 200_000, investment_income) * 0.038)
+    total_taxes = federal_taxes + state_taxes + nyc_taxes + social_security_tax + medicare_tax + ny_pfl_taxes + ny_sdi_taxes + niit_tax
+
+    net_income_after_tax = adjusted_income - total_taxes
+    net_income_after_tax_contributions = net_income_after_tax - after_tax_401k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_taxed = total_taxes / (salary_income + investment_income)
+        employer_match_401k = salary_income * np.minimum(employer_max_match_rate, (pre_tax_401k + after_tax_401k) / salary_income) / periods
+
+    return {
+        "Gross Income Per Period": (salary_income + investment_income) / periods,
+        "Net Income Per Period (Gross - Pretax)": net_income_after_tax / periods,
+        "Net Income Per Period (Gross - Pretax - Contributions)": net_income_after_tax_contributions / periods,
+        "Percent Taxed (Total Taxes / Gross)": percent_taxed,
+        "Federal Tax": federal_taxes / periods,
+        "State Tax": state_taxes / periods,
+        "NY PFL Tax": ny_pfl_taxes / periods,
+        "NY SDI Tax": ny_sdi_taxes / periods,
+        "NYC Tax": nyc_taxes / periods,
+        "Social Security Tax": social_security_tax / periods,
+        "Medicare Tax": medicare_tax / periods,
+        "NIIT Tax:": niit_tax / periods,
+        "Pre-Tax 401k": pre_tax_401k / periods,
+        "Roth/After-Tax 401k": after_tax_401k / periods,
+        "Employer Match 401k": employer_match_401k,
+        "Pre-Tax HSA": pre_tax_hsa / periods,
+        "Pre-Tax Commuter": pre_tax_commuter / periods,
+    }
+
+
+def adjusted_income_kinks(year: int, is_in_nyc: bool) -> list[tuple[float, str]]:
+    """
+    Every adjusted income (income after pre-tax deductions) at which some tax changes slope,
+    as sorted (income, source) pairs: bracket thresholds, the Social Security wage base and
+    the points where the NY PFL and SDI caps start to bind.
+    """
+    kinks = [(0.0, "Zero Income")]
+    for jurisdiction, label in (("federal", "Federal Tax"), ("state", "State Tax"), ("nyc", "NYC Tax")):
+        if jurisdiction == "nyc" and not is_in_nyc:
+            continue
+        kinks += [(threshold, label) for threshold in get_compiled_brackets(jurisdiction, year).thresholds if threshold != float("inf")]
+    kinks.append((float(SOCIAL_SECURITY_MAX_TAXABLE_EARNINGS[year]), "Social Security Tax"))
+    kinks.append((NY_PFL_RATE[year][1] / NY_PFL_RATE[year][0], "NY PFL Tax"))
+    kinks.append((0.60 * 52 / 0.005, "NY SDI Tax"))
+    return sorted(kinks)
+
+
+def medicare_income_kinks(investment_income: float) -> list[tuple[float, str]]:
+    """
+    Every Medicare income (income after HSA and commuter deductions, before 401k deferrals) at
+    which a tax changes slope, as sorted (income, source) pairs: the additional Medicare threshold,
+    and where NIIT starts and where it covers all of investment_income.
+    """
+    kinks = [(200_000.0, "Medicare Tax")]
+    if investment_income > 0:
+        kinks += [(200_000.0, "NIIT Tax"), (200_000.0 + investment_income, "NIIT Tax")]
+    return sorted(kinks)
+
+
+class PiecewiseLinearTax:
+    """
+    Total annual tax as a piecewise-linear function of one pre-tax contribution, exact between
+    breakpoints. Medicare and NIIT are based on income before 401k deferrals, so for the 401k
+    they only shift the function and all slope changes come from adjusted_income_kinks; HSA
+    dollars also lower the Medicare base, so medicare_income_kinks are breakpoints too.
+    """
+
+    __slots__ = ("breakpoints", "values", "slopes")
+
+    def __init__(self, breakpoints: list[float], values: list[float]):
+        self.breakpoints = tuple(breakpoints)
+        self.values = tuple(values)
+        slopes = [(v1 - v0) / (x1 - x0) for x0, x1, v0, v1 in zip(breakpoints, breakpoints[1:], values, values[1:])]
+        self.slopes = tuple(slopes + slopes[-1:]) if slopes else (0.0,)
+
+    def _segment(self, contribution: float) -> int:
+        return max(0, bisect_right(self.breakpoints, contribution) - 1)
+
+    def __call__(self, contribution: float) -> float:
+        i = self._segment(contribution)
+        return self.values[i] + (contribution - self.breakpoints[i]) * self.slopes[i]
+
+    def marginal_rate(self, contribution: float) -> float:
+        """Tax saved per extra pre-tax dollar contributed at this point."""
+        return -self.slopes[self._segment(contribution)]
+
+
+def total_tax_function(year: int, salary_income: float, investment_income: float, pre_tax_hsa: float, pre_tax_commuter: float, is_in_nyc: bool, max_contribution: float) -> PiecewiseLinearTax:
+    """Builds PiecewiseLinearTax over pre-tax 401k contributions from 0 to max_contribution."""
+    income_before_401k = salary_income + investment_income - pre_tax_hsa - pre_tax_commuter
+    breakpoints = sorted({0.0, float(max_contribution)} | {income_before_401k - kink for kink, _ in adjusted_income_kinks(year, is_in_nyc) if 0 < income_before_401k - kink < max_contribution})
+    values = [sum(calculate_annual_taxes(year, salary_income, investment_income, c, pre_tax_hsa, pre_tax_commuter, is_in_nyc).values()) for c in breakpoints]
+    return PiecewiseLinearTax(breakpoints, values)
+
+
+def hsa_tax_function(year: int, salary_income: float, investment_income: float, pre_tax_401k: float, pre_tax_commuter: float, is_in_nyc: bool, max_contribution: float) -> PiecewiseLinearTax:
+    """Builds PiecewiseLinearTax over pre-tax HSA contributions from 0 to max_contribution."""
+    income = salary_income + investment_income - pre_tax_commuter
+    kinks = [income - pre_tax_401k - kink for kink, _ in adjusted_income_kinks(year, is_in_nyc)] + [income - kink for kink, _ in medicare_income_kinks(investment_income)]
+    breakpoints = sorted({0.0, float(max_contribution)} | {c for c in kinks if 0 < c < max_contribution})
+    values = [sum(calculate_annual_taxes(year, salary_income, investment_income, pre_tax_401k, c, pre_tax_commuter, is_in_nyc).values()) for c in breakpoints]
+    return PiecewiseLinearTax(breakpoints, values)
+
+
+def optimize_pre_tax_401k(year: int, salary_income: float, investment_income: float, total_401k: float, pre_tax_hsa: float, pre_tax_commuter: float, is_in_nyc: bool, retirement_tax_rate: float, pre_tax_limit: float | None = None) -> dict[str, float]:
+    """
+    Splits total_401k between pre-tax and Roth to minimize tax now plus tax on withdrawal of the
+    pre-tax part at retirement_tax_rate. The objective is piecewise linear in the pre-tax amount,
+    so its minimum sits on a breakpoint and walking them gives the exact answer.
+    """
+    max_pre_tax = total_401k if pre_tax_limit is None else min(total_401k, pre_tax_limit)
+    tax = total_tax_function(year, salary_income, investment_income, pre_tax_hsa, pre_tax_commuter, is_in_nyc, max_pre_tax)
+    best = min(tax.breakpoints, key=lambda c: tax(c) + retirement_tax_rate * c)
+    return {
+        "Pre-Tax 401k": best,
+        "Roth/After-Tax 401k": total_401k - best,
+        "Tax Now": tax(best),
+        "Deferred Tax": retirement_tax_rate * best,
+        "Marginal Rate At Split": tax.marginal_rate(best),
+    }
+
+
 # def calculate_paycheck_breakdown_with_bonus(payment_frequency: PaymentFrequency, year: int, salary_income: float, bonus_income: float, investment_income: float, pre_tax_401k: float, roth_401k: float, pre_tax_hsa: float, pre_tax_commuter: float, employer_match_rate: float, is_in_nyc: bool):
 #     paycheck_per_period, deductions = calculate_paycheck_breakdown(payment_frequency, year, salary_income + bonus_income, investment_income, pre_tax_401k, roth_401k, pre_tax_hsa, pre_tax_commuter, employer_match_rate, is_in_nyc)
 #     return paycheck_per_period  / payment_frequency.value, deductions
-year = 2026
-payment_frequency = PaymentFrequency.BIWEEKLY
-salary_income = 229_500
-employer_max_match_rate = 0  # 0.03
-investment_income = 0.0
-pre_tax_401k = LIMITS_401k_INDIVIDUAL_PRETAX[year]
-after_tax_401k = 0  # LIMITS_401k_INDIVIDUAL_TOTAL[year] - LIMITS_401k_INDIVIDUAL_PRETAX[year] - employer_max_match_rate * salary_income
-pre_tax_hsa = LIMITS_HSA_INDIVIDUAL[year] - 850
-pre_tax_commuter = 0
-is_in_nyc = True
-
-breakdown = calculate_paycheck_breakdown(payment_frequency, year, salary_income, investment_income, pre_tax_401k, after_tax_401k, pre_tax_hsa, pre_tax_commuter, employer_max_match_rate, is_in_nyc=is_in_nyc)
-
-print(f"Payment Frequency: {payment_frequency}")
-for breakdown, amount in breakdown.items():
-    if "percent" not in breakdown.lower():
-        print(f"{breakdown}: ${amount:.2f}")
-    else:
-        print(f"{breakdown}: %{100 * amount:.2f}")
+
+
+#
+# CLI
+#
+
+
+def print_breakdown(payment_frequency: PaymentFrequency, breakdown: dict[str, float]):
+    print(f"Payment Frequency: {payment_frequency}")
+    for item, amount in breakdown.items():
+        if "percent" not in item.lower():
+            print(f"{item}: ${amount:.2f}")
+        else:
+            print(f"{item}: %{100 * amount:.2f}")
+
+
+def main(argv=None):
+    """
+    Paycheck breakdown for one salary. Defaults are the example scenario: the 2026 pre-tax 401k
+    limit, the HSA limit less $850 of employer money, no match and living in NYC.
+    """
+    parser = argparse.ArgumentParser(description="Per-paycheck taxes and contributions for a salary.")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--salary", type=float, default=229_500)
+    parser.add_argument("--frequency", choices=[f.name.lower() for f in PaymentFrequency], default="biweekly")
+    parser.add_argument("--investment-income", type=float, default=0.0)
+    parser.add_argument("--pre-tax-401k", type=float, default=None, help="default: the year's pre-tax limit")
+    parser.add_argument("--after-tax-401k", type=float, default=0)
+    parser.add_argument("--hsa", type=float, default=None, help="default: the year's HSA limit - 850")
+    parser.add_argument("--commuter", type=float, default=0)
+    parser.add_argument("--match", type=float, default=0, help="employer max match rate, e.g. 0.03")
+    parser.add_argument("--not-nyc", action="store_true", help="no NYC income tax")
+    args = parser.parse_args(argv)
+
+    payment_frequency = PaymentFrequency[args.frequency.upper()]
+    pre_tax_401k = LIMITS_401k_INDIVIDUAL_PRETAX[args.year] if args.pre_tax_401k is None else args.pre_tax_401k
+    pre_tax_hsa = LIMITS_HSA_INDIVIDUAL[args.year] - 850 if args.hsa is None else args.hsa
+
+    breakdown = calculate_paycheck_breakdown(payment_frequency, args.year, args.salary, args.investment_income, pre_tax_401k, args.after_tax_401k, pre_tax_hsa, args.commuter, args.match, is_in_nyc=not args.not_nyc)
+    print_breakdown(payment_frequency, breakdown)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-import matplotlib.pyplot as plt
+import numpy as np
+from cash_flow import Ledger, Loan
 
 def calculate_monthly_payment(principal, annual_interest_rate, loan_term_years):
     monthly_interest_rate = annual_interest_rate / 12
@@ -6,84 +7,85 @@ def calculate_monthly_payment(principal, annual_interest_rate, loan_term_years):
     monthly_payment = (principal * monthly_interest_rate) / (1 - (1 + monthly_interest_rate) ** -total_months)
     return monthly_payment
 
-def simulate_loan_repayment(principal, annual_interest_rate, loan_term_years):
+def repayment_ledger(principal, annual_interest_rate, loan_term_years):
+    """The loan alone, on its level payment, as a cash_flow Ledger (any argument may be an array)."""
+    total_months = int(np.max(loan_term_years)) * 12
     monthly_payment = calculate_monthly_payment(principal, annual_interest_rate, loan_term_years)
-    monthly_interest_rate = annual_interest_rate / 12
-    total_months = loan_term_years * 12
-    
-    months = []
-    remaining_principal = []
-    total_interest_paid = []
-    total_amount_paid = []
-
-    current_principal = principal
-    current_total_interest_paid = 0
-    current_total_amount_paid = 0
-    
-    for month in range(1, total_months + 1):
-        interest_payment = current_principal * monthly_interest_rate
-        principal_payment = monthly_payment - interest_payment
-
-        if current_principal - principal_payment < 0:
-            principal_payment = current_principal
-            monthly_payment = principal_payment + interest_payment
-        
-        current_principal -= principal_payment
-        current_total_interest_paid += interest_payment
-        current_total_amount_paid += monthly_payment
-
-        months.append(month)
-        remaining_principal.append(current_principal)
-        total_interest_paid.append(current_total_interest_paid)
-        total_amount_paid.append(current_total_amount_paid)
-
-        if current_principal <= 0:
-            break
-
-    return months, remaining_principal, total_interest_paid, total_amount_paid, monthly_payment, current_total_interest_paid, current_total_amount_paid
-
-principal = 37000
-annual_interest_rate = 0.039
-loan_term_years = 4
-
-months, remaining_principal, total_interest_paid, total_amount_paid, monthly_payment, final_total_interest_paid, final_total_amount_paid = simulate_loan_repayment(
-    principal, annual_interest_rate, loan_term_years)
-
-print(f"Monthly Payment: ${monthly_payment:.2f}")
-print(f"Total Interest Paid: ${final_total_interest_paid:.2f}")
-print(f"Total Amount Paid: ${final_total_amount_paid:.2f}")
-
-plt.figure(figsize=(12, 8))
-
-plt.subplot(2, 2, 1)
-plt.plot(months, remaining_principal, label='Remaining Principal')
-plt.xlabel('Month')
-plt.ylabel('Amount ($)')
-plt.title('Remaining Principal Over Time')
-plt.legend()
-
-plt.subplot(2, 2, 2)
-plt.plot(months, total_interest_paid, label='Total Interest Paid', color='orange')
-plt.xlabel('Month')
-plt.ylabel('Amount ($)')
-plt.title('Total Interest Paid Over Time')
-plt.legend()
-
-plt.subplot(2, 2, 3)
-plt.plot(months, total_amount_paid, label='Total Amount Paid', color='green')
-plt.xlabel('Month')
-plt.ylabel('Amount ($)')
-plt.title('Total Amount Paid Over Time')
-plt.legend()
-
-plt.subplot(2, 2, 4)
-plt.plot(months, total_amount_paid, label='Total Amount Paid', color='green')
-plt.plot(months, total_interest_paid, label='Total Interest Paid', color='orange')
-plt.plot(months, remaining_principal, label='Remaining Principal', color='blue')
-plt.xlabel('Month')
-plt.ylabel('Amount ($)')
-plt.title('Loan Repayment Overview')
-plt.legend()
-
-plt.tight_layout()
-plt.show()
+    return Ledger(total_months, loans=[Loan(principal, annual_interest_rate, monthly_payment, np.multiply(loan_term_years, 12), name="loan")])
+
+def simulate_loan_repayment(principal, annual_interest_rate, loan_term_years):
+    results = repayment_ledger(principal, annual_interest_rate, loan_term_years).simulate()
+    # stop at the payoff month
+    paid_in = results.payoff_month("loan") or results.months
+    months = list(range(1, paid_in + 1))
+    remaining_principal = results.loan_balance["loan"][:paid_in]
+    total_interest_paid = np.cumsum(results.loan_interest["loan"][:paid_in])
+    total_amount_paid = np.cumsum(results.loan_payment["loan"][:paid_in])
+    monthly_payment = results.loan_payment["loan"][paid_in - 1]  # the last, possibly smaller, payment
+    return months, remaining_principal, total_interest_paid, total_amount_paid, monthly_payment, total_interest_paid[-1], total_amount_paid[-1]
+
+def plot_loan_repayment(months, remaining_principal, total_interest_paid, total_amount_paid):
+    """2x2 Figure of the repayment series from simulate_loan_repayment. Does not call plt.show()."""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 8))
+
+    ax = fig.add_subplot(2, 2, 1)
+    ax.plot(months, remaining_principal, label='Remaining Principal')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Remaining Principal Over Time')
+    ax.legend()
+
+    ax = fig.add_subplot(2, 2, 2)
+    ax.plot(months, total_interest_paid, label='Total Interest Paid', color='orange')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Total Interest Paid Over Time')
+    ax.legend()
+
+    ax = fig.add_subplot(2, 2, 3)
+    ax.plot(months, total_amount_paid, label='Total Amount Paid', color='green')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Total Amount Paid Over Time')
+    ax.legend()
+
+    ax = fig.add_subplot(2, 2, 4)
+    ax.plot(months, total_amount_paid, label='Total Amount Paid', color='green')
+    ax.plot(months, total_interest_paid, label='Total Interest Paid', color='orange')
+    ax.plot(months, remaining_principal, label='Remaining Principal', color='blue')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Loan Repayment Overview')
+    ax.legend()
+
+    fig.tight_layout()
+    return fig
+
+def loan_repayment_report(principal, annual_interest_rate, loan_term_years):
+    """simulate_loan_repayment plotted by plot_loan_repayment (for figures.render_batch)."""
+    months, remaining_principal, total_interest_paid, total_amount_paid = simulate_loan_repayment(principal, annual_interest_rate, loan_term_years)[:4]
+    fig = plot_loan_repayment(months, remaining_principal, total_interest_paid, total_amount_paid)
+    fig.suptitle(f"${principal:,.0f} at {annual_interest_rate:.2%} over {loan_term_years} years")
+    return fig
+
+def main():
+    import matplotlib.pyplot as plt
+
+    principal = 37000
+    annual_interest_rate = 0.039
+    loan_term_years = 4
+
+    months, remaining_principal, total_interest_paid, total_amount_paid, monthly_payment, final_total_interest_paid, final_total_amount_paid = simulate_loan_repayment(
+        principal, annual_interest_rate, loan_term_years)
+
+    print(f"Monthly Payment: ${monthly_payment:.2f}")
+    print(f"Total Interest Paid: ${final_total_interest_paid:.2f}")
+    print(f"Total Amount Paid: ${final_total_amount_paid:.2f}")
+
+    plot_loan_repayment(months, remaining_principal, total_interest_paid, total_amount_paid)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
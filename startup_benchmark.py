@@ -0,0 +1,89 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+#
+# Time-to-first-answer for quick queries through finance.py: a fresh
+# interpreter is started for every run, as it is from a shell, and the
+# wall time until it exits is compared with BUDGET_SECONDS. Each query is
+# also run once in-process to time `import finance` plus the answer alone
+# and to list any heavy dependency it pulled in, which is what makes a
+# query slow when a module imports one at top level.
+#
+
+BUDGET_SECONDS = 0.100
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "tabulate", "numba", "scipy")
+
+QUERIES = {
+    "paycheck": ["paycheck", "--salary", "150000"],
+    "taxes": ["taxes", "150000"],
+    "401k": ["401k"],
+}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a fresh interpreter: time import finance + the query with its output
+# discarded, then report the seconds and the heavy modules it loaded.
+_PROBE = """
+import contextlib, io, sys, time
+start = time.perf_counter()
+import finance
+with contextlib.redirect_stdout(io.StringIO()):
+    finance.main(sys.argv[1:])
+seconds = time.perf_counter() - start
+print(seconds, *(name for name in {heavy!r} if name in sys.modules))
+"""
+
+def _wall_seconds(command, repeats):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=HERE, stdout=subprocess.DEVNULL, check=True)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+def probe(query):
+    """(seconds to import finance and answer query in-process, heavy modules it imported)."""
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(heavy=HEAVY_MODULES), *query], cwd=HERE, capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1:]
+
+def benchmark(repeats=10):
+    """
+    (interpreter startup seconds, rows) where each row is (query, median wall
+    seconds of `python finance.py <query>`, in-process seconds, heavy modules
+    imported). Medians are over repeats runs after one warm-up run.
+    """
+    _wall_seconds([sys.executable, "-c", "pass"], 1)
+    interpreter = statistics.median(_wall_seconds([sys.executable, "-c", "pass"], repeats))
+    rows = []
+    for name, query in QUERIES.items():
+        command = [sys.executable, os.path.join(HERE, "finance.py"), *query]
+        _wall_seconds(command, 1)
+        wall = statistics.median(_wall_seconds(command, repeats))
+        in_process, heavy = probe(query)
+        rows.append((name, wall, in_process, heavy))
+    return interpreter, rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time quick queries through finance.py from a cold interpreter.")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS, help="seconds allowed per query")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a query is over budget or imports a heavy module")
+    args = parser.parse_args(argv)
+
+    interpreter, rows = benchmark(args.repeats)
+    print(f"interpreter startup (python -c pass): {1000 * interpreter:.1f} ms, budget {1000 * args.budget:.0f} ms")
+    print(f"{'query':<12}{'wall':>10}{'in-process':>12}{'status':>8}  heavy imports")
+    failed = False
+    for name, wall, in_process, heavy in rows:
+        ok = wall <= args.budget and not heavy
+        failed |= not ok
+        print(f"{name:<12}{1000 * wall:>8.1f}ms{1000 * in_process:>10.1f}ms{'ok' if ok else 'SLOW':>8}  {', '.join(heavy) or '-'}")
+    if args.check and failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
 FEDERAL_TAX_BRACKETS_INDIVIDUAL: dict[int, list[tuple[float, float]]] = {
     2014: [(9_075, 0.10), (36_900, 0.15), (89_350, 0.25), (186_350, 0.28), (405_100, 0.33), (406_750, 0.35), (float("inf"), 0.396)],
     2015: [(9_225, 0.10), (37_450, 0.15), (90_750, 0.25), (189_300, 0.28), (411_500, 0.33), (413_200, 0.35), (float("inf"), 0.396)],
@@ -62,3 +65,63 @@ SOCIAL_SECURITY_MAX_TAXABLE_EARNINGS = {
     2025: 176_100,
     2026: 184_500,
 }
+
+TAX_BRACKETS_INDIVIDUAL: dict[str, dict[int, list[tuple[float, float]]]] = {
+    "federal": FEDERAL_TAX_BRACKETS_INDIVIDUAL,
+    "state": STATE_TAX_BRACKETS_INDIVIDUAL,
+    "nyc": NYC_TAX_BRACKETS_INDIVIDUAL,
+}
+
+
+class CompiledBrackets:
+    """
+    A bracket schedule compiled once for lookups. The (limit, rate) lists above give the
+    width of each bracket in order; compiling turns them into sorted upper thresholds,
+    lower thresholds, the cumulative tax owed at each lower threshold and the marginal rate
+    of each bracket. A tax lookup is then one binary search plus one multiply-add.
+    Income past a schedule that does not end in inf is untaxed, as in the bracket walk.
+    """
+
+    __slots__ = ("thresholds", "lower", "base_tax", "rates", "_arrays")
+
+    def __init__(self, tax_brackets: list[tuple[float, float]]):
+        thresholds, base_tax = [], [0.0]
+        upper = tax = 0.0
+        for limit, rate in tax_brackets:
+            upper += limit
+            tax += limit * rate if limit != float("inf") else 0.0
+            thresholds.append(upper)
+            base_tax.append(tax)
+        self.thresholds = tuple(thresholds)
+        self.lower = (0.0,) + self.thresholds
+        self.base_tax = tuple(base_tax)
+        self.rates = tuple(rate for _, rate in tax_brackets) + (0.0,)
+        self._arrays = None
+
+    def tax(self, income: float) -> float:
+        i = bisect_left(self.thresholds, income)
+        return self.base_tax[i] + (income - self.lower[i]) * self.rates[i]
+
+    def tax_array(self, incomes):
+        """tax() over a numpy array of incomes."""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = tuple(np.array(values, dtype=float) for values in (self.thresholds, self.lower, self.base_tax, self.rates))
+        thresholds, lower, base_tax, rates = self._arrays
+        incomes = np.asarray(incomes, dtype=float)
+        i = np.searchsorted(thresholds, incomes, side="left")
+        return base_tax[i] + (incomes - lower[i]) * rates[i]
+
+    def marginal_rate(self, income: float) -> float:
+        """Rate applied to the next dollar earned above income."""
+        return self.rates[bisect_right(self.thresholds, income)]
+
+    def effective_rate(self, income: float) -> float:
+        return self.tax(income) / income if income > 0 else 0.0
+
+
+@lru_cache(maxsize=None)
+def get_compiled_brackets(jurisdiction: str, year: int) -> CompiledBrackets:
+    """Compiled schedule for 'federal', 'state' or 'nyc' in a given year, built once and cached."""
+    return CompiledBrackets(TAX_BRACKETS_INDIVIDUAL[jurisdiction][year])
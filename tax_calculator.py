@@ -1,3 +1,5 @@
+import argparse
+
 def calculate_federal_tax(income: float):
     standard_deduction = 13850
     taxable_income = max(income - standard_deduction, 0)
@@ -74,11 +76,17 @@ def calculate_total_taxes(income):
     total_tax = federal_tax + medicare_tax + social_security_tax + ny_state_tax
     return total_tax, federal_tax, medicare_tax, social_security_tax, ny_state_tax
 
-income = 213_908 - 24_000 - 14_000
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simplified 2023 federal, NY state and payroll taxes on an income.")
+    parser.add_argument("income", type=float, nargs="?", default=213_908 - 24_000 - 14_000)
+    args = parser.parse_args(argv)
+
+    total_tax, federal_tax, medicare_tax, social_security_tax, ny_state_tax = calculate_total_taxes(args.income)
+    print(f"Total Tax: ${total_tax:.2f}")
+    print(f"Federal Tax: ${federal_tax:.2f}")
+    print(f"Medicare Tax: ${medicare_tax:.2f}")
+    print(f"Social Security Tax: ${social_security_tax:.2f}")
+    print(f"NY State Tax: ${ny_state_tax:.2f}")
 
-total_tax, federal_tax, medicare_tax, social_security_tax, ny_state_tax = calculate_total_taxes(income)
-print(f"Total Tax: ${total_tax:.2f}")
-print(f"Federal Tax: ${federal_tax:.2f}")
-print(f"Medicare Tax: ${medicare_tax:.2f}")
-print(f"Social Security Tax: ${social_security_tax:.2f}")
-print(f"NY State Tax: ${ny_state_tax:.2f}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The scripts import their siblings by module name, as they do when run from
+# their own directory, so put both script directories on the path.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "nyc_historical_mortgage_analysis")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from loan_and_investment_simulation import LoanScenario, rate_for_year
+from rent_vs_buy import DEFAULT_PARAMETERS, simulate_rent_vs_buy
+from repeat_sales_index import annual_appreciation, repeat_sales_index
+
+
+def _appreciation(seed=0, num_pairs=400, first_year=2003, last_year=2012, growth=0.05):
+    """annual_appreciation of a repeat-sales index fitted on random pairs growing at about growth a year."""
+    rng = np.random.default_rng(seed)
+    first = pd.Timestamp(f"{first_year}-01-01") + pd.to_timedelta(rng.integers(0, 365*(last_year - first_year - 3), num_pairs), unit="D")
+    second = first + pd.to_timedelta(rng.integers(365, 365*3, num_pairs), unit="D")
+    first_price = rng.uniform(2e5, 8e5, num_pairs)
+    years = (second - first).days.to_numpy()/365.25
+    second_price = first_price*np.exp(np.log1p(growth)*years + rng.normal(0, 0.02, num_pairs))
+    pairs = pd.DataFrame({"first_date": first, "first_price": first_price, "second_date": second, "second_price": second_price})
+    return annual_appreciation(repeat_sales_index(pairs))
+
+
+def test_annual_appreciation_is_a_year_indexed_series():
+    appreciation = _appreciation()
+    assert isinstance(appreciation, pd.Series)
+    assert appreciation.index[0] > 0
+    assert np.allclose(appreciation.to_numpy(), 0.05, atol=0.03)
+
+
+def test_rent_vs_buy_takes_annual_appreciation():
+    appreciation = _appreciation()
+    parameters = dict(DEFAULT_PARAMETERS, house_appreciation_rate=appreciation)
+    df = simulate_rent_vs_buy(*parameters.values(), 30)
+    expected = simulate_rent_vs_buy(*dict(parameters, house_appreciation_rate=appreciation.to_numpy()).values(), 30)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_loan_scenario_takes_annual_appreciation():
+    appreciation = _appreciation()
+    assert rate_for_year(appreciation, 1) == appreciation.iloc[0]
+    assert rate_for_year(appreciation, 100) == appreciation.iloc[-1]
+    scenario = dict(term=360, rate=0.065, invest_return_rate=0.07, downpayment_percentage=0.2, starting_cash=200_000,
+                    salary_appreciation_rate=0.03, property_tax_rate=0.01, monthly_maintenance_fees=500)
+    net_worth = LoanScenario(home_appreciation_rate=appreciation, **scenario).simulate_net_worth(450_000, 150_000, 30)
+    expected = LoanScenario(home_appreciation_rate=appreciation.to_numpy(), **scenario).simulate_net_worth(450_000, 150_000, 30)
+    np.testing.assert_array_equal(net_worth, expected)
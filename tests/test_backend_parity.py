@@ -0,0 +1,25 @@
+import pytest
+
+import accelerate
+import cash_flow_benchmark
+import rent_vs_buy
+
+requires_numba = pytest.mark.skipif(not accelerate.JIT_ENABLED, reason="numba is not installed (or FINANCE_DISABLE_JIT is set)")
+
+
+@pytest.mark.parametrize("backend", ["numpy", pytest.param("jit", marks=requires_numba)])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_cash_flow_backends_match_the_uncompiled_kernel(backend, seed):
+    parity = cash_flow_benchmark.check_parity(num_scenarios=20, seed=seed, backends=[backend])
+    assert {name: differences[backend] for name, differences in parity.items()} == {name: 0.0 for name in parity}
+
+
+@requires_numba
+def test_rent_vs_buy_compiled_loop_matches_the_uncompiled_loop():
+    assert rent_vs_buy.check_parity(30)["uncompiled loop"] == 0.0
+
+
+@pytest.mark.parametrize("simulation_years", [5, 30])
+def test_rent_vs_buy_loop_matches_net_worth_paths(simulation_years):
+    # closed forms sum in another order, so only rounding differs
+    assert rent_vs_buy.check_parity(simulation_years)["net_worth_paths"] < 1e-6
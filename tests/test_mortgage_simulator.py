@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from arm_rate_benchmark import reference_arm_rates
+from fed_rate_paths import RandomWalkModel, generate_paths
+from mortgage_simulator import Mortgage, MortgageResults, arm_rate_schedule
+
+
+def _append(results, months):
+    for month in months:
+        results.append(month, 0.05, 100.0*month, 10.0*month, 1000.0 - month)
+
+
+def test_results_grow_while_a_column_view_is_alive():
+    results = MortgageResults()
+    _append(results, range(1, 4))
+    balance = results.remaining_balance
+    _append(results, range(4, 5004))
+    assert len(results) == 5003
+    np.testing.assert_array_equal(balance, [999.0, 998.0, 997.0])
+    np.testing.assert_array_equal(results.month, np.arange(1, 5004))
+
+    interest = results.interest_paid
+    results.extend(np.arange(5004, 20004), 0.05, 0.0, 0.0, 0.0)
+    assert len(interest) == 5003
+    assert len(results.interest_paid) == 20003
+
+
+@pytest.mark.parametrize("arm_schedule, arm_caps", [("5/1", "2/2/5"), ("7/2", "2/1/5"), ("7/2", "2/2/5"), ("3/1", None), (None, "2/2/5"), (None, None)])
+@pytest.mark.parametrize("num_fed_rates", [360, 100, 11])
+def test_arm_rate_schedule_matches_the_per_month_rates(arm_schedule, arm_caps, num_fed_rates):
+    fed_rates = list(generate_paths(RandomWalkModel(), 1, num_fed_rates, seed=7, max_workers=1)[0])
+    product = dict(margin=0.015, arm_schedule=arm_schedule, arm_caps=arm_caps)
+    expected = reference_arm_rates(fed_rates, 360, **product)
+    assert arm_rate_schedule(fed_rates, num_months=360, **product).tolist() == expected
+
+
+def test_arm_rate_schedule_rejects_empty_fed_rates():
+    with pytest.raises(ValueError, match="at least one Fed rate"):
+        arm_rate_schedule([], 0.015, 360, "5/1", "2/2/5")
+
+
+@pytest.mark.parametrize("mortgage_type, arm_schedule", [("fixed", None), ("arm", None), ("arm", "5/1")])
+def test_simulate_takes_ndarray_fed_rates(mortgage_type, arm_schedule):
+    fed_rates = np.linspace(0.03, 0.05, 360)
+    product = dict(mortgage_type=mortgage_type, arm_schedule=arm_schedule, arm_caps="2/2/5" if arm_schedule else None)
+    results = Mortgage(400_000, fed_rates, 0.02, **product).simulate()
+    expected = Mortgage(400_000, fed_rates.tolist(), 0.02, **product).simulate()
+    assert len(results) == 360
+    np.testing.assert_array_equal(results.remaining_balance, expected.remaining_balance)
@@ -0,0 +1,26 @@
+import csv
+
+from mortgage_sweep import DEFAULT_GRID, PRODUCTS, expand_grid, run_sweep
+
+
+def test_expand_grid_crosses_parameters_only_with_products_they_apply_to():
+    cases = expand_grid(DEFAULT_GRID)
+    by_product = {product: [c for c in cases if c["product"] == product] for product in PRODUCTS}
+    margins = len(DEFAULT_GRID["margin"])
+    caps = len(DEFAULT_GRID["arm_caps"])
+    refis = len(DEFAULT_GRID["refi_month"])*len(DEFAULT_GRID["refi_fees"])
+    assert len(by_product["Fixed30"]) == margins
+    assert len(by_product["5/1 ARM"]) == margins*caps
+    assert len(by_product["Refi (5/1->Fixed)"]) == margins*caps*refis
+    assert all(c["arm_caps"] is None and c["refi_month"] is None for c in by_product["Fixed30"])
+    assert [c["case_id"] for c in cases] == list(range(len(cases)))
+
+
+def test_resumed_sweep_skips_cases_with_unused_parameters(tmp_path):
+    grid = {"product": ["Fixed30", "5/1 ARM"], "arm_caps": ["1/1/5", "2/2/5"], "refi_fees": [0.0, 2000.0]}
+    output = str(tmp_path / "sweep.csv")
+    fed_rates = [0.03]*360
+    assert run_sweep(grid, fed_rates, output, max_workers=1) == 3
+    assert run_sweep(grid, fed_rates, output, max_workers=1) == 0
+    with open(output, newline='') as f:
+        assert len(list(csv.DictReader(f))) == 3
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from paycheck_calculator import calculate_annual_taxes, hsa_tax_function, optimize_pre_tax_401k, total_tax_function
+
+
+def _total_tax(year, salary, investment, pre_tax_401k, pre_tax_hsa, commuter, is_in_nyc):
+    return sum(calculate_annual_taxes(year, salary, investment, pre_tax_401k, pre_tax_hsa, commuter, is_in_nyc).values())
+
+
+@pytest.mark.parametrize("salary, investment", [(150_000, 0.0), (203_000, 0.0), (180_000, 24_000.0), (410_000, 5_000.0)])
+def test_401k_tax_function_is_exact(salary, investment):
+    tax = total_tax_function(2026, salary, investment, 4_000, 0, True, 24_500)
+    for c in np.linspace(0, 24_500, 241):
+        assert tax(c) == pytest.approx(_total_tax(2026, salary, investment, c, 4_000, 0, True), abs=1e-6)
+
+
+@pytest.mark.parametrize("salary, investment", [(150_000, 0.0), (203_000, 0.0), (180_000, 24_000.0), (410_000, 5_000.0)])
+def test_hsa_tax_function_is_exact(salary, investment):
+    tax = hsa_tax_function(2026, salary, investment, 24_500, 0, True, 8_000)
+    for c in np.linspace(0, 8_000, 161):
+        assert tax(c) == pytest.approx(_total_tax(2026, salary, investment, 24_500, c, 0, True), abs=1e-6)
+
+
+def test_hsa_breakpoints_include_the_medicare_surcharge_threshold():
+    # Medicare income 203k: the surcharge stops applying after the first 3k of HSA dollars
+    tax = hsa_tax_function(2026, 203_000, 0.0, 24_500, 0, True, 8_000)
+    assert 3_000 in tax.breakpoints
+    assert tax.marginal_rate(1_000) == pytest.approx(tax.marginal_rate(4_000) + 0.009)
+
+
+def test_optimize_pre_tax_401k_matches_a_grid_search():
+    best = optimize_pre_tax_401k(2026, 229_500, 0.0, 24_500, 3_500, 0, True, retirement_tax_rate=0.2)
+    grid = np.linspace(0, 24_500, 24_501)
+    objective = [_total_tax(2026, 229_500, 0.0, c, 3_500, 0, True) + 0.2*c for c in grid]
+    assert best["Tax Now"] + best["Deferred Tax"] == pytest.approx(min(objective), abs=1e-6)
@@ -0,0 +1,35 @@
+import pytest
+
+import raw_data_to_csv
+from raw_data_to_csv import convert_all, load_manifest
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    for name in ("2020_queens.xlsx", "2021_queens.xlsx"):
+        (raw_dir / name).write_bytes(b"not a workbook")
+    return raw_dir
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_bad_workbooks_are_reported_and_skipped(raw_dir, tmp_path, capsys, max_workers):
+    csv_dir = tmp_path / "csv"
+    assert convert_all(str(raw_dir), str(csv_dir), max_workers=max_workers) == 0
+    assert capsys.readouterr().out.count("Error converting") == 2
+    assert load_manifest(str(csv_dir)) == {}
+
+
+def test_serial_run_continues_past_a_bad_workbook(raw_dir, tmp_path, monkeypatch):
+    def convert_file(file_path, csv_file_path):
+        if file_path.endswith("2020_queens.xlsx"):
+            raise ValueError("corrupt workbook")
+        with open(csv_file_path, "w") as f:
+            f.write("BOROUGH\n4\n")
+        return 1
+
+    monkeypatch.setattr(raw_data_to_csv, "convert_file", convert_file)
+    csv_dir = tmp_path / "csv"
+    assert convert_all(str(raw_dir), str(csv_dir), max_workers=1) == 1
+    assert list(load_manifest(str(csv_dir))) == ["2021_queens.xlsx"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from repeat_sales_index import RepeatSalesIndexCache
+
+
+def _pairs(rng, neighborhood, num_pairs, first_year, last_year):
+    first = pd.Timestamp(f"{first_year}-01-01") + pd.to_timedelta(rng.integers(0, 365*(last_year - first_year - 2), num_pairs), unit="D")
+    second = first + pd.to_timedelta(rng.integers(365, 365*2, num_pairs), unit="D")
+    first_price = rng.uniform(2e5, 8e5, num_pairs)
+    return pd.DataFrame({
+        "NEIGHBORHOOD": neighborhood,
+        "BUILDING CLASS CATEGORY": "01 ONE FAMILY DWELLINGS",
+        "first_date": first,
+        "first_price": first_price,
+        "second_date": second,
+        "second_price": first_price*np.exp(0.04*(second - first).days.to_numpy()/365.25),
+    })
+
+
+def test_refresh_refits_only_changed_segments(tmp_path):
+    rng = np.random.default_rng(0)
+    pairs = pd.concat([_pairs(rng, "CHELSEA", 60, 2003, 2010), _pairs(rng, "HARLEM", 60, 2003, 2010)], ignore_index=True)
+    cache = RepeatSalesIndexCache(str(tmp_path / "cache.json"))
+    assert cache.refresh(pairs) == 2
+    assert cache.refresh(pairs) == 0
+
+    more = pd.concat([pairs, _pairs(rng, "CHELSEA", 10, 2004, 2010)], ignore_index=True)
+    assert RepeatSalesIndexCache(str(tmp_path / "cache.json")).refresh(more) == 1
+
+
+def test_refresh_refits_every_segment_when_the_date_range_grows(tmp_path):
+    rng = np.random.default_rng(0)
+    pairs = pd.concat([_pairs(rng, "CHELSEA", 60, 2003, 2010), _pairs(rng, "HARLEM", 60, 2003, 2010)], ignore_index=True)
+    cache = RepeatSalesIndexCache(str(tmp_path / "cache.json"))
+    cache.refresh(pairs)
+
+    new_year = _pairs(rng, "CHELSEA", 10, 2008, 2012)
+    assert new_year["second_date"].dt.year.max() > pairs["second_date"].dt.year.max()
+    assert cache.refresh(pd.concat([pairs, new_year], ignore_index=True)) == 2
+    chelsea = cache.index("CHELSEA", "01 ONE FAMILY DWELLINGS")
+    harlem = cache.index("HARLEM", "01 ONE FAMILY DWELLINGS")
+    assert chelsea.index.equals(harlem.index)
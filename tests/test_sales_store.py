@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from sales_store import build_store, load_sales
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """Two small borough files with 100 neighborhoods each, none shared."""
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    for year, borough in ((2019, "queens"), (2020, "bronx")):
+        pd.DataFrame({
+            "BOROUGH": "4" if borough == "queens" else "2",
+            "NEIGHBORHOOD": [f"{borough} {i:03d}  " for i in range(100)],
+            "BUILDING CLASS CATEGORY": "10  COOPS - ELEVATOR APARTMENTS",
+            "BLOCK": [str(100 + i) for i in range(100)],
+            "LOT": "1",
+            "SALE PRICE": [f"{500_000 + 1000*i:,}" for i in range(100)],
+            "SALE DATE": f"{year}-06-01",
+        }).to_csv(csv_dir / f"{year}_{borough}.csv", index=False)
+    return str(csv_dir)
+
+
+def test_load_sales_prunes_the_csvs_without_a_store(csv_dir, tmp_path):
+    df = load_sales(str(tmp_path / "no_store"), columns=["NEIGHBORHOOD", "SALE PRICE"], boroughs=["queens"], csv_dir=csv_dir)
+    assert list(df.columns) == ["NEIGHBORHOOD", "SALE PRICE", "year", "borough"]
+    assert len(df) == 100
+    assert set(df["year"]) == {2019}
+    assert df["NEIGHBORHOOD"].dtype == "category"
+    assert df["NEIGHBORHOOD"].iloc[0] == "queens 000"
+
+
+def test_store_matches_the_csvs(csv_dir, tmp_path):
+    pytest.importorskip("pyarrow")
+    store_dir = str(tmp_path / "store")
+    assert build_store(csv_dir, store_dir) == 2
+    assert build_store(csv_dir, store_dir) == 0
+
+    # 200 neighborhoods in all: more categories than int8 codes can hold
+    stored = load_sales(store_dir, csv_dir=csv_dir)
+    assert stored["NEIGHBORHOOD"].dtype == "category"
+    assert len(stored["NEIGHBORHOOD"].cat.categories) == 200
+    from_csv = load_sales(str(tmp_path / "no_store"), csv_dir=csv_dir)
+    key = ["year", "BLOCK"]
+    stored = stored.sort_values(key).reset_index(drop=True)
+    from_csv = from_csv[stored.columns].sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, from_csv, check_categorical=False)
+
+    pruned = load_sales(store_dir, columns=["SALE PRICE"], years=[2020], csv_dir=csv_dir)
+    assert list(pruned.columns) == ["SALE PRICE", "year", "borough"]
+    assert set(pruned["borough"]) == {"bronx"}